@@ -0,0 +1,206 @@
+"""Local read-only HTTP API over the dashboard's cached snapshot.
+
+Serves the same aggregates the pages chart, as JSON or Arrow IPC, so other
+tools can stop scraping the rendered dashboard:
+
+    GET /v1                              list of resources
+    GET /v1/<resource>?offset=0&limit=100&format=json|arrow
+
+Every response carries an ETag derived from the source-file fingerprint and
+the request, so a poll with If-None-Match gets a 304 without touching the
+data. Run it standalone, or inside the Streamlit process (sharing that
+process's snapshot) by setting DASHBOARD_API_PORT:
+
+    python api.py --port 8600
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from compute import ENGAGEMENT_METRICS
+from perf import incr, span
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+CACHE_ENTRIES = 64
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+
+
+def _engagement_by_city(snap, params):
+    index = snap.cities["index"].drop(columns=["start", "stop"])
+    return index.sort_values("engagement", ascending=False).reset_index()
+
+
+def _top_posts(snap, params):
+    metric = params.get("metric", "TotalFKReferences")
+    if metric not in ENGAGEMENT_METRICS:
+        raise ValueError(f"metric must be one of {', '.join(ENGAGEMENT_METRICS)}")
+    return snap.freq.sort_values(metric, ascending=False, kind="stable").reset_index(drop=True)
+
+
+RESOURCES = {
+    "issue_counts": lambda snap, params: snap.aggregates["issue_counts"],
+    "sentiment_split": lambda snap, params: snap.aggregates["sentiment_summary"],
+    "engagement_by_city": _engagement_by_city,
+    "top_posts": _top_posts,
+    "most_commented_posts": lambda snap, params: snap.aggregates["top_posts"],
+    "hourly_counts": lambda snap, params: snap.aggregates["hourly_counts"],
+    "daily_engagement": lambda snap, params: snap.aggregates["daily_engagement"],
+}
+
+
+class ResponseCache:
+    """Encoded response bodies keyed by ETag; an ETag already covers the data version."""
+
+    def __init__(self, entries=CACHE_ENTRIES):
+        self.entries = entries
+        self._bodies = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag):
+        with self._lock:
+            body = self._bodies.get(etag)
+            if body is not None:
+                self._bodies.move_to_end(etag)
+            return body
+
+    def put(self, etag, body):
+        with self._lock:
+            self._bodies[etag] = body
+            while len(self._bodies) > self.entries:
+                self._bodies.popitem(last=False)
+
+
+def make_etag(snap, resource, params):
+    key = repr((snap.fingerprint, resource, sorted(params.items())))
+    return '"' + hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+
+def parse_params(query):
+    params = {k: v[-1] for k, v in parse_qs(query).items()}
+    offset = int(params.get("offset", 0))
+    limit = int(params.get("limit", DEFAULT_LIMIT))
+    if offset < 0 or not 0 < limit <= MAX_LIMIT:
+        raise ValueError(f"offset must be >= 0 and limit between 1 and {MAX_LIMIT}")
+    fmt = params.get("format", "json")
+    if fmt not in ("json", "arrow"):
+        raise ValueError("format must be json or arrow")
+    params.update(offset=offset, limit=limit, format=fmt)
+    return params
+
+
+def encode(snap, resource, frame, params):
+    """Slice one page out of frame and encode it; returns (body, content type, extra headers)."""
+    offset, limit = params["offset"], params["limit"]
+    page = frame.iloc[offset:offset + limit]
+    total = len(frame)
+    next_offset = offset + limit if offset + limit < total else None
+    headers = {"X-Total-Count": str(total), "X-Data-Version": str(snap.version)}
+    if next_offset is not None:
+        headers["Link"] = f'</v1/{resource}?offset={next_offset}&limit={limit}&format={params["format"]}>; rel="next"'
+    if params["format"] == "arrow":
+        import pyarrow as pa
+        table = pa.Table.from_pandas(page, preserve_index=False)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue(), ARROW_MIME, headers
+    rows = page.to_json(orient="records", date_format="iso")
+    meta = json.dumps({"resource": resource, "version": snap.version, "offset": offset,
+                       "limit": limit, "total": total, "next_offset": next_offset})
+    return (meta[:-1] + ', "rows": ' + rows + "}").encode("utf-8"), "application/json", headers
+
+
+class APIHandler(BaseHTTPRequestHandler):
+    refresher = None
+    cache = None
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def do_GET(self, head=False):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["v1"]:
+            return self._send(200, json.dumps({"resources": sorted(RESOURCES)}).encode("utf-8"), "application/json", head=head)
+        if len(parts) != 2 or parts[0] != "v1" or parts[1] not in RESOURCES:
+            return self._error(404, f"unknown resource {url.path}", head)
+        resource = parts[1]
+        try:
+            params = parse_params(url.query)
+        except ValueError as e:
+            return self._error(400, str(e), head)
+
+        snap = self.refresher.current()
+        etag = make_etag(snap, resource, params)
+        if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            incr("api.not_modified")
+            return self._send(304, b"", None, {"ETag": etag}, head=True)
+        cached = self.cache.get(etag)
+        if cached is None:
+            incr("api.miss")
+            try:
+                with span("aggregate", f"api:{resource}"):
+                    frame = RESOURCES[resource](snap, params)
+                    cached = encode(snap, resource, frame, params)
+            except ValueError as e:
+                return self._error(400, str(e), head)
+            self.cache.put(etag, cached)
+        else:
+            incr("api.hit")
+        body, content_type, headers = cached
+        self._send(200, body, content_type, dict(headers, ETag=etag), head=head)
+
+    def _error(self, status, message, head):
+        self._send(status, json.dumps({"error": message}).encode("utf-8"), "application/json", head=head)
+
+    def _send(self, status, body, content_type, headers=None, head=False):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+        # Clients may keep a copy but must revalidate, which is what makes the ETag useful.
+        self.send_header("Cache-Control", "no-cache")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(refresher, host="127.0.0.1", port=8600):
+    handler = type("BoundAPIHandler", (APIHandler,), {"refresher": refresher, "cache": ResponseCache()})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def start_in_background(refresher, host="127.0.0.1", port=8600):
+    server = make_server(refresher, host, port)
+    threading.Thread(target=server.serve_forever, name="aggregates-api", daemon=True).start()
+    return server
+
+
+def main():
+    from snapshot import DATA_DIR, SnapshotRefresher
+
+    parser = argparse.ArgumentParser(description="Serve dashboard aggregates over HTTP")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("DASHBOARD_API_PORT", 8600)))
+    args = parser.parse_args()
+
+    server = make_server(SnapshotRefresher(args.data_dir), args.host, args.port)
+    print(f"serving aggregates on http://{args.host}:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Versioned on-disk snapshot artifacts written by build.py.
+
+Each build goes to its own directory under the artifact root and is
+published by atomically rewriting the CURRENT pointer:
+
+    artifacts/
+        CURRENT                      -> 20260101-120000-3f9c2a1b
+        20260101-120000-3f9c2a1b/
+            manifest.json            sources fingerprint, stage timings, row counts
+            posts.arrow  comments.arrow  freq.arrow
+            aggregates.pkl  cities.pkl  streams.pkl  ingest.pkl  sample.pkl
+
+Frames are uncompressed Arrow IPC files (Feather v2). They are memory-mapped
+read-only on load, so column buffers point straight into the page cache.
+Every Streamlit process on the host that loads the same build shares one
+physical copy of the data, and a new worker starts without parsing a CSV.
+
+The app loads a build only while its recorded source fingerprint still
+matches the CSVs on disk; otherwise it falls back to building in-process.
+"""
+import glob
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import time
+
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.ipc as ipc
+
+ARTIFACT_DIRNAME = "artifacts"
+# Bump when a pickled object changes shape, so builds written by older code are rebuilt instead of loaded.
+ARTIFACT_FORMAT = 9
+KEEP_BUILDS = 3
+FRAMES = ["posts", "comments", "freq"]
+OBJECTS = ["aggregates", "cities", "streams", "ingest", "sample"]
+
+
+def artifact_root(data_dir):
+    return os.environ.get("DASHBOARD_ARTIFACT_DIR", os.path.join(data_dir, ARTIFACT_DIRNAME))
+
+
+def current_build(root):
+    try:
+        with open(os.path.join(root, "CURRENT"), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _normalise(fingerprint):
+    return json.loads(json.dumps(fingerprint))
+
+
+def map_frame(path):
+    """DataFrame over a memory-mapped Arrow IPC file; its numeric and string columns are zero-copy and read-only."""
+    # The mapping stays open for as long as any column still references it.
+    table = ipc.open_file(pa.memory_map(path, "r")).read_all()
+    # split_blocks keeps one block per column, so pandas does not consolidate (copy) same-typed columns.
+    return table.to_pandas(split_blocks=True)
+
+
+def write_build(root, snap, sources, timings=None):
+    """Write snap's frames and derived objects as a new build and publish it; returns the build id."""
+    build_id = time.strftime("%Y%m%d-%H%M%S") + "-" + hashlib.blake2b(
+        repr(sources).encode("utf-8"), digest_size=4).hexdigest()
+    # Several workers may publish the same sources at once; each writes to its own temporary directory.
+    tmp_dir = os.path.join(root, f".tmp-{build_id}-{os.getpid()}")
+    os.makedirs(tmp_dir, exist_ok=True)
+    for name in FRAMES:
+        feather.write_feather(getattr(snap, name), os.path.join(tmp_dir, f"{name}.arrow"), compression="uncompressed")
+    for name in OBJECTS:
+        with open(os.path.join(tmp_dir, f"{name}.pkl"), "wb") as f:
+            pickle.dump(getattr(snap, name), f, protocol=pickle.HIGHEST_PROTOCOL)
+    manifest = {
+        "build": build_id,
+        "format": ARTIFACT_FORMAT,
+        "created_at": time.time(),
+        "sources": _normalise(sources),
+        "rows": {name: len(getattr(snap, name)) for name in FRAMES},
+        "timings": timings or {},
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    build_dir = os.path.join(root, build_id)
+    try:
+        os.replace(tmp_dir, build_dir)
+    except OSError:
+        # Another worker published the same build first; theirs is identical.
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    pointer = os.path.join(root, f"CURRENT.tmp-{os.getpid()}")
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(build_id)
+    os.replace(pointer, os.path.join(root, "CURRENT"))
+    _prune(root, keep=build_id)
+    return build_id
+
+
+def _prune(root, keep, builds=KEEP_BUILDS):
+    # Sessions may still be reading a recent build, so only the oldest ones go.
+    existing = sorted(d for d in glob.glob(os.path.join(root, "*-*")) if os.path.isdir(d))
+    for old in existing[:-builds]:
+        if os.path.basename(old) != keep:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def read_manifest(root, build_id):
+    with open(os.path.join(root, build_id, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_build(root, sources):
+    """Snapshot fields of the current build, or None when there is none or it is stale for sources."""
+    build_id = current_build(root)
+    if build_id is None:
+        return None
+    try:
+        manifest = read_manifest(root, build_id)
+    except FileNotFoundError:
+        return None
+    if manifest.get("format") != ARTIFACT_FORMAT or manifest["sources"] != _normalise(sources):
+        return None
+    build_dir = os.path.join(root, build_id)
+    fields = {name: map_frame(os.path.join(build_dir, f"{name}.arrow")) for name in FRAMES}
+    for name in OBJECTS:
+        with open(os.path.join(build_dir, f"{name}.pkl"), "rb") as f:
+            fields[name] = pickle.load(f)
+    return fields
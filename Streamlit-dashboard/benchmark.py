@@ -0,0 +1,108 @@
+"""Time and peak-memory benchmarks for every page's computation.
+
+Generates (or reuses) synthetic datasets at each scale, builds a snapshot
+from them and runs the compute functions behind each page:
+
+    python benchmark.py --scales 10k 1m --repeat 3 --json bench.json
+"""
+import argparse
+import datetime
+import json
+import os
+import statistics
+import time
+import tracemalloc
+
+import compute
+import synthetic
+from snapshot import build_snapshot
+
+BENCH_DIR = "bench_data"
+
+
+def page_cases(snap):
+    posts, comments, freq = snap.posts, snap.comments, snap.freq
+    customer = snap.customer_comments
+    top_post = customer["PostId"].value_counts().idxmax() if len(customer) else None
+    start = posts["published"].min().date()
+    end = posts["published"].max().date()
+    regions = posts["region.name"].dropna().unique()
+    genders = posts["gender.label"].dropna().unique()
+    return [
+        ("main", "comments_overview", lambda: compute.comments_overview(customer, freq)),
+        ("main", "post_details", lambda: compute.post_details(customer, freq, top_post)),
+        ("main", "all_data_insights", lambda: compute.all_data_insights(posts)),
+        ("Issues-Analysis", "issues_analysis", lambda: compute.issues_analysis(posts, comments, start, end)),
+        ("Demographics", "all_selected", lambda: compute.demographics(posts, regions, genders)),
+        ("Demographics", "one_region", lambda: compute.demographics(posts, regions[:1], genders)),
+        ("Executive-Overview", "executive_overview", lambda: compute.executive_overview(posts)),
+        ("Engagement-Overview", "engagement_overview", lambda: compute.engagement_overview(posts)),
+        ("Usage", "hourly_usage", lambda: compute.hourly_usage(posts)),
+        ("chatbot", "search_data", lambda: compute.search_complaints(posts, "data")),
+        ("chatbot", "top_city", lambda: compute.top_city(posts)),
+        ("chatbot", "engagement_by_city", lambda: compute.engagement_by_city(posts)),
+        ("chatbot", "word_frequencies", lambda: compute.word_frequencies(posts["extract"])),
+    ]
+
+
+def measure(func, repeat=1):
+    timings = []
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return {"seconds": statistics.median(timings), "min_seconds": min(timings), "peak_mb": peak / 1e6}
+
+
+def dataset_dir(scale, seed, bench_dir=BENCH_DIR):
+    data_dir = os.path.join(bench_dir, f"{scale}-seed{seed}")
+    if not os.path.exists(os.path.join(data_dir, "PostIdFrequenceClean.csv")):
+        synthetic.write_dataset(data_dir, synthetic.parse_rows(scale), seed=seed)
+    return data_dir
+
+
+def run(scales, repeat=1, seed=42, bench_dir=BENCH_DIR):
+    results = []
+    for scale in scales:
+        data_dir = dataset_dir(scale, seed, bench_dir)
+        snap_holder = {}
+
+        def build():
+            snap_holder["snap"] = build_snapshot(data_dir, use_artifacts=False)
+
+        # The snapshot build is measured once; it dominates at large scales.
+        results.append({"scale": scale, "page": "snapshot", "case": "build_snapshot", **measure(build)})
+        print_row(results[-1])
+        snap = snap_holder["snap"]
+        for page, case, func in page_cases(snap):
+            results.append({"scale": scale, "page": page, "case": case, **measure(func, repeat)})
+            print_row(results[-1])
+    return results
+
+
+def print_row(row):
+    print(f"{row['scale']:>6}  {row['page']:<20} {row['case']:<20} {row['seconds'] * 1000:>10.1f} ms {row['peak_mb']:>10.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard page computations")
+    parser.add_argument("--scales", nargs="+", default=["10k", "1m"], help="10k, 100k, 1m, 10m or a row count")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=BENCH_DIR, help="where generated datasets are cached")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    print(f"{'scale':>6}  {'page':<20} {'case':<20} {'time':>13} {'peak mem':>13}")
+    results = run(args.scales, repeat=args.repeat, seed=args.seed, bench_dir=args.data_dir)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"run_at": datetime.datetime.now().isoformat(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Offline build of every dashboard artifact, ahead of serving.
+
+Runs the full snapshot build outside Streamlit. Cleaning, feature
+extraction, sentiment, aggregates, city partitions, CX/spike streams and
+topics are all computed. The per-text features (issue classifiers, sub-themes)
+are spread over a process pool. The stream state is folded in row order, and
+the other stages are single vectorised passes, so they run in this process.
+The result is written as a versioned build under the artifact directory.
+App workers then memory-map that build instead of recomputing it, for as
+long as the CSVs it was built from are unchanged:
+
+    python build.py --data-dir . --workers 4
+    python build.py --data-dir . --sentiment      # score new comments first
+
+The CURRENT pointer is swapped atomically once a build is complete, so a
+running app picks the new build up on its next refresh poll.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import artifacts
+import feature_store
+import perf
+import sentiment
+from schema import COMMENTS, read_dataset
+from snapshot import SOURCE_FILES, build_snapshot, source_fingerprint
+
+
+def stage_timings():
+    return {f"{row['phase']}:{row['name']}": row["total_ms"] for row in perf.span_stats()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the dashboard snapshot into a versioned artifact build")
+    parser.add_argument("--data-dir", default=os.environ.get("DASHBOARD_DATA_DIR", "."))
+    parser.add_argument("--out", default=None, help="artifact directory (default: DASHBOARD_ARTIFACT_DIR or <data-dir>/artifacts)")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: all cores)")
+    parser.add_argument("--chunk-rows", type=int, default=feature_store.MAP_CHUNK_ROWS,
+                        help="texts per feature-extraction task")
+    parser.add_argument("--sentiment", action="store_true", help="score unseen comments with VADER before building")
+    args = parser.parse_args()
+    root = args.out or artifacts.artifact_root(args.data_dir)
+    feature_store.MAP_CHUNK_ROWS = args.chunk_rows
+
+    start = time.perf_counter()
+    perf.reset()
+    if args.sentiment:
+        # The score cache is one of the snapshot's sources, so it is brought up to date before fingerprinting.
+        with perf.span("transform", "sentiment_scores"):
+            comments, _ = read_dataset(COMMENTS, os.path.join(args.data_dir, SOURCE_FILES["comments"]))
+            scored = sentiment.update_cache(comments["PostText"], args.data_dir, workers=args.workers)
+        print(f"scored {scored:,} new comment(s)")
+    # Taken before reading, as in build_snapshot: a CSV that changes mid-build leaves this build stale, not wrong.
+    sources = source_fingerprint(args.data_dir)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        snap = build_snapshot(args.data_dir, pool=pool, use_artifacts=False)
+    with perf.span("load", "write_artifacts"):
+        timings = stage_timings()
+        build_id = artifacts.write_build(root, snap, sources, timings)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'stage':<36}{'ms':>12}")
+    for stage, ms in stage_timings().items():
+        print(f"{stage:<36}{ms:>12,.1f}")
+    rows = len(snap.posts) + len(snap.comments) + len(snap.freq)
+    print(f"built {build_id}: {rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s) -> {os.path.join(root, build_id)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Bounded chat history for the chatbot page.
+
+Only the latest CHAT_WINDOW messages stay in session memory and are
+rendered on every rerun. Older messages are appended to a per-session JSONL
+file on disk and compacted into a short summary line. A "load earlier"
+pager reads them back a page at a time, only when asked, so a rerun costs
+the same however long the conversation gets.
+
+The file is created on the first compaction, so short conversations never
+touch the disk. It is deleted when the history is garbage-collected, which
+happens when Streamlit drops the session's state, or at interpreter exit.
+"""
+import json
+import os
+import tempfile
+import weakref
+from collections import deque
+
+CHAT_WINDOW = 20
+PAGE_SIZE = 20
+SUMMARY_TOPICS = 5
+SUMMARY_TOPIC_CHARS = 60
+
+
+class ChatHistory:
+    def __init__(self, window=CHAT_WINDOW, archive_dir=None):
+        self.window = window
+        self.recent = deque()
+        self.archive_dir = archive_dir
+        self.archive_path = None
+        # Byte offset of every archived message, so a page can be read without scanning the file.
+        self.offsets = []
+        self.archived_questions = 0
+        self.topics = deque(maxlen=SUMMARY_TOPICS)
+
+    def __len__(self):
+        return len(self.offsets) + len(self.recent)
+
+    @property
+    def archived(self):
+        return len(self.offsets)
+
+    def append(self, role, content):
+        self.recent.append({"role": role, "content": content})
+        if len(self.recent) > self.window:
+            self._archive(self.recent.popleft())
+
+    def _archive(self, message):
+        if self.archive_path is None:
+            handle, self.archive_path = tempfile.mkstemp(prefix="chat-", suffix=".jsonl", dir=self.archive_dir)
+            os.close(handle)
+            weakref.finalize(self, _remove, self.archive_path)
+        with open(self.archive_path, "a", encoding="utf-8") as f:
+            self.offsets.append(f.tell())
+            f.write(json.dumps(message) + "\n")
+        if message["role"] == "user":
+            self.archived_questions += 1
+            topic = " ".join(str(message["content"]).split())
+            self.topics.append(topic if len(topic) <= SUMMARY_TOPIC_CHARS else topic[:SUMMARY_TOPIC_CHARS - 1] + "…")
+
+    def summary(self):
+        """One line standing in for everything that has left the window."""
+        if not self.archived:
+            return ""
+        text = f"🗜️ {self.archived} earlier message(s) are collapsed, including {self.archived_questions} question(s)"
+        if self.topics:
+            text += ". Most recently: " + "; ".join(f"“{t}”" for t in self.topics)
+        return text
+
+    def earlier(self, pages, page_size=PAGE_SIZE):
+        """The last pages * page_size archived messages, oldest first."""
+        count = min(self.archived, pages * page_size)
+        if not count:
+            return []
+        with open(self.archive_path, encoding="utf-8") as f:
+            f.seek(self.offsets[self.archived - count])
+            return [json.loads(f.readline()) for _ in range(count)]
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,441 @@
+"""Page computations, kept free of Streamlit so they can be benchmarked.
+
+Each function takes the cleaned snapshot frames and returns plain frames or
+values; the page scripts only build figures from the results.
+"""
+import numpy as np
+import pandas as pd
+
+SENTIMENT_BINS = [-10, -0.1, 0.1, 10]
+SENTIMENT_LABELS = ["Negative", "Neutral", "Positive"]
+ENGAGEMENT_METRICS = ["ReplyToCount", "ReshareCount", "TotalFKReferences"]
+
+# --- Sub-Issue Patterns (Issues-Analysis)
+ISSUE_PATTERNS = {
+    "Support": {
+        "No response": r"no response",
+        "Agreeing to resolve": r"resolve",
+        "Rude service": r"rude|ignored"
+    },
+    "Network": {
+        "Outage": r"outage",
+        "Unable to use data": r"unable to use data",
+        "Data Expiry": r"expired"
+    },
+    "Billing": {
+        "Undue charges": r"undue",
+        "Penalty": r"penalty",
+        "Contract": r"contract",
+        "Cancellation": r"cancel",
+        "Debt collection": r"debit|billing"
+    }
+}
+
+
+def sentiment_split(sentiment):
+    sentiment_bins = pd.cut(sentiment, bins=SENTIMENT_BINS, labels=SENTIMENT_LABELS)
+    sentiment_counts = sentiment_bins.value_counts().reset_index()
+    sentiment_counts.columns = ["Sentiment", "Count"]
+    return sentiment_counts
+
+
+# --- main.py
+def comments_overview(comments, freq):
+    top_posts = comments["PostId"].value_counts().reset_index()
+    top_posts.columns = ["PostId", "Count"]
+    result = {
+        "comments_by_date": comments.groupby(comments["published"].dt.date).size().reset_index(name="count"),
+        "top_posts": top_posts,
+        "comment_sentiment_by_date": comment_sentiment_by_date(comments),
+    }
+    for metric in ENGAGEMENT_METRICS:
+        result[f"top_{metric}"] = freq.sort_values(metric, ascending=False).head(10)
+    return result
+
+
+def comment_sentiment_by_date(comments):
+    scored = comments.dropna(subset=["sentiment"])
+    return scored.groupby(scored["published"].dt.date)["sentiment"].mean().reset_index()
+
+
+COMMENT_LENGTH_BIN = 25
+# Longer comments share the last histogram bin.
+COMMENT_LENGTH_CAP = 1000
+
+
+def comment_stats(comments, freq):
+    """Per-post comment counts and lengths plus reply/reshare ratios, built once per snapshot.
+
+    Every statistic is a bincount over integer post codes or comment lengths, so the cost is
+    one pass over the comments however many posts there are.
+    """
+    codes, post_ids = pd.factorize(comments["PostId"])
+    lengths = comments["comment_length"].to_numpy(dtype=np.int64)
+    posted = codes >= 0
+    post_codes, post_lengths = codes[posted], lengths[posted]
+    counts = np.bincount(post_codes, minlength=len(post_ids))
+    starts = np.cumsum(counts) - counts
+    longest = (np.maximum.reduceat(post_lengths[np.argsort(post_codes, kind="stable")], starts)
+               if len(post_ids) else np.empty(0, dtype=np.int64))
+    per_post = pd.DataFrame({
+        "PostId": np.asarray(post_ids),
+        "comments": counts,
+        "avg_length": (np.bincount(post_codes, weights=post_lengths, minlength=len(post_ids)) / counts).round(1),
+        "max_length": longest,
+    })
+    engagement = freq.drop_duplicates("PostId").set_index("PostId")[ENGAGEMENT_METRICS].reindex(post_ids)
+    for metric in ENGAGEMENT_METRICS:
+        per_post[metric] = engagement[metric].to_numpy()
+    total = per_post["TotalFKReferences"].where(per_post["TotalFKReferences"] > 0)
+    per_post["replies_per_100_comments"] = (100 * per_post["ReplyToCount"] / per_post["comments"]).round(1)
+    per_post["reply_ratio"] = (per_post["ReplyToCount"] / total).round(3)
+    per_post["reshare_ratio"] = (per_post["ReshareCount"] / total).round(3)
+    per_post = per_post.sort_values("comments", ascending=False, kind="stable", ignore_index=True)
+
+    # Exact length percentiles come from the cumulative count of each integer length.
+    by_length = np.bincount(lengths)
+    cumulative = np.cumsum(by_length)
+    percentiles = {f"p{q:g}": int(np.searchsorted(cumulative, q / 100 * len(lengths))) if len(lengths) else 0
+                   for q in (50, 90, 99)}
+    bins = np.bincount(np.minimum(lengths, COMMENT_LENGTH_CAP) // COMMENT_LENGTH_BIN)
+    starts = np.arange(len(bins)) * COMMENT_LENGTH_BIN
+    length_hist = pd.DataFrame({
+        "length": [f"{start}+" if start >= COMMENT_LENGTH_CAP else f"{start}–{start + COMMENT_LENGTH_BIN - 1}"
+                   for start in starts],
+        "comments": bins,
+    })
+    posts_by_count = np.bincount(counts)
+    nonzero = np.flatnonzero(posts_by_count)
+    engaged = per_post[ENGAGEMENT_METRICS].sum()
+    return {
+        "per_post": per_post,
+        # PostId -> row of per_post, so a typed ID is one hash lookup.
+        "post_index": pd.Index(per_post["PostId"]),
+        "length_hist": length_hist,
+        "comments_per_post": pd.DataFrame({"comments": nonzero, "posts": posts_by_count[nonzero]}),
+        "summary": {
+            "posts": len(post_ids),
+            "comments": len(comments),
+            "avg_comments": round(float(counts.mean()), 1) if len(counts) else 0.0,
+            "avg_length": round(float(lengths.mean()), 1) if len(lengths) else 0.0,
+            **percentiles,
+            "reply_ratio": round(float(engaged["ReplyToCount"] / engaged["TotalFKReferences"]), 3)
+                           if engaged["TotalFKReferences"] else None,
+            "reshare_ratio": round(float(engaged["ReshareCount"] / engaged["TotalFKReferences"]), 3)
+                             if engaged["TotalFKReferences"] else None,
+        },
+    }
+
+
+POST_META_COLUMNS = ["PostId", "extract", "published"]
+POST_META_LABELS = {"extract": "PostText", "published": "PublishedDate"}
+
+
+def post_details(comments, freq, post_id):
+    positions = np.flatnonzero((comments["PostId"] == post_id).to_numpy())
+    post_df = comments.iloc[positions]
+    freq_row = freq[freq["PostId"] == post_id].squeeze()
+    # Metadata rows stay as positions; the table slices out only the page it shows.
+    meta_positions = positions[~post_df.duplicated(subset=POST_META_COLUMNS).to_numpy()]
+    top_compare = freq.sort_values("TotalFKReferences", ascending=False).head(10).copy()
+    top_compare["Selected"] = (top_compare["PostId"] == post_id).map({True: "Selected", False: "Other"})
+    scored = post_df["sentiment"].dropna()
+    return {
+        "post_df": post_df,
+        "freq_row": freq_row,
+        "meta_positions": meta_positions,
+        "top_compare": top_compare,
+        "avg_sentiment": round(scored.mean(), 2) if len(scored) else None,
+        "sentiment_counts": sentiment_split(scored) if len(scored) else None,
+    }
+
+
+def all_data_insights(posts):
+    sentiment_labels = posts["sentiment"].apply(lambda x: "Positive" if x > 0 else "Negative" if x < 0 else "Neutral")
+    sentiment_summary = sentiment_labels.value_counts().reset_index()
+    sentiment_summary.columns = ["Sentiment", "Count"]
+    issue_counts = posts["issue"].value_counts().reset_index()
+    issue_counts.columns = ["Issue Type", "Count"]
+    return {
+        "total_engagement": int(posts["engagement"].sum()),
+        "average_sentiment": round(posts["sentiment"].mean(), 2),
+        "total_ots": int(posts["OTS"].sum()),
+        "total_posts": len(posts),
+        "hourly_counts": posts.groupby("hour").size().reset_index(name="count"),
+        "daily_engagement": posts.groupby(posts["published"].dt.date)["engagement"].sum().reset_index(),
+        "sentiment_summary": sentiment_summary,
+        "issue_counts": issue_counts,
+    }
+
+
+# --- City drill-down (pages/CityInsights.py)
+def city_partitions(posts):
+    """Row positions of each city's posts plus headline metrics, built once per snapshot."""
+    codes, names = pd.factorize(posts["city.name"], sort=True)
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.searchsorted(sorted_codes, np.arange(len(names)), side="left")
+    stops = np.searchsorted(sorted_codes, np.arange(len(names)), side="right")
+    grouped = posts.groupby("city.name")
+    index = pd.DataFrame({"start": starts, "stop": stops}, index=pd.Index(names, name="city.name"))
+    index["posts"] = index["stop"] - index["start"]
+    index["engagement"] = grouped["engagement"].sum()
+    index["avg_engagement"] = grouped["engagement"].mean().round(2)
+    index["avg_sentiment"] = grouped["sentiment"].mean().round(2)
+    index["OTS"] = grouped["OTS"].sum()
+    index["region"] = grouped["region.name"].first()
+    index["top_issue"] = posts.groupby(["city.name", "customer_issue"]).size().groupby(level=0).idxmax().str[1]
+    return {"index": index, "order": order}
+
+
+def city_slice(posts, partitions, city):
+    start, stop = partitions["index"].loc[city, ["start", "stop"]]
+    return posts.iloc[partitions["order"][start:stop]]
+
+
+def city_summary(posts, partitions, city):
+    city_df = city_slice(posts, partitions, city)
+    category_counts = city_df["category.label"].value_counts().reset_index()
+    category_counts.columns = ["Category", "Count"]
+    issue_counts = city_df["customer_issue"].value_counts().reset_index()
+    issue_counts.columns = ["Issue", "Count"]
+    return {
+        "city_df": city_df,
+        "metrics": partitions["index"].loc[city],
+        "daily": city_df.groupby(city_df["published"].dt.date).size().reset_index(name="count"),
+        "category_counts": category_counts,
+        "issue_counts": issue_counts,
+        "top_posts": city_df.nlargest(20, "engagement")[["published", "extract", "engagement", "sentiment"]],
+    }
+
+
+# --- pages/Issues-Analysis.py
+def filter_dates(df, start_date, end_date):
+    dates = df["published"].dt.date
+    return df[(dates >= start_date) & (dates <= end_date)]
+
+
+def issue_counts(posts):
+    counts = posts["customer_issue"].value_counts().reset_index()
+    counts.columns = ["Issue", "Count"]
+    return counts
+
+
+def sub_issue_counts(posts, category, patterns, by="month", weights=None):
+    """Posts per sub-issue pattern and period; weights (per row of posts) turn counts into sample estimates."""
+    in_category = (posts["customer_issue"] == category).to_numpy()
+    df_sub = posts[in_category]
+    flags = pd.DataFrame(
+        {label: df_sub["extract"].str.contains(pattern, case=False, na=False) for label, pattern in patterns.items()},
+        index=df_sub.index,
+    )
+    if weights is not None:
+        flags = flags.mul(weights[in_category], axis=0)
+    return flags.groupby(df_sub[by]).sum().rename_axis(by).reset_index()
+
+
+def theme_counts(posts, weights=None):
+    # topic is set for every Uncategorized row and only those (see topics.py); it forms the outer sunburst ring.
+    keys = ["customer_issue", "sub_theme"] + (["topic"] if "topic" in posts.columns else [])
+    if weights is None:
+        counts = posts.groupby(keys, dropna=False).size()
+    else:
+        counts = pd.Series(weights, index=posts.index).groupby([posts[k] for k in keys], dropna=False).sum()
+    return counts.reset_index(name="count").rename(columns={"customer_issue": "theme"})
+
+
+def issues_analysis(posts, comments, start_date, end_date):
+    posts = filter_dates(posts, start_date, end_date)
+    comments = filter_dates(comments, start_date, end_date)
+    return {
+        "posts": posts,
+        "comments": comments,
+        "post_count": len(posts),
+        "issue_counts": issue_counts(posts),
+        "support": sub_issue_counts(posts, "Support", ISSUE_PATTERNS["Support"]),
+        "network": sub_issue_counts(posts, "Network", ISSUE_PATTERNS["Network"]),
+        "billing": sub_issue_counts(posts, "Billing", ISSUE_PATTERNS["Billing"], by="day"),
+        "themes": theme_counts(posts),
+    }
+
+
+def issues_estimate(sample, comments, start_date, end_date):
+    """issues_analysis() estimated from a StratifiedSample; counts carry 95% half-widths in "ci"."""
+    rows = sample.rows
+    dates = rows["published"].dt.date
+    mask = ((dates >= start_date) & (dates <= end_date)).to_numpy()
+    posts, weights = rows[mask], sample.weights[mask]
+    post_count, post_ci = sample.estimate_total(mask)
+    counts, half_widths = sample.estimate_counts(mask, rows["customer_issue"])
+    order = counts.sort_values(ascending=False).index
+    return {
+        "comments": filter_dates(comments, start_date, end_date),
+        "post_count": post_count,
+        "issue_counts": pd.DataFrame({"Issue": order, "Count": counts[order].to_numpy()}),
+        "support": sub_issue_counts(posts, "Support", ISSUE_PATTERNS["Support"], weights=weights),
+        "network": sub_issue_counts(posts, "Network", ISSUE_PATTERNS["Network"], weights=weights),
+        "billing": sub_issue_counts(posts, "Billing", ISSUE_PATTERNS["Billing"], by="day", weights=weights),
+        "themes": theme_counts(posts, weights),
+        "ci": {"post_count": post_ci, "issue_counts": half_widths[order].to_numpy()},
+    }
+
+
+# --- pages/Demographics.py
+def demographics(posts, regions, genders):
+    # Row positions instead of a filtered copy; counts only read the columns they need.
+    mask = (posts['region.name'].isin(regions) & posts['gender.label'].isin(genders)).to_numpy()
+    return {
+        "positions": np.flatnonzero(mask),
+        "gender_counts": posts.loc[mask, 'gender.label'].value_counts(),
+        "region_counts": posts.loc[mask, 'region.name'].value_counts(),
+        "city_counts": posts.loc[mask, 'city.name'].value_counts().nlargest(10),
+        "sentiment_counts": sentiment_split(posts.loc[mask, "sentiment"]),
+    }
+
+
+def demographics_estimate(sample, regions, genders):
+    """demographics() estimated from a StratifiedSample; counts carry 95% half-widths in "ci"."""
+    rows = sample.rows
+    mask = (rows['region.name'].isin(regions) & rows['gender.label'].isin(genders)).to_numpy()
+    gender_counts, gender_ci = sample.estimate_counts(mask, rows['gender.label'])
+    region_counts, region_ci = sample.estimate_counts(mask, rows['region.name'])
+    city_counts, city_ci = sample.estimate_counts(mask, rows['city.name'])
+    sentiment_counts, _ = sample.estimate_counts(
+        mask, pd.cut(rows["sentiment"], bins=SENTIMENT_BINS, labels=SENTIMENT_LABELS))
+    region_counts = region_counts.sort_values(ascending=False)
+    city_counts = city_counts.nlargest(10)
+    return {
+        "gender_counts": gender_counts.sort_values(ascending=False),
+        "region_counts": region_counts,
+        "city_counts": city_counts,
+        "sentiment_counts": sentiment_counts.reindex(SENTIMENT_LABELS, fill_value=0).rename_axis("Sentiment")
+                            .reset_index(name="Count"),
+        "ci": {"region_counts": region_ci[region_counts.index].to_numpy(),
+               "city_counts": city_ci[city_counts.index].to_numpy()},
+    }
+
+
+# --- pages/Executive-Overview.py
+def cx_score(posts):
+    avg_sentiment = posts["sentiment"].mean(skipna=True)
+    avg_engagement = posts["engagement"].mean(skipna=True)
+    avg_OTS = posts["OTS"].mean(skipna=True) if "OTS" in posts.columns else 0
+    return round((avg_sentiment * 0.4 + avg_engagement * 0.4 + avg_OTS * 0.2), 2)
+
+
+def voice_of_customer(posts):
+    return {"sentiment_counts": sentiment_split(posts["sentiment"])}
+
+
+def complaint_trends(posts):
+    df_valid = posts.dropna(subset=["published", "engagement"])
+    weeks = df_valid["published"].dt.to_period("W").astype(str)
+    return {"weekly": df_valid.groupby(weeks.rename("Week"))["engagement"].sum().reset_index()}
+
+
+def customer_pulse(posts):
+    top_cities = posts["city.name"].value_counts().head(10).reset_index()
+    top_cities.columns = ["City", "Count"]
+    return {"top_cities": top_cities}
+
+
+def engagement_sentiment(posts):
+    return {
+        "sentiment_by_category": (
+            posts.groupby("category.label")["sentiment"]
+            .mean()
+            .reset_index()
+            .sort_values(by="sentiment")
+        ),
+    }
+
+
+def brand_health(posts):
+    return {"cx_score": cx_score(posts)}
+
+
+def customer_insights(posts):
+    result = {
+        "cat_avg": posts.groupby("category.label")["engagement"].mean().reset_index(),
+        "region_avg": None,
+    }
+    if "region.name" in posts.columns:
+        result["region_avg"] = posts.groupby("region.name")["engagement"].mean().reset_index()
+    return result
+
+
+# One entry per expander on the page, so each can be computed on its own.
+EXECUTIVE_SECTIONS = {
+    "voice": voice_of_customer,
+    "trends": complaint_trends,
+    "pulse": customer_pulse,
+    "insights": engagement_sentiment,
+    "brand": brand_health,
+    "customer": customer_insights,
+}
+
+
+def executive_overview(posts):
+    result = {}
+    for section in EXECUTIVE_SECTIONS.values():
+        result.update(section(posts))
+    return result
+
+
+# --- pages/Engagement-Overview.py
+def engagement_overview(posts):
+    category_counts = posts["category.label"].value_counts(dropna=True).reset_index()
+    category_counts.columns = ["Category", "Count"]
+    sentiment_counts = posts["sentiment"].dropna().round(1).value_counts().reset_index()
+    sentiment_counts.columns = ["Sentiment Score", "Count"]
+    return {
+        "engagement_by_city": (
+            posts.groupby("city.name")["engagement"]
+            .sum()
+            .sort_values(ascending=False)
+            .reset_index()
+            .dropna()
+        ),
+        "category_counts": category_counts,
+        "sentiment_counts": sentiment_counts.sort_values("Sentiment Score"),
+        "ots_by_region": (
+            posts.groupby("region.name")["OTS"]
+            .sum()
+            .sort_values(ascending=False)
+            .reset_index()
+            .dropna()
+        ),
+    }
+
+
+# --- pages/Usage.py
+def hourly_usage(posts):
+    df = posts.dropna(subset=['published'])
+    return df.groupby(['hour', 'platform']).size().reset_index(name='Count').rename(columns={'hour': 'Hour'})
+
+
+# --- pages/chatbot.py
+def search_complaints(posts, keyword):
+    """Row positions of posts whose text contains keyword."""
+    return np.flatnonzero(posts["extract"].str.contains(keyword, case=False, na=False, regex=False).to_numpy())
+
+
+def top_city(posts):
+    counts = posts["city.name"].value_counts()
+    return counts.idxmax(), counts.max()
+
+
+def top_category(posts):
+    return posts["category.label"].value_counts().idxmax()
+
+
+def engagement_by_city(posts, n=10):
+    return posts.groupby("city.name")["engagement"].mean().sort_values(ascending=False).head(n)
+
+
+def word_frequencies(texts, stopwords=(), limit=200):
+    """Top term counts using WordCloud's own token pattern, counted in one vectorised pass."""
+    tokens = texts.dropna().astype(str).str.lower().str.findall(r"\w[\w']+").explode().dropna()
+    tokens = tokens.str.replace(r"'s$", "", regex=True)
+    tokens = tokens[(tokens.str.len() > 1) & ~tokens.isin(set(stopwords)) & ~tokens.str.isdigit()]
+    return tokens.value_counts().head(limit).to_dict()
@@ -0,0 +1,11 @@
+import streamlit as st
+
+CITY_PAGE = "pages/CityInsights.py"
+
+
+def open_city_on_click(event):
+    """Jump to the City Insights page for the bar clicked in a city chart."""
+    points = event.selection.points if event else []
+    if points:
+        st.session_state["selected_city"] = points[0]["x"]
+        st.switch_page(CITY_PAGE)
@@ -0,0 +1,178 @@
+"""Streaming export of filtered rows to CSV or Parquet.
+
+A filter is passed as row positions into the shared snapshot frame rather
+than as a filtered copy. The rows are then serialised chunk by chunk, so
+only one chunk of them is ever materialised as a DataFrame. The output goes
+to a temporary file that backs st.download_button. The file is deleted when
+the session prepares another export or ends. When DASHBOARD_EXPORT_DIR is
+set, it can instead be saved under a file name in that directory.
+"""
+import hashlib
+import os
+import tempfile
+import time
+import weakref
+from dataclasses import dataclass
+
+import numpy as np
+import streamlit as st
+
+CHUNK_ROWS = 50_000
+# Server-side saves are only offered when this is set, and never write outside it.
+EXPORT_DIR = os.environ.get("DASHBOARD_EXPORT_DIR")
+FORMATS = {"CSV": ("csv", "text/csv"), "Parquet": ("parquet", "application/octet-stream")}
+
+
+@dataclass
+class ExportStats:
+    rows: int
+    bytes: int
+    seconds: float
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else float("inf")
+
+
+def iter_chunks(df, positions=None, columns=None, chunk_rows=CHUNK_ROWS):
+    col_idx = [df.columns.get_loc(c) for c in columns] if columns else slice(None)
+    total = len(df) if positions is None else len(positions)
+    for start in range(0, total, chunk_rows):
+        rows = slice(start, start + chunk_rows) if positions is None else positions[start:start + chunk_rows]
+        yield df.iloc[rows, col_idx]
+
+
+def iter_csv(df, positions=None, columns=None, chunk_rows=CHUNK_ROWS):
+    for i, chunk in enumerate(iter_chunks(df, positions, columns, chunk_rows)):
+        yield chunk.to_csv(index=False, header=i == 0).encode("utf-8")
+
+
+def write_export(sink, fmt, df, positions=None, columns=None, chunk_rows=CHUNK_ROWS, on_progress=None):
+    """Write rows to a path or binary file object; on_progress(done, total) is called per chunk."""
+    total = len(df) if positions is None else len(positions)
+    start = time.perf_counter()
+    close = isinstance(sink, (str, os.PathLike))
+    f = open(sink, "wb") if close else sink
+    done = 0
+    try:
+        if fmt == "Parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            writer = schema = None
+            for chunk in iter_chunks(df, positions, columns, chunk_rows):
+                table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                if writer is None:
+                    schema = table.schema
+                    writer = pq.ParquetWriter(f, schema)
+                writer.write_table(table)
+                done += len(chunk)
+                if on_progress:
+                    on_progress(done, total)
+            if writer is None:
+                # No rows: still a valid file, with the columns and their types.
+                empty = df.iloc[:0] if not columns else df.iloc[:0][list(columns)]
+                pq.write_table(pa.Table.from_pandas(empty, preserve_index=False), f)
+            else:
+                writer.close()
+        else:
+            for i, data in enumerate(iter_csv(df, positions, columns, chunk_rows)):
+                f.write(data)
+                done = min(total, (i + 1) * chunk_rows)
+                if on_progress:
+                    on_progress(done, total)
+        written = f.tell()
+    finally:
+        if close:
+            f.close()
+    return ExportStats(rows=total, bytes=written, seconds=time.perf_counter() - start)
+
+
+def _open_reader(path):
+    def read():
+        with open(path, "rb") as f:
+            return f.read()
+    return read
+
+
+def selection_token(df, positions=None, columns=None, token=None):
+    """Identifies exactly which rows and columns an export holds, so a prepared file is never served for another."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((token, len(df), list(columns or df.columns))).encode("utf-8"))
+    if positions is not None:
+        digest.update(np.ascontiguousarray(positions, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+def export_path(name):
+    """name inside EXPORT_DIR; None when saving is disabled or name would leave the directory."""
+    if not EXPORT_DIR or not name or os.path.basename(name) != name or name in (".", ".."):
+        return None
+    return os.path.join(EXPORT_DIR, name)
+
+
+class PreparedExport:
+    """A spooled export in session state; the file goes when the export is replaced or the session ends."""
+
+    def __init__(self, path, fmt, selection):
+        self.path = path
+        self.format = fmt
+        self.selection = selection
+        self._finalizer = weakref.finalize(self, _remove, path)
+
+    def discard(self):
+        self._finalizer()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def render_export(df, positions=None, columns=None, key="export", file_stem="export", token=None):
+    """Export controls for a filtered view of df; positions=None exports every row.
+
+    token identifies the data behind df (e.g. the snapshot version); it is part of the selection key.
+    """
+    total = len(df) if positions is None else len(positions)
+    selection = selection_token(df, positions, columns, token)
+    with st.expander(f"⬇️ Export {total:,} rows"):
+        fmt = st.radio("Format", list(FORMATS), horizontal=True, key=f"{key}_format")
+        extension, mime = FORMATS[fmt]
+        local_name = st.text_input(f"Save on the server in {EXPORT_DIR} instead (file name, optional)",
+                                   key=f"{key}_path") if EXPORT_DIR else ""
+        prepared = st.session_state.get(f"{key}_prepared")
+        if not st.button("Prepare export", key=f"{key}_prepare"):
+            if prepared and (prepared.format, prepared.selection) == (fmt, selection) \
+                    and os.path.exists(prepared.path):
+                st.download_button(f"Download {extension.upper()}", _open_reader(prepared.path),
+                                   file_name=f"{file_stem}.{extension}", mime=mime, key=f"{key}_download")
+            return
+        local_path = export_path(local_name)
+        if local_name and local_path is None:
+            st.error("Enter a plain file name; exports are only saved inside the export directory.")
+            return
+        progress = st.progress(0.0, text="Exporting…")
+
+        def on_progress(done, total_rows):
+            progress.progress(done / max(total_rows, 1), text=f"Exporting… {done:,}/{total_rows:,} rows")
+
+        if local_path:
+            stats = write_export(local_path, fmt, df, positions, columns, on_progress=on_progress)
+            target = local_path
+        else:
+            # Spool to disk; the download button reads the file only when clicked.
+            handle = tempfile.NamedTemporaryFile(prefix=f"{file_stem}-", suffix=f".{extension}", delete=False)
+            with handle:
+                stats = write_export(handle, fmt, df, positions, columns, on_progress=on_progress)
+            # Only the latest prepared file per export is kept.
+            if prepared:
+                prepared.discard()
+            st.session_state[f"{key}_prepared"] = PreparedExport(handle.name, fmt, selection)
+            target = None
+            st.download_button(f"Download {extension.upper()}", _open_reader(handle.name),
+                               file_name=f"{file_stem}.{extension}", mime=mime, key=f"{key}_download")
+        progress.empty()
+        st.caption(f"{stats.rows:,} rows · {stats.bytes / 1e6:.1f} MB · {stats.rows_per_second:,.0f} rows/s"
+                   + (f" → {target}" if target else ""))
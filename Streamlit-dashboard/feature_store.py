@@ -0,0 +1,129 @@
+"""Persisted derived-feature store keyed by row content hash.
+
+Each classifier's output is stored in a sidecar Parquet file per dataset and
+feature, keyed by a 64-bit hash of the input text and named after a hash of
+the classifier's code. Loading a dataset then only runs the classifier on
+texts that were never seen before; editing a classifier changes its version
+and recomputes just that feature.
+
+    .features/posts/customer_issue-3f9c2a1b.parquet   (row_hash, value)
+"""
+import glob
+import hashlib
+import inspect
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from perf import incr
+
+STORE_DIRNAME = ".features"
+MAP_CHUNK_ROWS = 20_000
+# Key of a missing text; no str() of a real value hashes to it short of a 64-bit collision.
+NULL_HASH = np.uint64(pd.util.hash_pandas_object(pd.Series(["\0<null>"]), index=False).iloc[0])
+
+
+def row_hashes(texts):
+    hashes = pd.util.hash_pandas_object(texts.astype(str), index=False)
+    # astype(str) turns a missing text into "nan", but classifiers such as get_sub_theme treat the two apart.
+    missing = texts.isna().to_numpy()
+    if missing.any():
+        hashes = hashes.copy()
+        hashes[missing] = NULL_HASH
+    return hashes
+
+
+def feature_version(func):
+    """Hash of the function source plus the module-level constants it reads."""
+    digest = hashlib.blake2b(inspect.getsource(func).encode("utf-8"), digest_size=4)
+    for name in func.__code__.co_names:
+        value = func.__globals__.get(name)
+        if isinstance(value, (str, int, float, list, tuple, dict, set, frozenset)):
+            digest.update(f"{name}={value!r}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def store_dir(data_dir):
+    return os.environ.get("DASHBOARD_FEATURE_DIR", os.path.join(data_dir, STORE_DIRNAME))
+
+
+def _feature_path(root, dataset, name, version):
+    return os.path.join(root, dataset, f"{name}-{version}.parquet")
+
+
+def load_feature(root, dataset, name, version):
+    path = _feature_path(root, dataset, name, version)
+    try:
+        stored = pd.read_parquet(path)
+    except FileNotFoundError:
+        return pd.Series(dtype=object)
+    return stored.set_index("row_hash")["value"]
+
+
+def save_feature(root, dataset, name, version, values):
+    path = _feature_path(root, dataset, name, version)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Several workers may build at once; each writes its own temporary file and the last rename wins.
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    values.rename("value").rename_axis("row_hash").reset_index().to_parquet(tmp_path, index=False)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # Losing the race is harmless: the file already there holds the same values.
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+    # Outputs of older classifier versions are never read again.
+    for old in glob.glob(os.path.join(root, dataset, f"{name}-*.parquet")):
+        if old != path:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+
+
+def _map_chunk(func, values):
+    return [func(v) for v in values]
+
+
+def map_texts(texts, func, pool=None, chunk_rows=None):
+    """texts.apply(func), run once per distinct text and spread over pool (an Executor) when given."""
+    codes, uniques = pd.factorize(texts, use_na_sentinel=False)
+    values = list(uniques)
+    chunk_rows = chunk_rows or MAP_CHUNK_ROWS
+    if pool is None or len(values) <= chunk_rows:
+        results = _map_chunk(func, values)
+    else:
+        chunks = [values[i:i + chunk_rows] for i in range(0, len(values), chunk_rows)]
+        results = [r for part in pool.map(_map_chunk, [func] * len(chunks), chunks) for r in part]
+    out = np.empty(len(results), dtype=object)
+    out[:] = results
+    return pd.Series(out[codes], index=texts.index)
+
+
+def cached_feature(texts, hashes, func, root, dataset, name, pool=None):
+    version = feature_version(func)
+    stored = load_feature(root, dataset, name, version)
+    unique_hashes = pd.Index(hashes.unique())
+    missing = unique_hashes.difference(stored.index)
+    incr(f"features.{dataset}.{name}.hit", len(unique_hashes) - len(missing))
+    incr(f"features.{dataset}.{name}.miss", len(missing))
+    if len(missing):
+        first_rows = ~hashes.duplicated() & hashes.isin(missing)
+        new_values = pd.Series(map_texts(texts[first_rows.to_numpy()], func, pool).to_numpy(),
+                               index=hashes[first_rows].to_numpy())
+        # Keep only hashes still present so the sidecar does not grow without bound.
+        stored = pd.concat([stored[stored.index.isin(unique_hashes)], new_values])
+        save_feature(root, dataset, name, version, stored)
+    return hashes.map(stored).to_numpy()
+
+
+def apply_features(df, features, root, dataset, column="extract", pool=None):
+    texts = df[column]
+    hashes = row_hashes(texts)
+    for name, func in features.items():
+        df[name] = cached_feature(texts, hashes, func, root, dataset, name, pool)
+    return df
@@ -0,0 +1,118 @@
+"""Row-level derived features shared by the dashboard pages."""
+import re
+
+import pandas as pd
+
+from feature_store import apply_features, map_texts
+
+PROMO_KEYWORDS = ["deal", "buy", "order", "shop", "save", "promotion", "call me"]
+
+
+def is_customer_comment(text):
+    text = str(text).lower()
+    if len(text.strip()) < 10:
+        return False
+    if any(promo in text for promo in PROMO_KEYWORDS):
+        return False
+    return True
+
+
+# --- Issue taxonomy used by the comments dashboard (main.py)
+def classify_issue(text):
+    text = str(text).lower()
+    if re.search(r"invoice|charge|billing|refund|cancel|account", text):
+        return "Billing"
+    elif re.search(r"network|signal|coverage|slow|disconnect|data", text):
+        return "Network"
+    elif re.search(r"help|support|service|response|ignored|agent", text):
+        return "Support"
+    elif re.search(r"upgrade|purchase|delivery|order", text):
+        return "Purchase"
+    else:
+        return "Other"
+
+
+# --- Finer issue taxonomy used by the Issues-Analysis page
+def classify_customer_issue(text):
+    text = str(text).lower()
+    if any(x in text for x in ["billing", "debit", "charge", "refund", "penalty", "contract", "cancel", "account"]):
+        return "Billing"
+    elif any(x in text for x in ["network", "data", "signal", "coverage", "outage", "disconnect", "speed"]):
+        return "Network"
+    elif any(x in text for x in ["support", "response", "resolve", "rude", "ignored", "agent"]):
+        return "Support"
+    elif any(x in text for x in ["delivery", "sim card", "not receive", "delay", "wait"]):
+        return "Delivery Issues"
+    elif any(x in text for x in ["upgrade", "device", "router", "purchase"]):
+        return "Product Upgrade"
+    elif any(x in text for x in ["application", "apply", "approval"]):
+        return "Application Issues"
+    elif any(x in text for x in ["spam", "unrelated", "ads", "promotion"]):
+        return "Spam / Promotions"
+    elif any(x in text for x in ["login", "access", "portal", "website"]):
+        return "Access Issues"
+    return "Uncategorized"
+
+
+def get_sub_theme(text):
+    if pd.isna(text): return "Other"
+    text = text.lower()
+    if "penalty" in text: return "Penalty"
+    if "contract" in text: return "Contract"
+    if "cancel" in text: return "Cancellation"
+    if "refund" in text: return "Refund"
+    if "debit" in text: return "Debt collection"
+    if "resolve" in text: return "Agreeing to resolve"
+    if "no response" in text: return "No response"
+    if "data" in text: return "Data Expiry"
+    if "rude" in text or "ignored" in text: return "Rude service"
+    return "Miscellaneous"
+
+
+# --- Platform inference for the Usage page
+def detect_platform(text):
+    text = str(text).lower()
+    if 'twitter.com' in text or '@' in text:
+        return 'Twitter'
+    if 'facebook.com' in text:
+        return 'Facebook'
+    return 'Unknown'
+
+
+POST_FEATURES = {
+    "issue": classify_issue,
+    "customer_issue": classify_customer_issue,
+    "sub_theme": get_sub_theme,
+    "platform": detect_platform,
+}
+COMMENT_FEATURES = {
+    "is_customer": is_customer_comment,
+    "issue": classify_issue,
+    "customer_issue": classify_customer_issue,
+    "sub_theme": get_sub_theme,
+}
+
+
+def _add_features(df, features, dataset, store_root, pool=None):
+    if store_root:
+        apply_features(df, features, store_root, dataset, pool=pool)
+    else:
+        for name, func in features.items():
+            df[name] = map_texts(df["extract"], func, pool).to_numpy()
+    df["comment_length"] = df["extract"].astype(str).str.len()
+    return df
+
+
+def add_post_features(df, store_root=None, pool=None):
+    """Derived columns for data.csv rows; read from the feature store when one is given.
+
+    pool is an optional process pool the classifiers are spread over (see build.py).
+    """
+    return _add_features(df, POST_FEATURES, "posts", store_root, pool)
+
+
+def add_comment_features(df, store_root=None, pool=None):
+    """Derived columns for PostComments.csv rows."""
+    df = _add_features(df, COMMENT_FEATURES, "comments", store_root, pool)
+    df["is_customer"] = df["is_customer"].astype(bool)
+    return df
@@ -0,0 +1,121 @@
+"""Server-side geographic aggregation for the complaint map.
+
+Complaints are reduced to per-location totals first (city, falling back to
+the region centroid when the city is not in the bundled coordinate table),
+then binned into fixed-size grid cells. Only those few hundred rows are
+sent to the browser, however many complaints sit underneath.
+"""
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+COORDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "city_coordinates.csv")
+KM_PER_DEGREE = 111.32
+# Cell widths are computed at this latitude so cells stay roughly square over South Africa.
+REFERENCE_LAT = -29.0
+
+
+def load_city_coordinates(path=COORDS_FILE):
+    coords = pd.read_csv(path)
+    coords["city_key"] = coords["city"].str.strip().str.lower()
+    return coords.drop_duplicates("city_key")
+
+
+def region_centroids(coords):
+    centroids = coords.groupby("region")[["lat", "lon"]].mean()
+    centroids.index = centroids.index.str.strip().str.lower()
+    return centroids
+
+
+def filter_mask(posts, regions=None, categories=None, start=None, end=None):
+    mask = np.ones(len(posts), dtype=bool)
+    if regions:
+        mask &= posts["region.name"].isin(regions).to_numpy()
+    if categories:
+        mask &= posts["category.label"].isin(categories).to_numpy()
+    if start is not None:
+        mask &= (posts["published"] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (posts["published"] < pd.Timestamp(end) + pd.Timedelta(days=1)).to_numpy()
+    return mask
+
+
+def location_totals(posts):
+    grouped = posts.groupby(["city.name", "region.name"], dropna=False, observed=True)
+    totals = grouped.agg(
+        complaints=("engagement", "size"),
+        engagement=("engagement", "sum"),
+        sentiment_sum=("sentiment", "sum"),
+        sentiment_n=("sentiment", "count"),
+    ).reset_index()
+    return totals
+
+
+def city_points(totals, coords):
+    """Attach coordinates to location totals; rows without any match are returned separately."""
+    city_keys = totals["city.name"].astype(str).str.strip().str.lower()
+    region_keys = totals["region.name"].astype(str).str.strip().str.lower()
+    by_city = coords.set_index("city_key")
+    centroids = region_centroids(coords)
+    points = totals.copy()
+    points["lat"] = city_keys.map(by_city["lat"]).fillna(region_keys.map(centroids["lat"]))
+    points["lon"] = city_keys.map(by_city["lon"]).fillna(region_keys.map(centroids["lon"]))
+    points["located_by"] = np.where(city_keys.isin(by_city.index), "city", "region")
+    unmapped = points[points["lat"].isna()]
+    points = points.dropna(subset=["lat", "lon"])
+    points = points.groupby(["city.name", "lat", "lon", "located_by"], dropna=False, as_index=False)[
+        ["complaints", "engagement", "sentiment_sum", "sentiment_n"]].sum()
+    points["avg_sentiment"] = (points["sentiment_sum"] / points["sentiment_n"].replace(0, np.nan)).round(2)
+    points["city.name"] = points["city.name"].fillna("(unknown city)")
+    return points, unmapped
+
+
+def grid_cells(points, cell_km=50):
+    dlat = cell_km / KM_PER_DEGREE
+    dlon = cell_km / (KM_PER_DEGREE * math.cos(math.radians(REFERENCE_LAT)))
+    cells = points.assign(
+        row=np.floor(points["lat"] / dlat).astype(int),
+        col=np.floor(points["lon"] / dlon).astype(int),
+    )
+    cells = cells.groupby(["row", "col"], as_index=False).agg(
+        complaints=("complaints", "sum"),
+        engagement=("engagement", "sum"),
+        sentiment_sum=("sentiment_sum", "sum"),
+        sentiment_n=("sentiment_n", "sum"),
+        cities=("city.name", lambda s: ", ".join(sorted(s)[:5])),
+    )
+    cells["avg_sentiment"] = (cells["sentiment_sum"] / cells["sentiment_n"].replace(0, np.nan)).round(2)
+    lat0, lon0 = cells["row"] * dlat, cells["col"] * dlon
+    cells["polygon"] = [
+        [[lo, la], [lo + dlon, la], [lo + dlon, la + dlat], [lo, la + dlat]]
+        for la, lo in zip(lat0, lon0)
+    ]
+    return cells
+
+
+def sentiment_colour(values):
+    """Red for negative, amber for neutral, green for positive average sentiment."""
+    values = np.nan_to_num(np.asarray(values, dtype=float))
+    values = np.clip(values / max(1.0, np.abs(values).max(initial=0)), -1, 1)
+    red = np.where(values < 0, 220, (220 * (1 - values)).astype(int))
+    green = np.where(values > 0, 180, (180 * (1 + values)).astype(int))
+    return [[int(r), int(g), 60, 180] for r, g in zip(red, green)]
+
+
+def complaint_map(posts, coords, regions=None, categories=None, start=None, end=None, cell_km=50):
+    # Only the columns the totals need are copied out of the (possibly huge) frame.
+    filtered = posts.loc[filter_mask(posts, regions, categories, start, end),
+                         ["city.name", "region.name", "engagement", "sentiment"]]
+    points, unmapped = city_points(location_totals(filtered), coords)
+    cells = grid_cells(points, cell_km) if len(points) else pd.DataFrame()
+    if len(cells):
+        cells["colour"] = sentiment_colour(cells["avg_sentiment"])
+        points["colour"] = sentiment_colour(points["avg_sentiment"])
+    return {
+        "points": points,
+        "cells": cells,
+        "total": len(filtered),
+        "unmapped": int(unmapped["complaints"].sum()),
+    }
@@ -0,0 +1,172 @@
+"""Concurrent-session load test built on parallel AppTest runs.
+
+Starts --workers processes, each standing in for one Streamlit server
+process. Each one runs --sessions concurrent sessions on threads; every
+session opens a page and then replays that page's interactions from
+rerun_harness.py until --duration runs out. Sessions inside one worker share
+that worker's st.cache_resource/st.cache_data, as real sessions on one
+server do. Comparing --workers 8 --sessions 1 with --workers 1 --sessions 8
+therefore shows what the shared caching buys.
+
+    python loadtest.py --rows 100k --workers 2 --sessions 8 --duration 60 --json load.json
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PAGES = ["Executive-Overview", "Issues-Analysis"]
+RSS_SAMPLE_SECONDS = 0.25
+
+
+def _session(name, script, interact, seed, deadline, timeout, samples, errors):
+    import random
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    try:
+        at = AppTest.from_file(os.path.join(APP_DIR, script), default_timeout=timeout)
+        start = time.perf_counter()
+        at.run()
+        samples.append((name, "initial", time.perf_counter() - start))
+        errors.extend(e.message for e in at.exception)
+        i = 0
+        while time.time() < deadline:
+            start = time.perf_counter()
+            interact(at, rng, i)
+            samples.append((name, "rerun", time.perf_counter() - start))
+            errors.extend(e.message for e in at.exception)
+            i += 1
+    except Exception as e:
+        errors.append(f"{name}: {type(e).__name__}: {e}")
+
+
+def run_worker(worker_id, names, sessions, start_at, duration, seed, timeout, data_dir, llm_latency):
+    """Runs in its own process; returns raw latency samples and RSS readings."""
+    os.environ["DASHBOARD_DATA_DIR"] = data_dir
+    os.chdir(APP_DIR)
+    sys.path.insert(0, APP_DIR)
+    import rerun_harness
+    from perf import rss_bytes
+
+    rerun_harness.install_stub_model(llm_latency)
+    available = {name: (script, interact) for name, script, interact in rerun_harness.scenarios()}
+    rss_start = rss_bytes()
+    rss_peak = [rss_start]
+    stop = threading.Event()
+
+    def sample_rss():
+        while not stop.wait(RSS_SAMPLE_SECONDS):
+            rss_peak[0] = max(rss_peak[0], rss_bytes())
+
+    threading.Thread(target=sample_rss, daemon=True).start()
+    # Every worker starts its sessions at the same moment, like a morning spike.
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = time.time() + duration
+    samples, errors = [], []
+    threads = []
+    for s in range(sessions):
+        name = names[(worker_id * sessions + s) % len(names)]
+        script, interact = available[name]
+        threads.append(threading.Thread(
+            target=_session,
+            args=(name, script, interact, seed + worker_id * 1000 + s, deadline, timeout, samples, errors),
+        ))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stop.set()
+    return {
+        "worker": worker_id,
+        "samples": samples,
+        "errors": errors,
+        "rss_start_mb": round(rss_start / 1e6, 1),
+        "rss_peak_mb": round(max(rss_peak[0], rss_bytes()) / 1e6, 1),
+    }
+
+
+def summarize(results, wall_seconds):
+    samples = [s for r in results for s in r["samples"]]
+    rows = []
+    for name in sorted({s[0] for s in samples}):
+        for kind in ("initial", "rerun"):
+            ms = np.array([t for n, k, t in samples if n == name and k == kind]) * 1000
+            if len(ms):
+                rows.append({"scenario": name, "kind": kind, "n": len(ms),
+                             "p50_ms": round(float(np.percentile(ms, 50)), 1),
+                             "p95_ms": round(float(np.percentile(ms, 95)), 1),
+                             "max_ms": round(float(ms.max()), 1)})
+    return {
+        "reruns": len(samples),
+        "wall_seconds": round(wall_seconds, 2),
+        "throughput_per_s": round(len(samples) / wall_seconds, 2) if wall_seconds else 0.0,
+        "latency": rows,
+        "workers": [{k: r[k] for k in ("worker", "rss_start_mb", "rss_peak_mb")} | {"errors": len(r["errors"])}
+                    for r in results],
+        "errors": [e for r in results for e in r["errors"]][:20],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent dashboard sessions")
+    parser.add_argument("--rows", default="10k", help="synthetic rows per dataset")
+    parser.add_argument("--data-dir", help="use existing data instead of generating it")
+    parser.add_argument("--workers", type=int, default=1, help="server processes")
+    parser.add_argument("--sessions", type=int, default=8, help="concurrent sessions per worker")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of interaction per session")
+    parser.add_argument("--pages", nargs="*", default=DEFAULT_PAGES, help="rerun_harness scenario names")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds the stub model sleeps per call")
+    parser.add_argument("--json", help="write the summary to this file")
+    args = parser.parse_args()
+
+    data_dir = args.data_dir
+    if not data_dir:
+        import synthetic
+        data_dir = tempfile.mkdtemp(prefix="dashboard-load-")
+        synthetic.write_dataset(data_dir, synthetic.parse_rows(args.rows), seed=args.seed)
+    data_dir = os.path.abspath(data_dir)
+
+    # Leave a few seconds for the worker processes to import Streamlit before the spike.
+    start_at = time.time() + 5
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context) as pool:
+        futures = [
+            pool.submit(run_worker, w, args.pages, args.sessions, start_at, args.duration,
+                        args.seed, args.timeout, data_dir, args.llm_latency)
+            for w in range(args.workers)
+        ]
+        results = [f.result() for f in futures]
+    summary = summarize(results, time.time() - start_at)
+
+    print(f"{args.workers} worker(s) x {args.sessions} session(s): {summary['reruns']} reruns "
+          f"in {summary['wall_seconds']}s = {summary['throughput_per_s']}/s")
+    print(f"\n{'scenario':<22} {'kind':<8} {'n':>5} {'p50':>9} {'p95':>9} {'max':>9}")
+    for row in summary["latency"]:
+        print(f"{row['scenario']:<22} {row['kind']:<8} {row['n']:>5} {row['p50_ms']:>7.0f}ms "
+              f"{row['p95_ms']:>7.0f}ms {row['max_ms']:>7.0f}ms")
+    print(f"\n{'worker':>6} {'rss start':>10} {'rss peak':>10} {'errors':>7}")
+    for w in summary["workers"]:
+        print(f"{w['worker']:>6} {w['rss_start_mb']:>8.0f}MB {w['rss_peak_mb']:>8.0f}MB {w['errors']:>7}")
+    for error in summary["errors"][:3]:
+        print(f"    {error[:200]}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"run_at": datetime.datetime.now().isoformat(), "rows": args.rows,
+                       "workers": args.workers, "sessions": args.sessions, **summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
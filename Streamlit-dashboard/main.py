@@ -1,58 +1,22 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from wordcloud import WordCloud, STOPWORDS
-import matplotlib.pyplot as plt
-import nltk
-nltk.download('stopwords')
-from nltk.corpus import stopwords
-import re
-from collections import Counter
-import plotly.graph_objects as go
-from datetime import datetime
+from compute import POST_META_COLUMNS, POST_META_LABELS, post_details
+from perf import begin_run, end_run, fragment_run, render_performance_page, span
+from snapshot import get_snapshot, render_status
+from table import render_paged_table
 
 # Page config
 st.set_page_config(page_title="Facebook Post Comments Dashboard", page_icon="💬", layout="wide")
 
+begin_run("main")
+
 # Load datasets
-df = pd.read_csv("PostComments.csv")
-df_freq = pd.read_csv("PostIdFrequenceClean.csv")
-data_df = pd.read_csv("data.csv")
-
-# Clean and prepare main comment data
-df.rename(columns={"PostText": "extract", "PublishedDate": "published"}, inplace=True)
-df["published"] = pd.to_datetime(df["published"], errors='coerce')
-data_df["published"] = pd.to_datetime(data_df["published"], errors='coerce')
-
-def is_customer_comment(text):
-    text = str(text).lower()
-    promo_keywords = ["deal", "buy", "order", "shop", "save", "promotion", "call me"]
-    if len(text.strip()) < 10:
-        return False
-    if any(promo in text for promo in promo_keywords):
-        return False
-    return True
-
-df = df[df["extract"].apply(is_customer_comment)]
-
-# Issue classification
-def classify_issue(text):
-    text = str(text).lower()
-    if re.search(r"invoice|charge|billing|refund|cancel|account", text):
-        return "Billing"
-    elif re.search(r"network|signal|coverage|slow|disconnect|data", text):
-        return "Network"
-    elif re.search(r"help|support|service|response|ignored|agent", text):
-        return "Support"
-    elif re.search(r"upgrade|purchase|delivery|order", text):
-        return "Purchase"
-    else:
-        return "Other"
-
-df["issue"] = df["extract"].apply(classify_issue)
-data_df["issue"] = data_df["extract"].apply(classify_issue)
-df["comment_length"] = df["extract"].apply(lambda x: len(str(x)))
-data_df["comment_length"] = data_df["extract"].apply(lambda x: len(str(x)))
+snap = get_snapshot()
+df = snap.customer_comments
+df_freq = snap.freq
+data_df = snap.posts
+agg = snap.aggregates
 
 # Session state defaults
 if "selected_postid" not in st.session_state:
@@ -60,62 +24,66 @@ if "selected_postid" not in st.session_state:
 if "selected" not in st.session_state:
     st.session_state.selected = "Overview"
 
+views = [
+    "Overview", "Keyword Search", "Word Cloud", "Top Words",
+    "Issue Analysis", "Comment Stats", "Post Details", "All Data Insights"
+]
+# Hidden view, reached with ?perf=1
+if "perf" in st.query_params:
+    views.append("Performance")
+if st.session_state.selected not in views:
+    st.session_state.selected = "Overview"
+
 # Sidebar navigation
 with st.sidebar:
-    selected = st.selectbox("📌 Choose View", [
-        "Overview", "Keyword Search", "Word Cloud", "Top Words",
-        "Issue Analysis", "Comment Stats", "Post Details", "All Data Insights"
-    ], index=[
-        "Overview", "Keyword Search", "Word Cloud", "Top Words",
-        "Issue Analysis", "Comment Stats", "Post Details", "All Data Insights"
-    ].index(st.session_state.selected))
+    selected = st.selectbox("📌 Choose View", views, index=views.index(st.session_state.selected))
     st.session_state.selected = selected
+    render_status(snap)
 
 st.title("💬 Facebook Post Comments Dashboard")
 
-# Overview
-if st.session_state.selected == "Overview":
-    st.header("🕒 Comments Over Time")
-    comments_by_date = df.groupby(df["published"].dt.date).size().reset_index(name="count")
-    fig_time = px.line(comments_by_date, x="published", y="count", markers=True, title="Number of Comments per Day")
-    st.plotly_chart(fig_time, use_container_width=True)
-
-    st.header("🏷️ Most Active Post IDs")
-    top_posts = df["PostId"].value_counts().reset_index()
-    top_posts.columns = ["PostId", "Count"]
-    for _, row in top_posts.head(10).iterrows():
-        if st.button(f"🔗 View Post: {row['PostId']}"):
-            st.session_state.selected_postid = row['PostId']
-            st.session_state.selected = "Post Details"
-            st.rerun()
-
+# Top-post charts shared by the Overview and Post Details views
+def render_top_engagement_charts(agg):
     st.markdown("### 🔁 Top Posts by Engagement Metrics")
     col1, col2, col3 = st.columns(3)
     with col1:
-        fig1 = px.bar(df_freq.sort_values("ReplyToCount", ascending=False).head(10), x="PostId", y="ReplyToCount", title="Top Posts by Replies")
-        st.plotly_chart(fig1, use_container_width=True)
+        with span("figure", "chart1"):
+            fig1 = px.bar(agg["top_ReplyToCount"], x="PostId", y="ReplyToCount", title="Top Posts by Replies")
+            st.plotly_chart(fig1, use_container_width=True)
     with col2:
-        fig2 = px.bar(df_freq.sort_values("ReshareCount", ascending=False).head(10), x="PostId", y="ReshareCount", title="Top Posts by Reshares")
-        st.plotly_chart(fig2, use_container_width=True)
+        with span("figure", "chart2"):
+            fig2 = px.bar(agg["top_ReshareCount"], x="PostId", y="ReshareCount", title="Top Posts by Reshares")
+            st.plotly_chart(fig2, use_container_width=True)
     with col3:
-        fig3 = px.bar(df_freq.sort_values("TotalFKReferences", ascending=False).head(10), x="PostId", y="TotalFKReferences", title="Top Posts by Total Engagement")
-        st.plotly_chart(fig3, use_container_width=True)
-
-# Post Details
-if st.session_state.selected == "Post Details" and st.session_state.selected_postid:
-    post_id = st.session_state.selected_postid
-    post_df = df[df["PostId"] == post_id]
-    freq_row = df_freq[df_freq["PostId"] == post_id].squeeze()
-    st.subheader(f"✍🏻 Post Details: {post_id}")
-    st.write(f"Total Comments: {len(post_df)}")
-
-    if not freq_row.empty:
-        st.metric("💬 Replies", freq_row["ReplyToCount"])
-        st.metric("🔁 Reshares", freq_row["ReshareCount"])
-        st.metric("📊 Total Engagements", freq_row["TotalFKReferences"])
-
-    st.markdown("### 📰 Post Summary")
-    st.info("""
+        with span("figure", "chart3"):
+            fig3 = px.bar(agg["top_TotalFKReferences"], x="PostId", y="TotalFKReferences", title="Top Posts by Total Engagement")
+            st.plotly_chart(fig3, use_container_width=True)
+
+
+def select_post(post_id):
+    st.session_state.selected_postid = post_id
+
+
+# Fragments rerun on their own when a widget inside them changes; everything they read is passed in.
+@st.fragment
+def post_panel(comments, freq, post_id, version):
+    with fragment_run("main", "post_panel"):
+        with span("aggregate", "post_details"):
+            details = post_details(comments, freq, post_id)
+        post_df = details["post_df"]
+        freq_row = details["freq_row"]
+        st.subheader(f"✍🏻 Post Details: {post_id}")
+        st.write(f"Total Comments: {len(post_df)}")
+
+        if not freq_row.empty:
+            st.metric("💬 Replies", freq_row["ReplyToCount"])
+            st.metric("🔁 Reshares", freq_row["ReshareCount"])
+            st.metric("📊 Total Engagements", freq_row["TotalFKReferences"])
+        if details["avg_sentiment"] is not None:
+            st.metric("🧠 Avg. Comment Sentiment", details["avg_sentiment"])
+
+        st.markdown("### 📰 Post Summary")
+        st.info("""
 The discussion regarding the Telkom social media post offering a 120GB Anytime + 120GB Night data deal for R249 per month is quite varied and somewhat contentious. The main themes observed include:
 
 - **Interest in the Deal**: Many users express interest in the deal and request additional information about the specifics, such as whether it includes a router, how the night data works, and whether it's a prepaid or postpaid offer.
@@ -128,56 +96,124 @@ The discussion regarding the Telkom social media post offering a 120GB Anytime +
 **Overall**, the sentiment is mixed with a slight tilt towards negative due to issues with network coverage, customer service, and application/delivery processes. There are, however, positive sentiments from users who find the deal attractive and express interest in it. A noteworthy observation is that some users confuse the offer as "limitless" data due to the initial post's wording, leading to some confusion and disappointment.
 """)
 
-    #st.markdown("### 📏 Comment Length Distribution")
-    #fig_len = px.histogram(post_df, x="comment_length", nbins=20, title="Comment Lengths for This Post")
-    #st.plotly_chart(fig_len, use_container_width=True)
-
-    #st.markdown("### 📋 Comments")
-    #st.dataframe(post_df[["published", "extract"]], use_container_width=True)
-
-    # Additional Visuals for Post Details
-    
-
-    st.markdown("### 📝 Post Metadata")
-    post_meta = post_df[["PostId", "extract", "published"]].drop_duplicates().rename(columns={
-        "extract": "PostText",
-        "published": "PublishedDate"
-    })
-    st.dataframe(post_meta, use_container_width=True)
-
-    # Visual comparison of selected post vs. others
-    st.markdown("### 🌐 Interaction Comparison with Top Posts")
-    top_compare = df_freq.sort_values("TotalFKReferences", ascending=False).head(10).copy()
-    top_compare["Selected"] = top_compare["PostId"].apply(lambda x: "Selected" if x == post_id else "Other")
-    fig_compare = px.bar(
-        top_compare,
-        x="PostId",
-        y="TotalFKReferences",
-        color="Selected",
-        title="Comparison of Total Engagements with Top Posts",
-        color_discrete_map={"Selected": "red", "Other": "steelblue"}
-    )
-    st.plotly_chart(fig_compare, use_container_width=True)
+        if details["sentiment_counts"] is not None:
+            st.markdown("### 🧠 Comment Sentiment")
+            with span("figure", "post_sentiment"):
+                fig_psent = px.pie(details["sentiment_counts"], names="Sentiment", values="Count", title="Sentiment of Comments on This Post")
+                st.plotly_chart(fig_psent, use_container_width=True)
+
+        st.markdown("### 📝 Post Metadata")
+        render_paged_table(comments, details["meta_positions"], POST_META_COLUMNS, key="post_meta_table",
+                           token=(version, post_id), labels=POST_META_LABELS)
+
+        # Visual comparison of selected post vs. others
+        st.markdown("### 🌐 Interaction Comparison with Top Posts")
+        top_compare = details["top_compare"]
+        with span("figure", "compare"):
+            fig_compare = px.bar(
+                top_compare,
+                x="PostId",
+                y="TotalFKReferences",
+                color="Selected",
+                title="Comparison of Total Engagements with Top Posts",
+                color_discrete_map={"Selected": "red", "Other": "steelblue"}
+            )
+            st.plotly_chart(fig_compare, use_container_width=True)
+
+
+# "View Post" opens the post inline and reruns only this fragment, not the charts around it.
+@st.fragment
+def most_active_posts(top_posts, comments, freq, version):
+    with fragment_run("main", "most_active_posts"):
+        st.header("🏷️ Most Active Post IDs")
+        for _, row in top_posts.head(10).iterrows():
+            st.button(f"🔗 View Post: {row['PostId']}", on_click=select_post, args=(row['PostId'],))
+        post_id = st.session_state.selected_postid
+        if post_id:
+            st.button("✖️ Close post", on_click=select_post, args=(None,))
+            post_panel(comments, freq, post_id, version)
+
+
+# Entering a post ID only looks up its precomputed row, so only this fragment reruns. The IDs are
+# typed rather than picked, so the full ID list never goes to the browser.
+@st.fragment
+def comment_stats_lookup(per_post, post_index):
+    with fragment_run("main", "comment_stats_lookup"):
+        st.subheader("🔎 Post Lookup")
+        post_id = st.text_input("Post ID", key="comment_stats_post",
+                                placeholder=f"e.g. {post_index[0]}" if len(post_index) else "").strip()
+        if not post_id:
+            return
+        if post_id not in post_index:
+            st.warning(f"No comments recorded for post {post_id}.")
+            return
+        row = per_post.iloc[post_index.get_loc(post_id)]
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("💬 Comments", f"{row['comments']:,}")
+        col2.metric("📏 Avg. / Max Length", f"{row['avg_length']:.0f} / {row['max_length']}")
+        col3.metric("↩️ Replies per 100 Comments", "–" if pd.isna(row["replies_per_100_comments"]) else row["replies_per_100_comments"])
+        col4.metric("🔁 Reply : Reshare", "–" if pd.isna(row["reply_ratio"]) else f"{row['reply_ratio']:.0%} : {row['reshare_ratio']:.0%}")
 
 
-    st.markdown("### 🔁 Top Posts by Engagement Metrics")
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        fig1 = px.bar(df_freq.sort_values("ReplyToCount", ascending=False).head(10), x="PostId", y="ReplyToCount", title="Top Posts by Replies")
-        st.plotly_chart(fig1, use_container_width=True)
-    with col2:
-        fig2 = px.bar(df_freq.sort_values("ReshareCount", ascending=False).head(10), x="PostId", y="ReshareCount", title="Top Posts by Reshares")
-        st.plotly_chart(fig2, use_container_width=True)
-    with col3:
-        fig3 = px.bar(df_freq.sort_values("TotalFKReferences", ascending=False).head(10), x="PostId", y="TotalFKReferences", title="Top Posts by Total Engagement")
-        st.plotly_chart(fig3, use_container_width=True)
+# Overview
+if st.session_state.selected == "Overview":
+    st.header("🕒 Comments Over Time")
+    comments_by_date = agg["comments_by_date"]
+    with span("figure", "time"):
+        fig_time = px.line(comments_by_date, x="published", y="count", markers=True, title="Number of Comments per Day")
+        st.plotly_chart(fig_time, use_container_width=True)
 
+    comment_sentiment = agg["comment_sentiment_by_date"]
+    if len(comment_sentiment):
+        st.header("🧠 Comment Sentiment Over Time")
+        with span("figure", "comment_sentiment"):
+            fig_csent = px.line(comment_sentiment, x="published", y="sentiment", markers=True, title="Average Comment Sentiment per Day")
+            st.plotly_chart(fig_csent, use_container_width=True)
 
+    most_active_posts(agg["top_posts"], df, df_freq, snap.version)
 
+    render_top_engagement_charts(agg)
 
+# Post Details
+if st.session_state.selected == "Post Details" and st.session_state.selected_postid:
+    post_panel(df, df_freq, st.session_state.selected_postid, snap.version)
+    render_top_engagement_charts(agg)
+
+# Comment Stats (precomputed per data version in snapshot.build_aggregates)
+elif st.session_state.selected == "Comment Stats":
+    stats = agg["comment_stats"]
+    summary = stats["summary"]
+    per_post = stats["per_post"]
+    st.header("📏 Comment Stats")
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("📝 Posts with Comments", f"{summary['posts']:,}")
+    col2.metric("💬 Comments", f"{summary['comments']:,}")
+    col3.metric("📊 Avg. Comments per Post", summary["avg_comments"])
+    col4.metric("📏 Median Length", f"{summary['p50']} chars", help=f"p90 {summary['p90']} · p99 {summary['p99']} · mean {summary['avg_length']}")
+    col5.metric("🔁 Reshare Ratio", "–" if summary["reshare_ratio"] is None else f"{summary['reshare_ratio']:.1%}",
+                help="Reshares as a share of total engagements, over all commented posts.")
 
+    col1, col2 = st.columns(2)
+    with col1:
+        with span("figure", "comment_lengths"):
+            fig_len = px.bar(stats["length_hist"], x="length", y="comments", title="Comment Length Distribution (characters)")
+            st.plotly_chart(fig_len, use_container_width=True)
+    with col2:
+        with span("figure", "comments_per_post"):
+            fig_cpp = px.bar(stats["comments_per_post"], x="comments", y="posts", log_y=True, title="Comments per Post")
+            st.plotly_chart(fig_cpp, use_container_width=True)
+
+    st.subheader("Replies vs. Reshares per Post")
+    with span("figure", "reply_reshare"):
+        fig_rr = px.scatter(per_post.dropna(subset=["TotalFKReferences"]), x="ReplyToCount", y="ReshareCount",
+                            size="comments", hover_name="PostId", title="Replies vs. Reshares (size = comments)")
+        st.plotly_chart(fig_rr, use_container_width=True)
 
-    
+    comment_stats_lookup(per_post, stats["post_index"])
+
+    st.subheader("All Posts")
+    render_paged_table(per_post, None, list(per_post.columns), key="comment_stats_table", token=snap.version)
 
 # Full Data Analysis
 elif st.session_state.selected == "All Data Insights":
@@ -185,35 +221,38 @@ elif st.session_state.selected == "All Data Insights":
 
     col1, col2 = st.columns(2)
     with col1:
-        st.metric("📈 Total Engagement", int(data_df["engagement"].sum()))
-        st.metric("🧠 Average Sentiment", round(data_df["sentiment"].mean(), 2))
+        st.metric("📈 Total Engagement", agg["total_engagement"])
+        st.metric("🧠 Average Sentiment", agg["average_sentiment"])
     with col2:
-        st.metric("📣 Total OTS", int(data_df["OTS"].sum()))
-        st.metric("📝 Total Posts", len(data_df))
+        st.metric("📣 Total OTS", agg["total_ots"])
+        st.metric("📝 Total Posts", agg["total_posts"])
 
     st.subheader("Hourly Complaint Activity")
-    data_df["hour"] = pd.to_datetime(data_df["published"], errors='coerce').dt.hour
-    hourly_counts = data_df.groupby("hour").size().reset_index(name="count")
-    fig_hour = px.bar(hourly_counts, x="hour", y="count", title="Complaints by Hour of Day")
-    st.plotly_chart(fig_hour, use_container_width=True)
+    hourly_counts = agg["hourly_counts"]
+    with span("figure", "hour"):
+        fig_hour = px.bar(hourly_counts, x="hour", y="count", title="Complaints by Hour of Day")
+        st.plotly_chart(fig_hour, use_container_width=True)
 
     st.subheader("Engagement Trend Over Time")
-    daily_engage = data_df.groupby(data_df["published"].dt.date)["engagement"].sum().reset_index()
-    fig_eng = px.line(daily_engage, x="published", y="engagement", title="Engagement Trend")
-    st.plotly_chart(fig_eng, use_container_width=True)
+    daily_engage = agg["daily_engagement"]
+    with span("figure", "eng"):
+        fig_eng = px.line(daily_engage, x="published", y="engagement", title="Engagement Trend")
+        st.plotly_chart(fig_eng, use_container_width=True)
 
     st.subheader("Sentiment Analysis")
-    sentiment_counts = data_df["sentiment"].apply(lambda x: "Positive" if x > 0 else "Negative" if x < 0 else "Neutral")
-    sentiment_summary = sentiment_counts.value_counts().reset_index()
-    sentiment_summary.columns = ["Sentiment", "Count"]
-    fig_sent = px.bar(sentiment_summary, x="Sentiment", y="Count", color="Sentiment", title="Sentiment Distribution")
-    st.plotly_chart(fig_sent, use_container_width=True)
+    sentiment_summary = agg["sentiment_summary"]
+    with span("figure", "sent"):
+        fig_sent = px.bar(sentiment_summary, x="Sentiment", y="Count", color="Sentiment", title="Sentiment Distribution")
+        st.plotly_chart(fig_sent, use_container_width=True)
 
     st.subheader("Classified Issues in Comments")
-    issue_counts = data_df["issue"].value_counts().reset_index()
-    issue_counts.columns = ["Issue Type", "Count"]
-    fig_issues = px.bar(issue_counts, x="Issue Type", y="Count", title="Issue Classification", color="Count")
-    st.plotly_chart(fig_issues, use_container_width=True)
+    issue_counts = agg["issue_counts"]
+    with span("figure", "issues"):
+        fig_issues = px.bar(issue_counts, x="Issue Type", y="Count", title="Issue Classification", color="Count")
+        st.plotly_chart(fig_issues, use_container_width=True)
+
+elif st.session_state.selected == "Performance":
+    render_performance_page()
 
 # Footer
 
@@ -241,4 +280,6 @@ text-align: center;
 <p>Developed TISL | WIC <a style='display: block; text-align: center;' href="https://www.heflin.dev/" target="_blank"></a></p>
 </div>
 """
-st.markdown(footer,unsafe_allow_html=True)
\ No newline at end of file
+st.markdown(footer,unsafe_allow_html=True)
+
+end_run()
@@ -1,19 +1,61 @@
 import streamlit as st
+import plotly.express as px
+from compute import city_summary
+from perf import begin_run, end_run, span
+from snapshot import get_snapshot, render_status
+
+begin_run("CityInsights")
 
 def city_insights():
     st.title("📍 City Insights")
 
-    if "selected_city" not in st.session_state:
-        st.warning("No city selected. Please go back and click a city bar.")
-        st.stop()
+    # Per-city row ranges and headline metrics are prepared with the snapshot,
+    # so switching cities only slices that city's rows.
+    snap = get_snapshot()
+    render_status(snap)
+    cities = snap.cities["index"]
 
-    selected_city = st.session_state["selected_city"]
+    selected_city = st.session_state.get("selected_city")
+    if selected_city not in cities.index:
+        st.warning("No city selected. Please go back and click a city bar, or pick one below.")
+        selected_city = None
+    selected_city = st.selectbox(
+        "City", cities.index, index=cities.index.get_loc(selected_city) if selected_city else None,
+        placeholder="Choose a city")
+    if selected_city is None:
+        st.stop()
+    st.session_state["selected_city"] = selected_city
     st.markdown(f"### Showing insights for **{selected_city}**")
 
     # Filter your dataframe and show relevant data
-    city_df = df_selection[df_selection["city.name"] == selected_city]
+    with span("aggregate", "city_summary"):
+        result = city_summary(snap.posts, snap.cities, selected_city)
+    metrics = result["metrics"]
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total Posts", int(metrics["posts"]))
+    col2.metric("Total Engagement", int(metrics["engagement"]))
+    col3.metric("Avg. Sentiment", metrics["avg_sentiment"])
+    col4.metric("Top Issue", metrics["top_issue"])
+
+    with span("figure", "daily"):
+        fig_daily = px.line(result["daily"], x="published", y="count", markers=True,
+                            title=f"Complaints per Day in {selected_city}", template="plotly_white")
+        st.plotly_chart(fig_daily, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        with span("figure", "issues"):
+            fig_issue = px.bar(result["issue_counts"], x="Issue", y="Count", title="Issues", color="Count", template="plotly_white")
+            st.plotly_chart(fig_issue, use_container_width=True)
+    with col2:
+        with span("figure", "categories"):
+            fig_cat = px.pie(result["category_counts"], names="Category", values="Count", title="Categories", template="plotly_white")
+            st.plotly_chart(fig_cat, use_container_width=True)
+
+    st.subheader("Most Engaging Posts")
+    st.dataframe(result["top_posts"], use_container_width=True)
 
-    st.write(f"Total Posts: {len(city_df)}")
-    st.write(f"Total Engagement: {city_df['engagement'].sum()}")
+city_insights()
 
-    # Add more graphs/tables based on city_df
+end_run()
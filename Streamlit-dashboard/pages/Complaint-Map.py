@@ -0,0 +1,118 @@
+import streamlit as st
+import pandas as pd
+import pydeck as pdk
+from geo import complaint_map, load_city_coordinates
+from perf import begin_run, end_run, incr, span
+from snapshot import get_snapshot, render_status
+
+st.set_page_config(page_title="🗺️ Complaint Map", layout="wide")
+begin_run("Complaint-Map")
+st.title("🗺️ Complaint Map")
+
+snap = get_snapshot()
+df = snap.posts
+render_status(snap)
+
+
+@st.cache_resource
+def city_coordinates():
+    return load_city_coordinates()
+
+
+# Aggregated per snapshot version and filter state; the frame itself is not hashed.
+@st.cache_data(max_entries=64, show_spinner=False)
+def map_data(version, regions, categories, start, end, cell_km, _posts):
+    incr("map.cache_miss")
+    return complaint_map(_posts, city_coordinates(), list(regions), list(categories), start, end, cell_km)
+
+
+# === Filters
+with st.sidebar:
+    st.markdown("### 🗺️ Map Filters")
+    regions = st.multiselect("Region", sorted(df["region.name"].dropna().unique()))
+    categories = st.multiselect("Category", sorted(df["category.label"].dropna().unique()))
+    start_date = st.date_input("Start date", value=df["published"].min().date())
+    end_date = st.date_input("End date", value=df["published"].max().date())
+    cell_km = st.select_slider("Grid cell size (km)", options=[10, 25, 50, 100, 200], value=50)
+    show_cells = st.checkbox("Show grid cells", value=True)
+    show_cities = st.checkbox("Show cities", value=True)
+
+incr("map.requests")
+with span("aggregate", "complaint_map"):
+    result = map_data(snap.version, tuple(regions), tuple(categories), start_date, end_date, cell_km, df)
+points, cells = result["points"], result["cells"]
+
+col1, col2, col3 = st.columns(3)
+col1.metric("Complaints", f"{result['total']:,}")
+col2.metric("Locations", len(points))
+col3.metric("Unmapped", f"{result['unmapped']:,}")
+
+# === Map
+layers = []
+if show_cells and len(cells):
+    max_complaints = max(int(cells["complaints"].max()), 1)
+    layers.append(pdk.Layer(
+        "PolygonLayer",
+        data=cells[["polygon", "complaints", "engagement", "avg_sentiment", "cities", "colour"]],
+        get_polygon="polygon",
+        get_fill_color="colour",
+        get_elevation="complaints",
+        elevation_scale=200000 / max_complaints,
+        extruded=True,
+        pickable=True,
+        opacity=0.6,
+    ))
+if show_cities and len(points):
+    max_points = max(int(points["complaints"].max()), 1)
+    layers.append(pdk.Layer(
+        "ScatterplotLayer",
+        data=points.assign(cities=points["city.name"])[["lon", "lat", "complaints", "engagement", "avg_sentiment", "cities", "colour"]],
+        get_position=["lon", "lat"],
+        get_fill_color="colour",
+        get_radius="complaints",
+        radius_scale=40000 / max_points,
+        radius_min_pixels=3,
+        pickable=True,
+    ))
+
+with span("figure", "deck"):
+    deck = pdk.Deck(
+        layers=layers,
+        initial_view_state=pdk.ViewState(latitude=-29.0, longitude=25.0, zoom=4.3, pitch=40),
+        tooltip={"text": "{cities}\nComplaints: {complaints}\nEngagement: {engagement}\nAvg sentiment: {avg_sentiment}"},
+        map_style=None,
+    )
+    st.pydeck_chart(deck, use_container_width=True)
+st.caption("Height shows complaint volume; colour goes from red (negative) to green (positive) average sentiment.")
+
+st.subheader("🏙️ Busiest Locations")
+st.dataframe(
+    points.sort_values("complaints", ascending=False)[["city.name", "located_by", "complaints", "engagement", "avg_sentiment"]].head(20),
+    use_container_width=True,
+)
+
+# Footer
+footer="""<style>
+a:hover,  a:active {
+color: red;
+background-color: transparent;
+text-decoration: underline;
+}
+.footer {
+position: fixed;
+left: 0;
+height:5%;
+bottom: 0;
+width: 100%;
+background-color: #243946;
+color: white;
+text-align: center;
+}
+</style>
+<div class="footer">
+<p>Developed TISL | WIC <a style='display: block; text-align: center;' href="https://www.heflin.dev/" target="_blank"></a></p>
+</div>
+"""
+st.markdown(footer,unsafe_allow_html=True)
+
+end_run()
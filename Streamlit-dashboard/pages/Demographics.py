@@ -1,12 +1,21 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from compute import demographics, demographics_estimate
+from drilldown import open_city_on_click
+from export import render_export
+from perf import begin_run, end_run, span
+from sampling import approximate_mode, refine_or_report, remember, render_accuracy, request
+from snapshot import get_snapshot, render_status
 
-# Load data
-df = pd.read_csv("data.csv")
+begin_run("Demographics")
+
+EXPORT_COLUMNS = ["published", "extract", "region.name", "city.name", "gender.label", "category.label", "engagement", "sentiment"]
 
-df["engagement"] = pd.to_numeric(df["engagement"], errors='coerce')
-df["sentiment"] = pd.to_numeric(df["sentiment"], errors='coerce')
+# Load data
+snap = get_snapshot()
+df = snap.posts
+render_status(snap)
 
 st.title("📊 Overview: Telkom Complaint Demographics")
 
@@ -15,36 +24,61 @@ st.subheader("Filter by Region & Gender")
 selected_regions = st.multiselect("Select Region", options=df['region.name'].dropna().unique(), default=df['region.name'].dropna().unique())
 selected_genders = st.multiselect("Select Gender", options=df['gender.label'].dropna().unique(), default=df['gender.label'].dropna().unique())
 
-filtered_df = df[
-    df['region.name'].isin(selected_regions) &
-    df['gender.label'].isin(selected_genders)
-]
+# Exact results are cached process-wide; on large data the first view is estimated from the sample while they compute.
+key = ("demographics", snap.version, tuple(sorted(selected_regions)), tuple(sorted(selected_genders)))
+# The toggle is always rendered, so its state survives reruns that are served from the cache.
+approximate_first = approximate_mode(snap)
+result, job, error = request(key, demographics, df, selected_regions, selected_genders, background=approximate_first)
+approximate = result is None and approximate_first
+if approximate:
+    with span("aggregate", "demographics_estimate"):
+        result = demographics_estimate(snap.sample, selected_regions, selected_genders)
+elif result is None:
+    with span("aggregate", "demographics"):
+        result = demographics(df, selected_regions, selected_genders)
+    remember(key, result)
+errors = result.get("ci", {})
+render_accuracy(snap, approximate)
 
 # === Gender Breakdown
 st.subheader("👤 Gender Distribution")
-gender_counts = filtered_df['gender.label'].value_counts()
-fig_gender = px.pie(gender_counts, names=gender_counts.index, values=gender_counts.values, title="Complaints by Gender")
-st.plotly_chart(fig_gender, use_container_width=True)
+gender_counts = result["gender_counts"]
+with span("figure", "gender"):
+    fig_gender = px.pie(gender_counts, names=gender_counts.index, values=gender_counts.values, title="Complaints by Gender")
+    st.plotly_chart(fig_gender, use_container_width=True)
 
 # === Region Breakdown
 st.subheader("📍 Complaints by Region")
-region_counts = filtered_df['region.name'].value_counts()
-fig_region = px.bar(region_counts, x=region_counts.index, y=region_counts.values, title="Complaints by Region")
-st.plotly_chart(fig_region, use_container_width=True)
+region_counts = result["region_counts"]
+with span("figure", "region"):
+    fig_region = px.bar(region_counts, x=region_counts.index, y=region_counts.values, title="Complaints by Region",
+                        error_y=errors.get("region_counts"))
+    st.plotly_chart(fig_region, use_container_width=True)
 
 # === City Breakdown
 st.subheader("🏙️ Complaints by City")
-city_counts = filtered_df['city.name'].value_counts().nlargest(10)
-fig_city = px.bar(city_counts, x=city_counts.index, y=city_counts.values, title="Top 10 Cities by Complaint Volume")
-st.plotly_chart(fig_city, use_container_width=True)
+city_counts = result["city_counts"]
+with span("figure", "city"):
+    fig_city = px.bar(city_counts, x=city_counts.index, y=city_counts.values, title="Top 10 Cities by Complaint Volume",
+                      error_y=errors.get("city_counts"))
+    city_click = st.plotly_chart(fig_city, use_container_width=True, on_select="rerun", selection_mode="points", key="demographics_city_chart")
+st.caption("Click a city bar to open its City Insights.")
+open_city_on_click(city_click)
 
 # === Sentiment Distribution
 st.subheader("🧠 Sentiment")
-sentiment_bins = pd.cut(filtered_df["sentiment"], [-10, -0.1, 0.1, 10], labels=["Negative", "Neutral", "Positive"])
-sentiment_counts = sentiment_bins.value_counts().reset_index()
-sentiment_counts.columns = ["Sentiment", "Count"]
-fig_sentiment = px.pie(sentiment_counts, names="Sentiment", values="Count", title="Customer Sentiment")
-st.plotly_chart(fig_sentiment, use_container_width=True)
+sentiment_counts = result["sentiment_counts"]
+with span("figure", "sentiment"):
+    fig_sentiment = px.pie(sentiment_counts, names="Sentiment", values="Count", title="Customer Sentiment")
+    st.plotly_chart(fig_sentiment, use_container_width=True)
+
+# === Export
+if approximate:
+    st.caption("Export is available once the exact results are in.")
+    refine_or_report(job, error)
+else:
+    render_export(df, result["positions"], columns=EXPORT_COLUMNS, key="demographics_export", file_stem="demographics",
+                  token=snap.version)
 
 # === Footer
 st.markdown("---")
@@ -75,3 +109,5 @@ text-align: center;
 </div>
 """
 st.markdown(footer,unsafe_allow_html=True)
+
+end_run()
@@ -1,97 +1,130 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from compute import engagement_overview
+from drilldown import open_city_on_click
+from perf import begin_run, end_run, span
+from sketches import QUANTILES, quantile_label
+from snapshot import get_snapshot, render_status
 
 # Page settings
 st.set_page_config(page_title="📍 Activity & Engagement", layout="wide")
 st.title("📍 Engagement Overview")
+begin_run("Engagement-Overview")
 
 # Load dataset safely
-df = pd.read_csv("data.csv")
-
-# Convert numeric columns
-df["engagement"] = pd.to_numeric(df["engagement"], errors="coerce")
-df["sentiment"] = pd.to_numeric(df["sentiment"], errors="coerce")
-df["OTS"] = pd.to_numeric(df["OTS"], errors="coerce")
+snap = get_snapshot()
+df = snap.posts
+render_status(snap)
+with span("aggregate", "engagement_overview"):
+    result = engagement_overview(df)
 
 # ========================
 # 1. Engagement by City
 # ========================
 st.subheader("🏙️ Engagement by City")
-engagement_by_city = (
-    df.groupby("city.name")["engagement"]
-    .sum()
-    .sort_values(ascending=False)
-    .reset_index()
-    .dropna()
-)
-
-fig_city = px.bar(
-    engagement_by_city.head(10),
-    x="city.name",
-    y="engagement",
-    title="Top 10 Cities by Engagement",
-    labels={"city.name": "City", "engagement": "Engagement"},
-    color="engagement",
-    template="plotly_white"
-)
-st.plotly_chart(fig_city, use_container_width=True)
+engagement_by_city = result["engagement_by_city"]
+
+with span("figure", "city"):
+    fig_city = px.bar(
+        engagement_by_city.head(10),
+        x="city.name",
+        y="engagement",
+        title="Top 10 Cities by Engagement",
+        labels={"city.name": "City", "engagement": "Engagement"},
+        color="engagement",
+        template="plotly_white"
+    )
+    city_click = st.plotly_chart(fig_city, use_container_width=True, on_select="rerun", selection_mode="points", key="engagement_city_chart")
+st.caption("Click a city bar to open its City Insights.")
+open_city_on_click(city_click)
 
 # ========================
 # 2. Activity by Category
 # ========================
 st.subheader("📂 Activity by Category")
-category_counts = df["category.label"].value_counts(dropna=True).reset_index()
-category_counts.columns = ["Category", "Count"]
-
-fig_cat = px.pie(
-    category_counts,
-    names="Category",
-    values="Count",
-    title="Distribution of Activity by Category",
-    template="plotly_white"
-)
-st.plotly_chart(fig_cat, use_container_width=True)
+category_counts = result["category_counts"]
+
+with span("figure", "cat"):
+    fig_cat = px.pie(
+        category_counts,
+        names="Category",
+        values="Count",
+        title="Distribution of Activity by Category",
+        template="plotly_white"
+    )
+    st.plotly_chart(fig_cat, use_container_width=True)
 
 # ========================
 # 3. Sentiment Distribution
 # ========================
 st.subheader("🧠 Sentiment Distribution")
-sentiment_counts = df["sentiment"].dropna().round(1).value_counts().reset_index()
-sentiment_counts.columns = ["Sentiment Score", "Count"]
-sentiment_counts = sentiment_counts.sort_values("Sentiment Score")
-
-fig_sent = px.bar(
-    sentiment_counts,
-    x="Sentiment Score",
-    y="Count",
-    title="Sentiment Score Distribution",
-    template="plotly_white"
-)
-st.plotly_chart(fig_sent, use_container_width=True)
+sentiment_counts = result["sentiment_counts"]
+
+with span("figure", "sent"):
+    fig_sent = px.bar(
+        sentiment_counts,
+        x="Sentiment Score",
+        y="Count",
+        title="Sentiment Score Distribution",
+        template="plotly_white"
+    )
+    st.plotly_chart(fig_sent, use_container_width=True)
 
 # ========================
 # 4. OTS by Region
 # ========================
 st.subheader("📡 OTS (Opportunity To See) by Region")
-ots_by_region = (
-    df.groupby("region.name")["OTS"]
-    .sum()
-    .sort_values(ascending=False)
-    .reset_index()
-    .dropna()
-)
-
-fig_ots = px.bar(
-    ots_by_region.head(10),
-    x="region.name",
-    y="OTS",
-    title="Top Regions by OTS",
-    labels={"region.name": "Region", "OTS": "OTS"},
-    color="OTS",
-    template="plotly_white"
-)
-st.plotly_chart(fig_ots, use_container_width=True)
+ots_by_region = result["ots_by_region"]
+
+with span("figure", "ots"):
+    fig_ots = px.bar(
+        ots_by_region.head(10),
+        x="region.name",
+        y="OTS",
+        title="Top Regions by OTS",
+        labels={"region.name": "Region", "OTS": "OTS"},
+        color="OTS",
+        template="plotly_white"
+    )
+    st.plotly_chart(fig_ots, use_container_width=True)
+
+# ========================
+# 5. Percentiles
+# ========================
+st.subheader("📐 Percentiles (p50 / p90 / p99)")
+st.caption("A few viral posts pull the averages up; percentiles show the typical post and the tail. "
+           "Estimated from quantile sketches kept per region, city and day as data arrives.")
+sketches = snap.streams.quantiles
+labels = [quantile_label(q) for q in QUANTILES]
+
+col1, col2 = st.columns(2)
+metric = col1.selectbox("Metric", [f for f in sketches.fields if f in df.columns], key="pct_metric")
+breakdown = col2.radio("Breakdown", ["Region", "City", "Week", "Day"], horizontal=True, key="pct_breakdown")
+
+overall = sketches.combined(metric)
+cols = st.columns(len(labels) + 1)
+cols[0].metric(f"Mean {metric}", f"{df[metric].mean():,.2f}")
+for col, label in zip(cols[1:], labels):
+    col.metric(label, f"{overall[label]:,.2f}")
+
+with span("aggregate", "percentiles"):
+    if breakdown in ("Region", "City"):
+        key = breakdown.lower()
+        percentiles = sketches.frame(metric, key).head(15)
+    else:
+        key = "period"
+        percentiles = sketches.series(metric, "W" if breakdown == "Week" else "D")
+with span("figure", "percentiles"):
+    if key == "period":
+        fig_pct = px.line(percentiles, x=key, y=labels, title=f"{metric} percentiles per {breakdown.lower()}",
+                          labels={"period": "", "value": metric, "variable": "Percentile"}, template="plotly_white")
+    else:
+        fig_pct = px.bar(percentiles, x=key, y=labels, barmode="group", title=f"{metric} percentiles by {key}",
+                         labels={key: breakdown, "value": metric, "variable": "Percentile"}, template="plotly_white")
+    st.plotly_chart(fig_pct, use_container_width=True)
+with st.expander("Percentile table"):
+    st.dataframe(percentiles, use_container_width=True, hide_index=True)
 
 
 # Footer
@@ -120,3 +153,5 @@ text-align: center;
 </div>
 """
 st.markdown(footer,unsafe_allow_html=True)
+
+end_run()
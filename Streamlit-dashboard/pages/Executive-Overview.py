@@ -2,77 +2,68 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-
-# Load dataset
-df = pd.read_csv("data.csv")
-df["engagement"] = pd.to_numeric(df["engagement"], errors='coerce')
-df["sentiment"] = pd.to_numeric(df["sentiment"], errors='coerce')
-df["published"] = pd.to_datetime(df["published"], errors='coerce')
+from contextlib import contextmanager
+from compute import EXECUTIVE_SECTIONS
+from perf import begin_run, end_run, incr, span
+from snapshot import get_snapshot, render_status
+from streaming import CX_WINDOWS, SPIKE_Z
 
 st.set_page_config(page_title="📊 Executive Overview", layout="wide")
+begin_run("Executive-Overview")
+
+# Load dataset
+snap = get_snapshot()
+render_status(snap)
 st.title("📊 Executive Overview")
 
-# ===============================
-with st.expander("💬 Voice of the Customer", expanded=True):
-    st.subheader("Sentiment Distribution")
-    sentiment_bins = pd.cut(df["sentiment"], bins=[-10, -0.1, 0.1, 10], labels=["Negative", "Neutral", "Positive"])
-    sentiment_counts = sentiment_bins.value_counts().reset_index()
-    sentiment_counts.columns = ["Sentiment", "Count"]
-
-    fig_sentiment = px.pie(
-        sentiment_counts,
+# Sections open on first load in lazy mode; the rest compute only when expanded.
+INITIALLY_OPEN = {"voice"}
+
+with st.sidebar:
+    lazy = st.toggle("⚡ Lazy sections", value=True, key="exec_lazy",
+                     help="Compute each section only when it is expanded, instead of all of them on every load.")
+
+
+# --- Figures per section, built once per data version and shared by every session
+def voice_figures(data, snap):
+    return {"sentiment": px.pie(
+        data["sentiment_counts"],
         names="Sentiment",
         values="Count",
         title="Overall Sentiment Split",
         color="Sentiment",
         template="plotly_white"
-    )
-    st.plotly_chart(fig_sentiment, use_container_width=True)
+    )}
 
-# ===============================
-with st.expander("📈 CX & Complaint Trends", expanded=True):
-    st.subheader("Weekly Engagement Trend")
-    df_valid = df.dropna(subset=["published", "engagement"])
-    df_valid["Week"] = df_valid["published"].dt.to_period("W").astype(str)
-    weekly = df_valid.groupby("Week")["engagement"].sum().reset_index()
-
-    fig_trend = px.line(
-        weekly,
-        x="Week",
-        y="engagement",
-        title="Weekly Engagement Trend",
-        markers=True,
-        template="plotly_white"
-    )
-    st.plotly_chart(fig_trend, use_container_width=True)
 
-# ===============================
-with st.expander("🏙️ Customer Pulse Tracker", expanded=True):
-    st.subheader("Top Complaint Cities")
-    top_cities = df["city.name"].value_counts().head(10).reset_index()
-    top_cities.columns = ["City", "Count"]
-    fig_cities = px.bar(
-        top_cities,
+def trend_figures(data, snap):
+    return {
+        "trend": px.line(
+            data["weekly"],
+            x="Week",
+            y="engagement",
+            title="Weekly Engagement Trend",
+            markers=True,
+            template="plotly_white"
+        ),
+        "spikes": snap.streams.spikes.frame(),
+    }
+
+
+def pulse_figures(data, snap):
+    return {"cities": px.bar(
+        data["top_cities"],
         x="City",
         y="Count",
         title="Top 10 Cities with Highest Complaint Activity",
         color="Count",
         template="plotly_white"
-    )
-    st.plotly_chart(fig_cities, use_container_width=True)
+    )}
 
-# ===============================
-with st.expander("📂 Engagement & Sentiment Insights", expanded=True):
-    st.subheader("Average Sentiment by Complaint Category")
-    sentiment_by_category = (
-        df.groupby("category.label")["sentiment"]
-        .mean()
-        .reset_index()
-        .sort_values(by="sentiment")
-    )
 
+def insight_figures(data, snap):
     fig_category_sentiment = px.bar(
-        sentiment_by_category,
+        data["sentiment_by_category"],
         x="category.label",
         y="sentiment",
         title="Average Sentiment Score by Complaint Category",
@@ -81,20 +72,13 @@ with st.expander("📂 Engagement & Sentiment Insights", expanded=True):
         color="sentiment"
     )
     fig_category_sentiment.update_layout(xaxis_tickangle=-45)
-    st.plotly_chart(fig_category_sentiment, use_container_width=True)
-
-# ===============================
-with st.expander("📶 Brand Health Monitor", expanded=True):
-    st.subheader("Customer Experience Index (CX Score)")
+    return {"category_sentiment": fig_category_sentiment}
 
-    avg_sentiment = df["sentiment"].mean(skipna=True)
-    avg_engagement = df["engagement"].mean(skipna=True)
-    avg_OTS = df["OTS"].mean(skipna=True) if "OTS" in df.columns else 0
-    cx_score = round((avg_sentiment * 0.4 + avg_engagement * 0.4 + avg_OTS * 0.2), 2)
 
+def brand_figures(data, snap, granularity):
     gauge = go.Figure(go.Indicator(
         mode="gauge+number",
-        value=cx_score,
+        value=data["cx_score"],
         title={'text': "Overall CX Index"},
         gauge={
             'axis': {'range': [None, 4000]},
@@ -107,16 +91,22 @@ with st.expander("📶 Brand Health Monitor", expanded=True):
             'bar': {'color': "royalblue"}
         }
     ))
-    st.plotly_chart(gauge, use_container_width=True)
+    cx_index = snap.streams.cx
+    cx_series = cx_index.series("D" if granularity == "Daily" else "W")
+    fig_cx = px.line(
+        cx_series,
+        x="period",
+        y=["cx"] + [f"cx_{w}d" for w in CX_WINDOWS],
+        title=f"{granularity} CX Index with Rolling Windows",
+        labels={"period": "", "value": "CX Index", "variable": "Series"},
+        template="plotly_white"
+    )
+    return {"cx_gauge": gauge, "trends": cx_index.trends(), "cx_series": fig_cx}
 
-# ===============================
-with st.expander("🧠 Customer Insights Dashboard", expanded=True):
-    st.subheader("Engagement by Category and Region")
 
-    # Engagement by category
-    cat_avg = df.groupby("category.label")["engagement"].mean().reset_index()
+def customer_figures(data, snap):
     fig_cat = px.bar(
-        cat_avg.sort_values(by="engagement", ascending=False),
+        data["cat_avg"].sort_values(by="engagement", ascending=False),
         x="category.label",
         y="engagement",
         title="Avg Engagement by Category",
@@ -124,11 +114,9 @@ with st.expander("🧠 Customer Insights Dashboard", expanded=True):
         color="engagement"
     )
     fig_cat.update_layout(xaxis_tickangle=-45)
-    st.plotly_chart(fig_cat, use_container_width=True)
-
-    # Engagement by region
-    if "region.name" in df.columns:
-        region_avg = df.groupby("region.name")["engagement"].mean().reset_index()
+    figures = {"cat": fig_cat, "reg": None}
+    region_avg = data["region_avg"]
+    if region_avg is not None:
         fig_reg = px.bar(
             region_avg.sort_values(by="engagement", ascending=False),
             x="region.name",
@@ -138,7 +126,111 @@ with st.expander("🧠 Customer Insights Dashboard", expanded=True):
             color="engagement"
         )
         fig_reg.update_layout(xaxis_tickangle=-45)
-        st.plotly_chart(fig_reg, use_container_width=True)
+        figures["reg"] = fig_reg
+    return figures
+
+
+FIGURES = {
+    "voice": voice_figures,
+    "trends": trend_figures,
+    "pulse": pulse_figures,
+    "insights": insight_figures,
+    "brand": brand_figures,
+    "customer": customer_figures,
+}
+
+
+# Keyed by data version, section and its options; the snapshot itself is not hashed.
+# Figures are only read after this, so sessions share them without copying.
+@st.cache_resource(max_entries=32, show_spinner=False)
+def section_figures(version, section, options, _snap):
+    incr("executive.section_miss")
+    with span("aggregate", section):
+        data = EXECUTIVE_SECTIONS[section](_snap.posts)
+    with span("figure", section):
+        return FIGURES[section](data, _snap, *options)
+
+
+@contextmanager
+def section(label, name):
+    """An expander that yields whether its body should be computed on this run."""
+    if not lazy:
+        with st.expander(label, expanded=True):
+            yield True
+        return
+    with st.expander(label, expanded=name in INITIALLY_OPEN, key=f"exec_{name}", on_change="rerun") as expander:
+        if not expander.open:
+            st.caption("Expand to load this section.")
+        yield expander.open
+
+
+# ===============================
+with section("💬 Voice of the Customer", "voice") as visible:
+    if visible:
+        figures = section_figures(snap.version, "voice", (), snap)
+        st.subheader("Sentiment Distribution")
+        st.plotly_chart(figures["sentiment"], use_container_width=True)
+
+# ===============================
+with section("📈 CX & Complaint Trends", "trends") as visible:
+    if visible:
+        figures = section_figures(snap.version, "trends", (), snap)
+        st.subheader("Weekly Engagement Trend")
+        st.plotly_chart(figures["trend"], use_container_width=True)
+
+        st.subheader("⚠️ Complaint Spikes")
+        spikes = figures["spikes"]
+        if spikes.empty:
+            st.caption("No daily complaint spikes detected per issue category or region.")
+        else:
+            st.caption(f"Days where an issue category or region received at least {SPIKE_Z:g} standard deviations "
+                       "more complaints than its running average. Provisional rows are for the latest, still-open day.")
+            st.dataframe(
+                spikes.assign(day=spikes["day"].dt.date),
+                column_config={"expected": "expected/day", "z": st.column_config.NumberColumn("z-score", format="%.1f")},
+                use_container_width=True,
+                hide_index=True,
+            )
+
+# ===============================
+with section("🏙️ Customer Pulse Tracker", "pulse") as visible:
+    if visible:
+        figures = section_figures(snap.version, "pulse", (), snap)
+        st.subheader("Top Complaint Cities")
+        st.plotly_chart(figures["cities"], use_container_width=True)
+
+# ===============================
+with section("📂 Engagement & Sentiment Insights", "insights") as visible:
+    if visible:
+        figures = section_figures(snap.version, "insights", (), snap)
+        st.subheader("Average Sentiment by Complaint Category")
+        st.plotly_chart(figures["category_sentiment"], use_container_width=True)
+
+# ===============================
+with section("📶 Brand Health Monitor", "brand") as visible:
+    if visible:
+        granularity = st.session_state.get("cx_granularity", "Daily")
+        figures = section_figures(snap.version, "brand", (granularity,), snap)
+        st.subheader("Customer Experience Index (CX Score)")
+        st.plotly_chart(figures["cx_gauge"], use_container_width=True)
+
+        st.subheader("CX Index Over Time")
+        trend_cols = st.columns(len(CX_WINDOWS))
+        for col, (window, (value, delta)) in zip(trend_cols, figures["trends"].items()):
+            col.metric(f"CX · last {window} days", "—" if value is None else f"{value:,.2f}",
+                       None if delta is None else f"{delta:+,.2f} vs previous {window} days")
+
+        st.radio("Granularity", ["Daily", "Weekly"], horizontal=True, key="cx_granularity")
+        st.plotly_chart(figures["cx_series"], use_container_width=True)
+
+# ===============================
+with section("🧠 Customer Insights Dashboard", "customer") as visible:
+    if visible:
+        figures = section_figures(snap.version, "customer", (), snap)
+        st.subheader("Engagement by Category and Region")
+        st.plotly_chart(figures["cat"], use_container_width=True)
+        if figures["reg"] is not None:
+            st.plotly_chart(figures["reg"], use_container_width=True)
 
 # ===============================
 st.markdown("---")
@@ -169,3 +261,5 @@ text-align: center;
 </div>
 """
 st.markdown(footer,unsafe_allow_html=True)
+
+end_run()
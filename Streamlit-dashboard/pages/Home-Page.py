@@ -1,12 +1,15 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from perf import begin_run, end_run, span
+from snapshot import get_snapshot, render_status
 
-# Load your data
-df = pd.read_csv("data.csv")
+begin_run("Home-Page")
 
-df["sentiment"] = pd.to_numeric(df["sentiment"], errors="coerce")
-df["engagement"] = pd.to_numeric(df["engagement"], errors="coerce")
+# Load your data
+snap = get_snapshot()
+df = snap.posts
+render_status(snap)
 
 st.title("📊 Telkom Social Media Complaint Insights")
 st.markdown("""
@@ -33,16 +36,18 @@ if "region.name" in df.columns:
     st.header("📍 Complaints by Region")
     region_counts = df["region.name"].value_counts().reset_index()
     region_counts.columns = ["Region", "Count"]
-    fig_region = px.bar(region_counts, x="Region", y="Count", title="Complaints per Region")
-    st.plotly_chart(fig_region, use_container_width=True)
+    with span("figure", "region"):
+        fig_region = px.bar(region_counts, x="Region", y="Count", title="Complaints per Region")
+        st.plotly_chart(fig_region, use_container_width=True)
 
 # === Sentiment Distribution
 st.header("🧠 Sentiment Distribution")
 sent_bins = pd.cut(df["sentiment"], bins=[-10, -0.1, 0.1, 10], labels=["Negative", "Neutral", "Positive"])
 sent_counts = sent_bins.value_counts().reset_index()
 sent_counts.columns = ["Sentiment", "Count"]
-fig_sent = px.pie(sent_counts, names="Sentiment", values="Count", title="Overall Sentiment")
-st.plotly_chart(fig_sent, use_container_width=True)
+with span("figure", "sent"):
+    fig_sent = px.pie(sent_counts, names="Sentiment", values="Count", title="Overall Sentiment")
+    st.plotly_chart(fig_sent, use_container_width=True)
 
 # === Footer
 
@@ -73,3 +78,4 @@ text-align: center;
 """
 st.markdown(footer,unsafe_allow_html=True)
 
+end_run()
@@ -3,46 +3,19 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime
+from compute import ISSUE_PATTERNS, issues_analysis, issues_estimate
+from perf import begin_run, end_run, span
+from sampling import approximate_mode, half_width_text, refine_or_report, remember, render_accuracy, request
+from snapshot import get_snapshot, render_status
 
 st.set_page_config(page_title="Issue Dashboard", layout="wide")
+begin_run("Issues-Analysis")
 
-# Load Data
-df = pd.read_csv("data.csv")
-df_comments = pd.read_csv("PostComments.csv")
-df_freq = pd.read_csv("PostIdFrequenceClean.csv")
-
-# Preprocess Datasets
-df["published"] = pd.to_datetime(df["published"], errors='coerce')
-df_comments["published"] = pd.to_datetime(df_comments["PublishedDate"], errors='coerce')
-df_comments.rename(columns={"PostText": "extract"}, inplace=True)
-
-# Extract date features
-df["month"] = df["published"].dt.strftime("%b")
-df["day"] = df["published"].dt.strftime("%b %d")
-
-# --- Classification Function
-def classify_issue(text):
-    text = str(text).lower()
-    if any(x in text for x in ["billing", "debit", "charge", "refund", "penalty", "contract", "cancel", "account"]):
-        return "Billing"
-    elif any(x in text for x in ["network", "data", "signal", "coverage", "outage", "disconnect", "speed"]):
-        return "Network"
-    elif any(x in text for x in ["support", "response", "resolve", "rude", "ignored", "agent"]):
-        return "Support"
-    elif any(x in text for x in ["delivery", "sim card", "not receive", "delay", "wait"]):
-        return "Delivery Issues"
-    elif any(x in text for x in ["upgrade", "device", "router", "purchase"]):
-        return "Product Upgrade"
-    elif any(x in text for x in ["application", "apply", "approval"]):
-        return "Application Issues"
-    elif any(x in text for x in ["spam", "unrelated", "ads", "promotion"]):
-        return "Spam / Promotions"
-    elif any(x in text for x in ["login", "access", "portal", "website"]):
-        return "Access Issues"
-    return "Uncategorized"
-
-df["customer_issue"] = df["extract"].apply(classify_issue)
-df_comments["customer_issue"] = df_comments["extract"].apply(classify_issue)
+# Load Data (cleaning, date features and classification happen in the snapshot build)
+snap = get_snapshot()
+df = snap.posts
+df_comments = snap.comments
+df_freq = snap.freq
 
 # UI - Date Filter & Interval (optional)
 with st.sidebar:
@@ -50,38 +23,36 @@ with st.sidebar:
     start_date = st.date_input("Start date", value=df["published"].min().date())
     end_date = st.date_input("End date", value=df["published"].max().date())
     interval = st.selectbox("Interval", ["Day", "Week", "Month", "Quarter"])
-
-# Apply date filter
-df = df[(df["published"].dt.date >= start_date) & (df["published"].dt.date <= end_date)]
-df_comments = df_comments[(df_comments["published"].dt.date >= start_date) & (df_comments["published"].dt.date <= end_date)]
+render_status(snap)
+
+# Apply date filter; on large data the first view is estimated from the sample while the exact one computes
+key = ("issues_analysis", snap.version, start_date, end_date)
+# The toggle is always rendered, so its state survives reruns that are served from the cache.
+approximate_first = approximate_mode(snap)
+result, job, error = request(key, issues_analysis, df, df_comments, start_date, end_date, background=approximate_first)
+approximate = result is None and approximate_first
+if approximate:
+    with span("aggregate", "issues_estimate"):
+        result = issues_estimate(snap.sample, df_comments, start_date, end_date)
+elif result is None:
+    with span("aggregate", "issues_analysis"):
+        result = issues_analysis(df, df_comments, start_date, end_date)
+    remember(key, result)
+df_comments = result["comments"]
 
 # Summary Metrics
 st.title("📊 Complaint Themes Dashboard")
 col_sum1, col_sum2, col_sum3 = st.columns(3)
-col_sum1.metric("📬 Total Posts", len(df))
+if approximate:
+    col_sum1.metric("📬 Total Posts (est.)", half_width_text(result["post_count"], result["ci"]["post_count"]))
+else:
+    col_sum1.metric("📬 Total Posts", result["post_count"])
 col_sum2.metric("💬 Total Comments", len(df_comments))
 col_sum3.metric("📌 Post IDs Tracked", len(df_freq))
+render_accuracy(snap, approximate)
 
 # --- Sub-Issue Patterns
-issue_patterns = {
-    "Support": {
-        "No response": r"no response",
-        "Agreeing to resolve": r"resolve",
-        "Rude service": r"rude|ignored"
-    },
-    "Network": {
-        "Outage": r"outage",
-        "Unable to use data": r"unable to use data",
-        "Data Expiry": r"expired"
-    },
-    "Billing": {
-        "Undue charges": r"undue",
-        "Penalty": r"penalty",
-        "Contract": r"contract",
-        "Cancellation": r"cancel",
-        "Debt collection": r"debit|billing"
-    }
-}
+issue_patterns = ISSUE_PATTERNS
 
 # CSS for styled cards and charts
 st.markdown("""
@@ -121,15 +92,15 @@ st.markdown("""
 
 # Summary Cards
 st.markdown("### 📋 Overall Issue Counts")
-issue_counts = df["customer_issue"].value_counts().reset_index()
-issue_counts.columns = ["Issue", "Count"]
+issue_counts = result["issue_counts"]
 cols = st.columns(4)
 for idx, row in issue_counts.iterrows():
+    count = half_width_text(row['Count'], result["ci"]["issue_counts"][idx]) if approximate else int(row['Count'])
     cols[idx % 4].markdown(
         f"""
         <div class='card'>
             <div class='card-title'>{row['Issue']}</div>
-            <div class='card-count'>{int(row['Count'])}</div>
+            <div class='card-count'>{count}</div>
         </div>
         """,
         unsafe_allow_html=True
@@ -137,12 +108,7 @@ for idx, row in issue_counts.iterrows():
 
 # --- Stacked Charts
 
-def stacked_bar_chart(df, category, patterns, title):
-    df_sub = df[df["customer_issue"] == category].copy()
-    for label, pattern in patterns.items():
-        df_sub[label] = df_sub["extract"].str.contains(pattern, case=False, na=False)
-    agg = df_sub.groupby("month")[[*patterns.keys()]].sum().reset_index()
-
+def stacked_bar_chart(agg, patterns, title):
     fig = go.Figure()
     for sub in patterns:
         fig.add_trace(go.Bar(x=agg["month"], y=agg[sub], name=sub, hoverinfo='x+y+name'))
@@ -157,14 +123,7 @@ def stacked_bar_chart(df, category, patterns, title):
     )
     return fig
 
-def billing_volume_chart(df):
-    df_billing = df[df["customer_issue"] == "Billing"].copy()
-    df_billing["day"] = df_billing["published"].dt.strftime("%b %d")
-
-    for label, pattern in issue_patterns["Billing"].items():
-        df_billing[label] = df_billing["extract"].str.contains(pattern, case=False, na=False)
-
-    agg = df_billing.groupby("day")[[*issue_patterns["Billing"].keys()]].sum().reset_index()
+def billing_volume_chart(agg):
     fig = go.Figure()
     for sub in issue_patterns["Billing"]:
         fig.add_trace(go.Bar(x=agg["day"], y=agg[sub], name=sub, hoverinfo='x+y+name'))
@@ -179,28 +138,10 @@ def billing_volume_chart(df):
     )
     return fig
 
-def theme_sunburst(df):
-    def get_sub_theme(text):
-        if pd.isna(text): return "Other"
-        text = text.lower()
-        if "penalty" in text: return "Penalty"
-        if "contract" in text: return "Contract"
-        if "cancel" in text: return "Cancellation"
-        if "refund" in text: return "Refund"
-        if "debit" in text: return "Debt collection"
-        if "resolve" in text: return "Agreeing to resolve"
-        if "no response" in text: return "No response"
-        if "data" in text: return "Data Expiry"
-        if "rude" in text or "ignored" in text: return "Rude service"
-        return "Miscellaneous"
-
-    df["theme"] = df["customer_issue"]
-    df["sub_theme"] = df["extract"].apply(get_sub_theme)
-    sun_df = df.groupby(["theme", "sub_theme"]).size().reset_index(name="count")
-
+def theme_sunburst(sun_df):
     fig = px.sunburst(
         sun_df,
-        path=["theme", "sub_theme"],
+        path=["theme", "sub_theme"] + (["topic"] if "topic" in sun_df.columns else []),
         values="count",
         color="theme",
         title="Theme and Sub-Themes",
@@ -219,28 +160,37 @@ col1, col2 = st.columns(2)
 with col1:
     st.subheader("Customer Support Issues")
     st.markdown("<div class='chart-box'>", unsafe_allow_html=True)
-    st.plotly_chart(stacked_bar_chart(df, "Support", issue_patterns["Support"], "Customer Support Issues"), use_container_width=True)
+    with span("figure", "support"):
+        st.plotly_chart(stacked_bar_chart(result["support"], issue_patterns["Support"], "Customer Support Issues"), use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
 with col2:
     st.subheader("Network Issues")
     st.markdown("<div class='chart-box'>", unsafe_allow_html=True)
-    st.plotly_chart(stacked_bar_chart(df, "Network", issue_patterns["Network"], "Network Issues"), use_container_width=True)
+    with span("figure", "network"):
+        st.plotly_chart(stacked_bar_chart(result["network"], issue_patterns["Network"], "Network Issues"), use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
 col3, col4 = st.columns(2)
 with col3:
     st.subheader("Billing Issues Breakdown")
     st.markdown("<div class='chart-box'>", unsafe_allow_html=True)
-    st.plotly_chart(billing_volume_chart(df), use_container_width=True)
+    with span("figure", "billing"):
+        st.plotly_chart(billing_volume_chart(result["billing"]), use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
 with col4:
     st.subheader("Theme and Sub-Themes")
     st.markdown("<div class='chart-box'>", unsafe_allow_html=True)
-    st.plotly_chart(theme_sunburst(df), use_container_width=True)
+    with span("figure", "themes"):
+        st.plotly_chart(theme_sunburst(result["themes"]), use_container_width=True)
     st.markdown("</div>", unsafe_allow_html=True)
 
+with st.expander("🧩 Discovered topics in Uncategorized complaints"):
+    st.caption("Clustered incrementally from the complaint text as data arrives; "
+               "they form the outer ring of the sunburst.")
+    st.dataframe(snap.streams.topics.summary(), use_container_width=True, hide_index=True)
+
 # Footer
 footer="""<style>
 a:hover,  a:active {
@@ -263,4 +213,9 @@ text-align: center;
 <p>Developed TISL | WIC <a style='display: block; text-align: center;' href="https://www.heflin.dev/" target="_blank"></a></p>
 </div>
 """
-st.markdown(footer,unsafe_allow_html=True)
\ No newline at end of file
+st.markdown(footer,unsafe_allow_html=True)
+
+if approximate:
+    refine_or_report(job, error)
+
+end_run()
@@ -1,49 +1,38 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from compute import hourly_usage
+from perf import begin_run, end_run, span
+from snapshot import get_snapshot, render_status
 
-# Load dataset
-df = pd.read_csv("data.csv")
+begin_run("Usage")
 
-# Ensure datetime is parsed
-df['published'] = pd.to_datetime(df['published'], errors='coerce')
-df = df.dropna(subset=['published'])
-
-# --- Platform Inference ---
-def detect_platform(text):
-    text = str(text).lower()
-    if 'twitter.com' in text or '@' in text:
-        return 'Twitter'
-    if 'facebook.com' in text:
-        return 'Facebook'
-    return 'Unknown'
-
-# Create a platform column based on extract or other logic
-df['platform'] = df['extract'].apply(detect_platform)
-
-# Extract hour
-df['Hour'] = df['published'].dt.hour
+# Load dataset (platform and hour are derived when the snapshot is built)
+snap = get_snapshot()
+render_status(snap)
 
 # Group by hour and platform
-hourly_usage = df.groupby(['Hour', 'platform']).size().reset_index(name='Count')
+with span("aggregate", "hourly_usage"):
+    usage_by_hour = hourly_usage(snap.posts)
 
 # UI
 st.title("📈 Platform Usage Patterns")
 st.subheader("Hourly Complaint Activity by Platform")
 
 # Plot
-fig_line = px.line(
-    hourly_usage,
-    x='Hour',
-    y='Count',
-    color='platform',
-    title="Hourly Distribution of Posts by Platform",
-    markers=True,
-    template="plotly_white"
-)
-fig_line.update_layout(xaxis_title="Hour of Day (0-23)", yaxis_title="Number of Posts")
+with span("figure", "line"):
+    fig_line = px.line(
+        usage_by_hour,
+        x='Hour',
+        y='Count',
+        color='platform',
+        title="Hourly Distribution of Posts by Platform",
+        markers=True,
+        template="plotly_white"
+    )
+    fig_line.update_layout(xaxis_title="Hour of Day (0-23)", yaxis_title="Number of Posts")
 
-st.plotly_chart(fig_line, use_container_width=True)
+    st.plotly_chart(fig_line, use_container_width=True)
 
 
 #footer
@@ -73,3 +62,4 @@ text-align: center;
 """
 st.markdown(footer,unsafe_allow_html=True)
 
+end_run()
@@ -1,8 +1,14 @@
 import streamlit as st
 import pandas as pd
 from openai import AzureOpenAI
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
+from compute import engagement_by_city, search_complaints, top_category, top_city
+from chat_history import PAGE_SIZE, ChatHistory
+from export import render_export
+from table import render_paged_table
+from sampling import refine_when_ready
+from wordclouds import word_cloud_png
+from perf import begin_run, end_run, fragment_run, span
+from snapshot import get_snapshot, render_status
 
 # --- Azure OpenAI Config
 client = AzureOpenAI(
@@ -12,15 +18,10 @@ client = AzureOpenAI(
 )
 
 DEPLOYMENT_NAME = "gpt-4o"
+MATCH_COLUMNS = ["published", "extract", "region.name", "city.name", "engagement"]
 
 # --- Load dataset
-DATA_PATH = "data.csv"
-df_freq = pd.read_csv("PostIdFrequenceClean.csv")
-data_df = pd.read_csv("data.csv")
-df = pd.read_csv(DATA_PATH)
-df["engagement"] = pd.to_numeric(df["engagement"], errors='coerce')
-df["sentiment"] = pd.to_numeric(df["sentiment"], errors='coerce')
-df["published"] = pd.to_datetime(df["published"], errors='coerce')
+snap = get_snapshot()
 
 # --- Azure GPT Call
 def ask_azure_openai(prompt, followup=False):
@@ -34,129 +35,197 @@ def ask_azure_openai(prompt, followup=False):
             )
             system_message = "You are a helpful assistant suggesting follow-up questions."
 
-        response = client.chat.completions.create(
-            model=DEPLOYMENT_NAME,
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=300
-        )
+        with span("llm", "followup" if followup else "answer"):
+            response = client.chat.completions.create(
+                model=DEPLOYMENT_NAME,
+                messages=[
+                    {"role": "system", "content": system_message},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=300
+            )
         return response.choices[0].message.content
     except Exception as e:
         return f"⚠️ Error: {str(e)}"
 
 # --- Streamlit UI Setup
 st.set_page_config(page_title="💬 T-Know Bot", layout="wide")
+begin_run("chatbot")
 st.title("💬 AskTelkom Bot")
+render_status(snap)
 
-if "chat" not in st.session_state:
-    st.session_state.chat = []
-
-# --- Check for click on a suggested follow-up
-clicked_question = st.session_state.get("clicked_question", None)
-
-# --- Display chat history
-for msg in st.session_state.chat:
-    with st.chat_message(msg["role"]):
-        st.write(msg["content"])
-
-# --- Handle main input (typed OR clicked suggestion)
-user_query = st.chat_input("Ask about Telkom complaints...")
-
-# Prioritize clicked question
-if clicked_question:
-    user_query = clicked_question
-    st.session_state.clicked_question = None  # reset it
-
-if user_query:
-    st.session_state.chat.append({"role": "user", "content": user_query})
-    lower_query = user_query.lower().strip()
-    response = None
-
-    if any(lower_query.startswith(greet) for greet in ["hi", "hello", "hey"]):
-        response = "👋 Hi! I'm your Telkom complaints assistant powered by Azure GPT-4o. How can I help today?"
-
-    elif "summary" in lower_query or "summarize" in lower_query:
-        samples = df["extract"].dropna().sample(min(15, len(df))).tolist()
-        prompt = "Summarize the themes in these Telkom complaints:\n" + "\n".join(f"- {t}" for t in samples)
-        response = ask_azure_openai(prompt)
-
-    elif "search" in lower_query or "find" in lower_query:
-        keyword = lower_query.split("search")[-1].strip() or lower_query.split("find")[-1].strip()
-        matches = df[df["extract"].str.contains(keyword, case=False, na=False)]
-        count = len(matches)
-        response = f"🔍 Found **{count}** complaints containing '**{keyword}**'."
-        st.session_state.chat.append({"role": "assistant", "content": response})
-        st.write(response)
-        st.dataframe(matches[["published", "extract", "region.name", "city.name", "engagement"]], use_container_width=True)
-
-    elif "top city" in lower_query:
-        top_city = df["city.name"].value_counts().idxmax()
-        count = df["city.name"].value_counts().max()
-        response = f"📍 Most complaints came from **{top_city}** ({count} posts)."
-
-    elif "top category" in lower_query:
-        top_cat = df["category.label"].value_counts().idxmax()
-        response = f"🏷️ Most common complaint category is **{top_cat}**."
-
-    elif "average engagement" in lower_query:
-        avg = df["engagement"].mean()
-        response = f"📊 The average post engagement is **{avg:.2f}**."
-
-    elif any(word in lower_query for word in ["chart", "graph", "visualize", "table", "word cloud"]):
-        if "engagement" in lower_query:
-            chart_data = df.groupby("city.name")["engagement"].mean().sort_values(ascending=False).head(10)
-            st.markdown("### 📊 Average Engagement by City")
-            st.bar_chart(chart_data)
-            response = "Here's a bar chart showing average engagement by city."
-
-        elif "reshare" in lower_query:
-            top_reshared = df_freq.sort_values("ReshareCount", ascending=False).head(10)
-            st.markdown("### 🔁 Reshare Count by Post ID")
-            st.bar_chart(top_reshared.set_index("PostId")["ReshareCount"])
-            response = "Here's a chart of top PostIds by ReshareCount."
-
-        elif "table" in lower_query:
-            st.markdown("### 📋 Complaints Table Sample")
-            st.dataframe(df[["published", "extract", "region.name", "city.name", "engagement"]].head(10))
-            response = "Here is a sample table of Telkom complaints."
-
-        elif "word cloud" in lower_query:
-            text = " ".join(df["extract"].dropna().tolist())
-            wordcloud = WordCloud(width=800, height=400, background_color='white').generate(text)
-            st.markdown("### ☁️ Word Cloud of Complaint Keywords")
-            fig, ax = plt.subplots()
-            ax.imshow(wordcloud, interpolation='bilinear')
-            ax.axis("off")
-            st.pyplot(fig)
-            response = "Here's a word cloud showing frequent complaint terms."
-
-        else:
-            response = "I can generate charts, tables, or word clouds based on engagement, resharing, keywords, or regions. Try asking something more specific!"
+if "chat_history" not in st.session_state:
+    st.session_state.chat_history = ChatHistory()
+
+
+def ask(question):
+    st.session_state.clicked_question = question
 
-    else:
-        sample_context = df["extract"].dropna().sample(min(15, len(df))).tolist()
-        context = "\n".join(f"- {line}" for line in sample_context)
-        prompt = f"User asked: '{user_query}'. Use this data to answer:\n{context}"
-        response = ask_azure_openai(prompt)
 
-    if response:
-        st.session_state.chat.append({"role": "assistant", "content": response})
-        with st.chat_message("assistant"):
-            st.markdown(f"**You asked:** {user_query}")
-            st.write(response)
+def load_earlier():
+    st.session_state.chat_earlier_pages = st.session_state.get("chat_earlier_pages", 0) + 1
 
-        # --- Generate AI-based suggestions
-        followup_raw = ask_azure_openai(user_query, followup=True)
-        suggestions = [q.strip("-• ") for q in followup_raw.split("\n") if q.strip()]
 
+# --- Latest search matches (positions are only valid for the snapshot they came from)
+@st.fragment
+def search_matches(df, version):
+    with fragment_run("chatbot", "search_matches"):
+        last_search = st.session_state.get("last_search")
+        if last_search and last_search["version"] == version:
+            st.markdown(f"### 🔍 Matches for '{last_search['keyword']}'")
+            render_paged_table(df, last_search["positions"], MATCH_COLUMNS, key="chatbot_matches",
+                               token=(version, last_search["keyword"]))
+            render_export(df, last_search["positions"], columns=MATCH_COLUMNS, key="chatbot_export", file_stem="search-matches",
+                          token=version)
+
+
+# --- Latest word cloud; a cold one renders off-thread while a poller waits to rerun the page
+def latest_word_cloud(snap):
+    request = st.session_state.get("word_cloud")
+    if not request or request["version"] != snap.version:
+        return
+    st.markdown(f"### ☁️ Word Cloud of Complaint Keywords ({request['scope']})")
+    try:
+        with span("figure", "word_cloud"):
+            png, job = word_cloud_png(snap, request["filters"])
+    except Exception as e:
+        st.error(f"⚠️ The word cloud could not be rendered: {e}")
+        return
+    if png is None:
+        st.info("⏳ Rendering the word cloud…")
+        refine_when_ready(job)
+    elif png:
+        st.image(png, use_container_width=True)
+    else:
+        st.caption(f"There are no complaint terms to draw for {request['scope']}.")
+
+
+# --- The conversation reruns on its own; paging the match table reruns only that table.
+@st.fragment
+def conversation(snap):
+    with fragment_run("chatbot", "conversation"):
+        df, df_freq = snap.posts, snap.freq
+        history = st.session_state.chat_history
+
+        # --- Display chat history: a summary and pager for older turns, then the recent window
+        if history.archived:
+            st.caption(history.summary())
+            earlier_pages = st.session_state.get("chat_earlier_pages", 0)
+            if earlier_pages * PAGE_SIZE < history.archived:
+                st.button("⬆️ Load earlier messages", on_click=load_earlier)
+            for msg in history.earlier(earlier_pages):
+                with st.chat_message(msg["role"]):
+                    st.write(msg["content"])
+            if earlier_pages:
+                st.divider()
+
+        for msg in history.recent:
+            with st.chat_message(msg["role"]):
+                st.write(msg["content"])
+
+        # --- Handle main input (typed OR clicked suggestion)
+        user_query = st.chat_input("Ask about Telkom complaints...")
+
+        # Prioritize clicked question
+        clicked_question = st.session_state.get("clicked_question")
+        if clicked_question:
+            user_query = clicked_question
+            st.session_state.clicked_question = None  # reset it
+
+        if user_query:
+            history.append("user", user_query)
+            lower_query = user_query.lower().strip()
+            response = None
+
+            if any(lower_query.startswith(greet) for greet in ["hi", "hello", "hey"]):
+                response = "👋 Hi! I'm your Telkom complaints assistant powered by Azure GPT-4o. How can I help today?"
+
+            elif "summary" in lower_query or "summarize" in lower_query:
+                samples = df["extract"].dropna().sample(min(15, len(df))).tolist()
+                prompt = "Summarize the themes in these Telkom complaints:\n" + "\n".join(f"- {t}" for t in samples)
+                response = ask_azure_openai(prompt)
+
+            elif "search" in lower_query or "find" in lower_query:
+                keyword = lower_query.split("search")[-1].strip() or lower_query.split("find")[-1].strip()
+                with span("aggregate", "search"):
+                    matches = search_complaints(df, keyword)
+                count = len(matches)
+                response = f"🔍 Found **{count}** complaints containing '**{keyword}**'."
+                st.session_state.last_search = {"keyword": keyword, "version": snap.version, "positions": matches}
+
+            elif "top city" in lower_query:
+                city, count = top_city(df)
+                response = f"📍 Most complaints came from **{city}** ({count} posts)."
+
+            elif "top category" in lower_query:
+                top_cat = top_category(df)
+                response = f"🏷️ Most common complaint category is **{top_cat}**."
+
+            elif "average engagement" in lower_query:
+                avg = df["engagement"].mean()
+                response = f"📊 The average post engagement is **{avg:.2f}**."
+
+            elif any(word in lower_query for word in ["chart", "graph", "visualize", "table", "word cloud"]):
+                if "engagement" in lower_query:
+                    with span("aggregate", "engagement_by_city"):
+                        chart_data = engagement_by_city(df)
+                    st.markdown("### 📊 Average Engagement by City")
+                    with span("figure", "engagement_by_city"):
+                        st.bar_chart(chart_data)
+                    response = "Here's a bar chart showing average engagement by city."
+
+                elif "reshare" in lower_query:
+                    top_reshared = df_freq.sort_values("ReshareCount", ascending=False).head(10)
+                    st.markdown("### 🔁 Reshare Count by Post ID")
+                    st.bar_chart(top_reshared.set_index("PostId")["ReshareCount"])
+                    response = "Here's a chart of top PostIds by ReshareCount."
+
+                elif "table" in lower_query:
+                    st.markdown("### 📋 Complaints Table Sample")
+                    st.dataframe(df[["published", "extract", "region.name", "city.name", "engagement"]].head(10))
+                    response = "Here is a sample table of Telkom complaints."
+
+                elif "word cloud" in lower_query:
+                    # "word cloud for gauteng" / "word cloud of billing" narrow it to that region or issue.
+                    filters = tuple(
+                        (column, value) for column in ("region.name", "issue")
+                        for value in df[column].dropna().unique() if str(value).lower() in lower_query
+                    )
+                    scope = " and ".join(value for _, value in filters) or "all complaints"
+                    # Rendered below by latest_word_cloud, which polls while the image is being drawn.
+                    st.session_state.word_cloud = {"filters": filters, "scope": scope, "version": snap.version}
+                    response = f"Here's a word cloud showing frequent complaint terms for {scope}."
+
+                else:
+                    response = "I can generate charts, tables, or word clouds based on engagement, resharing, keywords, or regions. Try asking something more specific!"
+
+            else:
+                sample_context = df["extract"].dropna().sample(min(15, len(df))).tolist()
+                context = "\n".join(f"- {line}" for line in sample_context)
+                prompt = f"User asked: '{user_query}'. Use this data to answer:\n{context}"
+                response = ask_azure_openai(prompt)
+
+            if response:
+                history.append("assistant", response)
+                with st.chat_message("assistant"):
+                    st.markdown(f"**You asked:** {user_query}")
+                    st.write(response)
+
+                # --- Generate AI-based suggestions; kept so they can still be clicked on the next rerun
+                followup_raw = ask_azure_openai(user_query, followup=True)
+                st.session_state.chat_suggestions = [q.strip("-• ") for q in followup_raw.split("\n") if q.strip()]
+
+        suggestions = st.session_state.get("chat_suggestions")
         if suggestions:
             st.markdown("### 💡 You can also ask:")
             for i, suggestion in enumerate(suggestions):
-                if st.button(suggestion, key=f"suggestion_{i}"):
-                    st.session_state.clicked_question = suggestion
-                    st.rerun()
+                st.button(suggestion, key=f"suggestion_{i}", on_click=ask, args=(suggestion,))
+
+        latest_word_cloud(snap)
+        search_matches(df, snap.version)
+
+
+conversation(snap)
 
 # --- Styling & Footer
 st.markdown("---")
@@ -176,4 +245,6 @@ st.markdown(
     </div>
     """,
     unsafe_allow_html=True,
-)
\ No newline at end of file
+)
+
+end_run()
@@ -0,0 +1,253 @@
+"""Lightweight in-process instrumentation for the dashboard.
+
+Pages call begin_run()/end_run() around a rerun and wrap the expensive bits
+in span(phase, name); phases are "load", "transform", "aggregate", "figure"
+and "llm". st.fragment bodies are wrapped in fragment_run(), so a
+fragment-scoped rerun is recorded as its own run. Cache layers bump
+counters with incr(). Everything is kept in memory per process and shown on
+the hidden Performance view (main.py?perf=1); set DASHBOARD_PERF_EXPORT to a
+.jsonl or .prom path to also export there. Run records are appended to a
+.jsonl file as they end; a .prom file is rewritten at most once every
+DASHBOARD_PERF_EXPORT_INTERVAL seconds. The export path is server
+configuration only; the page offers downloads, never a path to write to.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+PHASES = ["load", "transform", "aggregate", "figure", "llm", "fragment"]
+MAX_SAMPLES = 500
+MAX_RUNS = 200
+EXPORT_PATH = os.environ.get("DASHBOARD_PERF_EXPORT")
+EXPORT_INTERVAL = float(os.environ.get("DASHBOARD_PERF_EXPORT_INTERVAL", "15"))
+
+_lock = threading.Lock()
+_local = threading.local()
+_span_samples = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+_span_totals = defaultdict(lambda: [0, 0.0])
+_counters = defaultdict(int)
+_runs = deque(maxlen=MAX_RUNS)
+_export_lock = threading.Lock()
+_last_export = 0.0
+
+try:
+    import psutil
+    _process = psutil.Process()
+
+    def rss_bytes():
+        return _process.memory_info().rss
+except ImportError:
+    def rss_bytes():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            return 0
+
+
+def _current_page():
+    run = getattr(_local, "run", None)
+    return run["page"] if run else "background"
+
+
+@contextmanager
+def span(phase, name=""):
+    page = _current_page()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        key = (page, phase, name)
+        with _lock:
+            _span_samples[key].append(elapsed_ms)
+            _span_totals[key][0] += 1
+            _span_totals[key][1] += elapsed_ms
+        run = getattr(_local, "run", None)
+        if run is not None:
+            label = f"{phase}:{name}" if name else phase
+            run["spans"][label] = run["spans"].get(label, 0.0) + elapsed_ms
+
+
+def incr(counter, amount=1):
+    with _lock:
+        _counters[counter] += amount
+
+
+def begin_run(page):
+    # A run left open by st.stop() or an exception is closed here.
+    if getattr(_local, "run", None) is not None:
+        end_run()
+    _local.run = {"page": page, "start": time.perf_counter(), "rss": rss_bytes(), "spans": {}}
+
+
+@contextmanager
+def fragment_run(page, name):
+    """Inside a full rerun the body is a "fragment" span; rerun on its own it is recorded as run "page#name"."""
+    if getattr(_local, "run", None) is not None:
+        with span("fragment", name):
+            yield
+        return
+    begin_run(f"{page}#{name}")
+    try:
+        yield
+    finally:
+        end_run()
+
+
+def end_run():
+    run = getattr(_local, "run", None)
+    if run is None:
+        return None
+    _local.run = None
+    record = {
+        "ts": time.time(),
+        "page": run["page"],
+        "total_ms": round((time.perf_counter() - run["start"]) * 1000, 3),
+        # Process-wide RSS, so concurrent sessions show up in each other's deltas.
+        "rss_delta_mb": round((rss_bytes() - run["rss"]) / 1e6, 3),
+        "spans": {k: round(v, 3) for k, v in run["spans"].items()},
+    }
+    with _lock:
+        _runs.append(record)
+    if EXPORT_PATH and _export_due(EXPORT_PATH):
+        export(EXPORT_PATH, record)
+    return record
+
+
+def _export_due(path):
+    """JSONL gets every record; a Prometheus file is rewritten at most once per EXPORT_INTERVAL."""
+    global _last_export
+    if not _is_prometheus(path):
+        return True
+    now = time.monotonic()
+    with _lock:
+        if now - _last_export < EXPORT_INTERVAL:
+            return False
+        _last_export = now
+    return True
+
+
+# --- Reporting
+def span_stats():
+    with _lock:
+        items = [(key, list(samples), _span_totals[key]) for key, samples in _span_samples.items()]
+    rows = []
+    for (page, phase, name), samples, (count, total) in items:
+        rows.append({
+            "page": page,
+            "phase": phase,
+            "name": name,
+            "count": count,
+            "total_ms": round(total, 2),
+            "mean_ms": round(total / count, 2),
+            "p50_ms": round(float(np.percentile(samples, 50)), 2),
+            "p95_ms": round(float(np.percentile(samples, 95)), 2),
+            "max_ms": round(max(samples), 2),
+        })
+    return sorted(rows, key=lambda r: (r["page"], PHASES.index(r["phase"]) if r["phase"] in PHASES else 99, r["name"]))
+
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+
+def recent_runs():
+    with _lock:
+        return list(_runs)
+
+
+def reset():
+    with _lock:
+        _span_samples.clear()
+        _span_totals.clear()
+        _counters.clear()
+        _runs.clear()
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def prometheus_text():
+    lines = [
+        "# HELP dashboard_span_seconds_total Time spent in instrumented spans.",
+        "# TYPE dashboard_span_seconds_total counter",
+    ]
+    stats = span_stats()
+    for row in stats:
+        labels = f'page="{_label(row["page"])}",phase="{row["phase"]}",name="{_label(row["name"])}"'
+        lines.append(f"dashboard_span_seconds_total{{{labels}}} {row['total_ms'] / 1000:.6f}")
+    lines += ["# HELP dashboard_span_count_total Number of times each span ran.", "# TYPE dashboard_span_count_total counter"]
+    for row in stats:
+        labels = f'page="{_label(row["page"])}",phase="{row["phase"]}",name="{_label(row["name"])}"'
+        lines.append(f"dashboard_span_count_total{{{labels}}} {row['count']}")
+    lines += ["# HELP dashboard_events_total Cache hits, misses and other counters.", "# TYPE dashboard_events_total counter"]
+    for name, value in sorted(counters().items()):
+        lines.append(f'dashboard_events_total{{name="{_label(name)}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def export(path, record=None):
+    """Append a run record (or all recent runs) to JSONL, or rewrite a Prometheus text file."""
+    if _is_prometheus(path):
+        # Sessions and worker processes export concurrently; each writes its own temporary file.
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, "w") as f:
+            f.write(prometheus_text())
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # Losing the race is harmless: another writer has just exported.
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        return
+    records = [record] if record is not None else recent_runs()
+    lines = "".join(json.dumps(rec) + "\n" for rec in records)
+    with _export_lock, open(path, "a") as f:
+        f.write(lines)
+
+
+def _is_prometheus(path):
+    return path.endswith(".prom") or path.endswith(".txt")
+
+
+def render_performance_page():
+    import pandas as pd
+    import streamlit as st
+
+    st.header("⏱️ Performance")
+    st.caption("In-process timings for this server process. Spans are grouped by page and phase.")
+
+    runs = recent_runs()
+    if runs:
+        runs_df = pd.DataFrame([{k: v for k, v in r.items() if k != "spans"} for r in runs])
+        runs_df["ts"] = pd.to_datetime(runs_df["ts"], unit="s")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Reruns recorded", len(runs_df))
+        col2.metric("p95 rerun (ms)", round(float(runs_df["total_ms"].quantile(0.95)), 1))
+        col3.metric("Mean RSS delta (MB)", round(float(runs_df["rss_delta_mb"].mean()), 2))
+        st.subheader("Recent reruns")
+        st.dataframe(runs_df.sort_values("ts", ascending=False), use_container_width=True)
+
+    st.subheader("Spans")
+    st.dataframe(pd.DataFrame(span_stats()), use_container_width=True)
+
+    st.subheader("Counters")
+    st.dataframe(pd.DataFrame(sorted(counters().items()), columns=["Counter", "Value"]), use_container_width=True)
+
+    st.subheader("Export")
+    col1, col2 = st.columns(2)
+    col1.download_button("Prometheus text", prometheus_text(), file_name="dashboard.prom", mime="text/plain")
+    col2.download_button("Recent runs (JSONL)", "".join(json.dumps(r) + "\n" for r in runs),
+                         file_name="dashboard_runs.jsonl", mime="application/jsonl")
+    if EXPORT_PATH:
+        st.caption(f"Also exported by the server to {os.path.basename(EXPORT_PATH)} (DASHBOARD_PERF_EXPORT).")
@@ -0,0 +1,253 @@
+"""Headless rerun-latency harness built on streamlit.testing.v1.AppTest.
+
+Runs main.py (every sidebar view) and each script in pages/ against
+synthetic data, replays realistic interactions and reports p50/p95 rerun
+latency per scenario. The chatbot talks to a stub model, so no network or
+API key is needed.
+
+AppTest always reruns the whole script, so for interactions handled by an
+st.fragment the harness also reports the fragment body's own time (its
+"fragment" span). That is what a fragment-scoped rerun costs in the browser.
+
+    python rerun_harness.py --rows 10k --iterations 20 --json after.json --compare before.json
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_VIEWS = [
+    "Overview", "Keyword Search", "Word Cloud", "Top Words",
+    "Issue Analysis", "Comment Stats", "Post Details", "All Data Insights"
+]
+CHAT_MESSAGES = [
+    "hi",
+    "search data",
+    "find router",
+    "top city",
+    "top category",
+    "average engagement",
+    "show engagement chart",
+    "table of complaints",
+    "summarize the complaints",
+    "why are people unhappy with billing?",
+]
+
+
+# --- Stub model for the chatbot
+class _StubMessage:
+    def __init__(self, content):
+        self.content = content
+
+
+class _StubChoice:
+    def __init__(self, content):
+        self.message = _StubMessage(content)
+
+
+class _StubResponse:
+    def __init__(self, content):
+        self.choices = [_StubChoice(content)]
+
+
+class _StubCompletions:
+    def __init__(self, latency):
+        self.latency = latency
+
+    def create(self, model, messages, max_tokens=None, **kwargs):
+        time.sleep(self.latency)
+        if "follow-up" in messages[0]["content"]:
+            return _StubResponse("- Which city complains most?\n- What is the average engagement?\n- Show a word cloud")
+        return _StubResponse("Most complaints are about network outages, billing errors and slow support.")
+
+
+class StubAzureOpenAI:
+    latency = 0.0
+
+    def __init__(self, *args, **kwargs):
+        self.chat = type("Chat", (), {"completions": _StubCompletions(StubAzureOpenAI.latency)})()
+
+
+def install_stub_model(latency=0.0):
+    import openai
+    StubAzureOpenAI.latency = latency
+    openai.AzureOpenAI = StubAzureOpenAI
+
+
+# --- Interactions; each one mutates the AppTest and triggers a rerun
+def rerun(at, rng, i):
+    at.run()
+
+
+def main_view(view):
+    def interact(at, rng, i):
+        if view == "Post Details" and not at.session_state["selected_postid"]:
+            at.session_state["selected_postid"] = at.button[0].label.split(": ", 1)[-1] if at.button else None
+        at.sidebar.selectbox[0].select(view).run()
+    return interact
+
+
+def view_post(at, rng, i):
+    if at.sidebar.selectbox[0].value != "Overview":
+        at.sidebar.selectbox[0].select("Overview").run()
+    buttons = [b for b in at.button if b.label.startswith("🔗 View Post")]
+    buttons[i % len(buttons)].click().run()
+
+
+def demographics_filters(at, rng, i):
+    regions, genders = at.multiselect[0], at.multiselect[1]
+    regions.set_value(rng.sample(regions.options, rng.randint(1, len(regions.options))))
+    genders.set_value(rng.sample(genders.options, rng.randint(1, len(genders.options))))
+    at.run()
+
+
+def issues_filters(at, rng, i):
+    start, end = at.date_input[0], at.date_input[1]
+    if i % 2:
+        at.selectbox[0].select(rng.choice(at.selectbox[0].options)).run()
+        return
+    lo, hi = start.value, end.value
+    span_days = max((hi - lo).days, 1)
+    new_start = lo + datetime.timedelta(days=rng.randint(0, span_days // 2))
+    start.set_value(new_start)
+    at.run()
+
+
+def city_switch(at, rng, i):
+    at.selectbox[0].select(rng.choice(at.selectbox[0].options)).run()
+
+
+def chatbot_message(at, rng, i):
+    at.chat_input[0].set_value(CHAT_MESSAGES[i % len(CHAT_MESSAGES)]).run()
+
+
+def chatbot_suggestion(at, rng, i):
+    suggestions = [b for b in at.button if b.key and b.key.startswith("suggestion_")]
+    if not suggestions:
+        chatbot_message(at, rng, i)
+        return
+    suggestions[i % len(suggestions)].click().run()
+
+
+def scenarios():
+    items = [(f"main:{view}", "main.py", main_view(view)) for view in MAIN_VIEWS]
+    items.append(("main:view_post", "main.py", view_post))
+    items.append(("chatbot:suggestion", os.path.join("pages", "chatbot.py"), chatbot_suggestion))
+    for script in sorted(os.listdir(os.path.join(APP_DIR, "pages"))):
+        if not script.endswith(".py"):
+            continue
+        name = script[:-3]
+        interact = {
+            "Demographics": demographics_filters,
+            "Issues-Analysis": issues_filters,
+            "chatbot": chatbot_message,
+            "CityInsights": city_switch,
+        }.get(name, rerun)
+        items.append((name, os.path.join("pages", script), interact))
+    return items
+
+
+def run_scenario(script, interact, iterations, seed, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    import perf
+
+    perf.reset()
+    rng = random.Random(seed)
+    at = AppTest.from_file(os.path.join(APP_DIR, script), default_timeout=timeout)
+    start = time.perf_counter()
+    at.run()
+    initial = time.perf_counter() - start
+    timings, errors = [], []
+    for i in range(iterations):
+        start = time.perf_counter()
+        try:
+            interact(at, rng, i)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+            continue
+        timings.append(time.perf_counter() - start)
+        errors.extend(e.message for e in at.exception)
+    fragments = {r["name"]: r["p50_ms"] for r in perf.span_stats() if r["phase"] == "fragment"}
+    return initial, timings, errors, fragments
+
+
+def summarize(name, initial, timings, errors, fragments):
+    row = {"scenario": name, "initial_ms": round(initial * 1000, 1), "n": len(timings), "errors": len(errors)}
+    if fragments:
+        row["fragment_p50_ms"] = fragments
+    if timings:
+        ms = np.array(timings) * 1000
+        row.update(p50_ms=round(float(np.percentile(ms, 50)), 1),
+                   p95_ms=round(float(np.percentile(ms, 95)), 1),
+                   max_ms=round(float(ms.max()), 1))
+    if errors:
+        row["first_error"] = errors[0][:200]
+    return row
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {r["scenario"]: r for r in json.load(f)["results"]}
+    print(f"\n{'scenario':<28} {'p95 before':>11} {'p95 after':>11} {'change':>8}")
+    for row in results:
+        old = baseline.get(row["scenario"])
+        if not old or "p95_ms" not in old or "p95_ms" not in row:
+            continue
+        change = (row["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0.0
+        print(f"{row['scenario']:<28} {old['p95_ms']:>9.1f}ms {row['p95_ms']:>9.1f}ms {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-page rerun latency with AppTest")
+    parser.add_argument("--rows", default="10k", help="synthetic rows per dataset")
+    parser.add_argument("--data-dir", help="use existing data instead of generating it")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds the stub model sleeps per call")
+    parser.add_argument("--only", nargs="*", help="scenario names to run")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="earlier --json output to compare p95 against")
+    args = parser.parse_args()
+
+    data_dir = args.data_dir
+    if not data_dir:
+        import synthetic
+        data_dir = tempfile.mkdtemp(prefix="dashboard-harness-")
+        synthetic.write_dataset(data_dir, synthetic.parse_rows(args.rows), seed=args.seed)
+    # Must be set before the pages import snapshot.py.
+    os.environ["DASHBOARD_DATA_DIR"] = os.path.abspath(data_dir)
+    os.chdir(APP_DIR)
+    sys.path.insert(0, APP_DIR)
+    install_stub_model(args.llm_latency)
+
+    results = []
+    print(f"{'scenario':<28} {'initial':>9} {'p50':>9} {'p95':>9} {'errors':>7}")
+    for name, script, interact in scenarios():
+        if args.only and name not in args.only:
+            continue
+        row = summarize(name, *run_scenario(script, interact, args.iterations, args.seed, args.timeout))
+        results.append(row)
+        print(f"{name:<28} {row['initial_ms']:>7.0f}ms {row.get('p50_ms', 0):>7.0f}ms {row.get('p95_ms', 0):>7.0f}ms {row['errors']:>7}")
+        for fragment, ms in row.get("fragment_p50_ms", {}).items():
+            print(f"    fragment {fragment}: p50 {ms:.0f}ms")
+        if row["errors"]:
+            print(f"    {row['first_error']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"run_at": datetime.datetime.now().isoformat(), "rows": args.rows, "results": results}, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
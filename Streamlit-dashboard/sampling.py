@@ -0,0 +1,249 @@
+"""Approximate-first results from a stratified sample, refined to exact ones.
+
+Each snapshot keeps a StratifiedSample of the posts, stratified by region,
+category and calendar day. Every stratum keeps ceil(n * SAMPLE_FRACTION)
+rows picked at random, so small strata are never lost, and each kept row
+carries the weight n / m of its stratum. Totals are Horvitz-Thompson
+estimates. Day strata are often a single row, so standard errors use the
+collapsed region x category strata with the with-replacement approximation.
+That errs on the wide side.
+
+Filter-heavy pages render from the sample first, with 95% confidence
+intervals. The exact result is computed on a background thread and cached
+process-wide by key. A small polling fragment reruns the page once it is
+ready, and the exact numbers replace the estimates. Each session waits on
+at most one job per page. A queued job nobody is waiting for any more,
+because its sessions moved on to other filters, is cancelled before it
+starts.
+"""
+import math
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from perf import incr, span
+
+SAMPLE_FRACTION = 0.05
+SAMPLE_STRATA = ["region.name", "category.label"]
+# Below this many posts exact results are fast enough, and the page skips the sample.
+APPROX_MIN_ROWS = 50_000
+SAMPLE_SEED = 20_481
+Z = 1.96
+MAX_RESULTS = 32
+POLL_SECONDS = 0.5
+
+
+class StratifiedSample:
+    def __init__(self, posts, fraction=SAMPLE_FRACTION, strata=SAMPLE_STRATA, seed=SAMPLE_SEED):
+        self.population = len(posts)
+        self.fraction = fraction
+        keys = [posts[c] for c in strata if c in posts.columns]
+        coarse = _codes(keys, len(posts))
+        stratum = _codes(keys + [posts["published"].dt.normalize()], len(posts))
+
+        # Random rank within each stratum: sort by (stratum, random key) and count from each stratum's start.
+        order = np.lexsort((np.random.default_rng(seed).random(len(posts)), stratum))
+        sizes = np.bincount(stratum)
+        starts = np.cumsum(sizes) - sizes
+        rank = np.empty(len(posts), dtype=np.int64)
+        rank[order] = np.arange(len(posts)) - starts[stratum[order]]
+        kept = np.ceil(sizes * fraction).astype(np.int64)
+        positions = np.flatnonzero(rank < kept[stratum])
+
+        self.rows = posts.iloc[positions].reset_index(drop=True)
+        self.weights = (sizes / np.maximum(kept, 1))[stratum[positions]]
+        self.vstrata = coarse[positions]
+        self.vstrata_rows = np.bincount(coarse)
+        self.vstrata_kept = np.bincount(self.vstrata, minlength=len(self.vstrata_rows))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def estimate(self, mask, by, values=None):
+        """Estimated population totals of each column of values (default: row counts) per group of by.
+
+        mask selects the sample rows passing the page filters. Returns (totals, standard errors),
+        two DataFrames indexed by group.
+        """
+        if values is None:
+            values = pd.DataFrame({"count": np.ones(len(self.rows))})
+        groups, labels = pd.factorize(np.asarray(by)[mask] if not isinstance(by, pd.Series) else by[mask], sort=True)
+        keep = groups >= 0
+        weights = self.weights[mask][keep]
+        vstrata = self.vstrata[mask][keep]
+        n_vstrata = len(self.vstrata_rows)
+        # One cell per (group, variance stratum); sums and sums of squares come from two bincounts per column.
+        cells = groups[keep] * n_vstrata + vstrata
+        size = len(labels) * n_vstrata
+        m = np.tile(self.vstrata_kept.astype(float), len(labels))
+        n = np.tile(self.vstrata_rows, len(labels))
+        scale = np.where(m > 1, m / np.maximum(m - 1, 1) * (1 - m / np.maximum(n, 1)), 0.0)
+        totals, errors = {}, {}
+        for column in values.columns:
+            z = values[column].to_numpy(dtype=float)[mask][keep] * weights
+            sums = np.bincount(cells, z, minlength=size)
+            squares = np.bincount(cells, z * z, minlength=size)
+            variance = np.clip(squares - sums ** 2 / np.maximum(m, 1), 0, None) * scale
+            totals[column] = sums.reshape(len(labels), n_vstrata).sum(axis=1)
+            errors[column] = np.sqrt(variance.reshape(len(labels), n_vstrata).sum(axis=1))
+        index = pd.Index(labels, name="group")
+        return pd.DataFrame(totals, index=index), pd.DataFrame(errors, index=index)
+
+    def estimate_counts(self, mask, by):
+        """Estimated row count per group as a Series, and the 95% half-width per group."""
+        totals, errors = self.estimate(mask, by)
+        return totals["count"], Z * errors["count"]
+
+    def estimate_total(self, mask):
+        """Estimated number of rows passing mask and its 95% half-width."""
+        totals, errors = self.estimate(mask, np.zeros(len(self.rows), dtype=np.int8))
+        if totals.empty:
+            return 0.0, 0.0
+        return float(totals["count"].iloc[0]), float(Z * errors["count"].iloc[0])
+
+
+def _codes(keys, rows):
+    if not keys:
+        return np.zeros(rows, dtype=np.int64)
+    return pd.DataFrame({i: k.to_numpy() for i, k in enumerate(keys)}).groupby(
+        list(range(len(keys))), dropna=False, sort=False).ngroup().to_numpy()
+
+
+# --- Exact results computed off the request thread
+_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="exact")
+_lock = threading.Lock()
+_results = OrderedDict()
+# Keys whose exact computation raised; they are not resubmitted for the same data version.
+_failures = OrderedDict()
+# key -> _Job; and (session, page) -> the key that session is waiting on.
+_jobs = {}
+_waiting = {}
+
+
+class _Job:
+    __slots__ = ("future", "waiters")
+
+    def __init__(self, future):
+        self.future = future
+        self.waiters = set()
+
+
+def _run(key, func, args):
+    try:
+        with span("aggregate", f"exact:{key[0]}"):
+            result = func(*args)
+        remember(key, result)
+        return result
+    except Exception as e:
+        incr("exact.error")
+        _remember(_failures, key, e)
+        raise
+    finally:
+        with _lock:
+            job = _jobs.pop(key, None)
+            for waiter in job.waiters if job is not None else ():
+                _waiting.pop(waiter, None)
+
+
+def _remember(cache, key, value):
+    with _lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > MAX_RESULTS:
+            cache.popitem(last=False)
+
+
+def remember(key, result):
+    _remember(_results, key, result)
+
+
+def request(key, func, *args, background=True):
+    """Exact result for key from the cache, else the job computing it.
+
+    Returns (result, job, error): the cached result, or (when background) the future computing it, or the
+    exception an earlier attempt raised. The first element of key names the page; a session waits on one
+    job per page, and the job it waited on before is cancelled if no other session needs it. The cache is
+    checked and the job submitted under one lock, so a job finishing in between is never resubmitted.
+    """
+    waiter = (_session(), key[0])
+    with _lock:
+        if key in _results:
+            _results.move_to_end(key)
+            incr("exact.hit")
+            _release(waiter)
+            return _results[key], None, None
+        error = _failures.get(key)
+        if error is not None or not background:
+            _release(waiter)
+            return None, None, error
+        if _waiting.get(waiter) != key:
+            _release(waiter)
+        job = _jobs.get(key)
+        if job is None:
+            incr("exact.miss")
+            job = _jobs[key] = _Job(_pool.submit(_run, key, func, args))
+        job.waiters.add(waiter)
+        _waiting[waiter] = key
+    return None, job.future, None
+
+
+def _release(waiter):
+    # Caller holds _lock.
+    key = _waiting.pop(waiter, None)
+    job = _jobs.get(key)
+    if job is None:
+        return
+    job.waiters.discard(waiter)
+    if not job.waiters and job.future.cancel():
+        incr("exact.cancelled")
+        del _jobs[key]
+
+
+def _session():
+    if "exact_session" not in st.session_state:
+        st.session_state.exact_session = uuid.uuid4().hex
+    return st.session_state.exact_session
+
+
+def approximate_mode(snap):
+    """Sidebar toggle for approximate-first rendering; only offered when the data is large enough to need it."""
+    if snap.sample is None or snap.sample.population <= APPROX_MIN_ROWS:
+        return False
+    with st.sidebar:
+        return st.toggle("⚡ Approximate first", value=True, key="approx_mode",
+                         help="Show estimates from a stratified sample at once, then swap in exact results.")
+
+
+def render_accuracy(snap, approximate):
+    """Indicator of whether estimates or exact results are on screen."""
+    if approximate:
+        sample = snap.sample
+        st.info(f"≈ **Approximate**: estimated from a {len(sample):,}-row stratified sample "
+                f"({len(sample) / sample.population:.0%} of {sample.population:,} posts); "
+                "error bars are 95% confidence intervals. Exact results replace these when ready.")
+    else:
+        st.caption(f"✅ Exact results from all {len(snap.posts):,} posts.")
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def refine_when_ready(job):
+    # A failed job reruns the page too; it then finds the failure and stops polling.
+    if job.done():
+        st.rerun()
+
+
+def refine_or_report(job, error):
+    """Poll job until the exact results are in, or report why there will be none."""
+    if error is not None:
+        st.error(f"Computing the exact results failed ({error}); the estimates above stay on screen.")
+    else:
+        refine_when_ready(job)
+
+
+def half_width_text(value, half_width):
+    return f"{value:,.0f} ± {math.ceil(half_width):,}"
@@ -0,0 +1,173 @@
+"""Declared schemas and validated pyarrow CSV ingest for the three datasets.
+
+Each column declares its type and, for dates, the exact formats it may use,
+so nothing is inferred per value and "14 06 2022" can never be read
+month-first. Files are read with the multi-threaded pyarrow CSV engine; a
+UTF-8 BOM is stripped. Values that do not match their declared type become
+null, and the row is listed in the ingest report instead of being dropped
+silently.
+
+    python schema.py --data-dir .
+"""
+import argparse
+import os
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pyarrow import csv
+
+MAX_REPORTED_REJECTS = 1000
+
+ARROW_TYPES = {"string": pa.string(), "float64": pa.float64(), "int64": pa.int64()}
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str
+    dtype: str  # "string", "float64", "int64" or "timestamp"
+    formats: tuple = ()
+    required: bool = True
+
+
+@dataclass(frozen=True)
+class Schema:
+    name: str
+    columns: tuple
+
+    @property
+    def by_name(self):
+        return {c.name: c for c in self.columns}
+
+
+POSTS = Schema("posts", (
+    Column("published", "timestamp", formats=("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d", "%d %m %Y %H:%M", "%d %m %Y")),
+    Column("extract", "string"),
+    Column("engagement", "float64"),
+    Column("sentiment", "float64"),
+    Column("OTS", "float64", required=False),
+    Column("city.name", "string"),
+    Column("region.name", "string"),
+    Column("gender.label", "string"),
+    Column("category.label", "string"),
+))
+
+COMMENTS = Schema("comments", (
+    Column("PostId", "string"),
+    Column("PostText", "string"),
+    Column("PublishedDate", "timestamp", formats=("%d %m %Y",)),
+))
+
+FREQ = Schema("freq", (
+    Column("PostId", "string"),
+    Column("ReplyToCount", "int64"),
+    Column("ReshareCount", "int64"),
+    Column("TotalFKReferences", "int64"),
+))
+
+
+@dataclass
+class IngestReport:
+    dataset: str
+    rows: int = 0
+    seconds: float = 0.0
+    rejected_rows: int = 0
+    # One row per rejected value: row (1-based data row), column, value.
+    rejects: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=["row", "column", "value"]))
+
+    def summary(self):
+        text = f"{self.dataset}: {self.rows:,} rows in {self.seconds:.2f}s"
+        if self.rejected_rows:
+            by_column = self.rejects["column"].value_counts()
+            text += f", {self.rejected_rows:,} rejected (" + ", ".join(f"{c}: {n}" for c, n in by_column.items()) + ")"
+        return text
+
+
+def _parse_timestamps(values, formats):
+    parsed = None
+    for fmt in formats:
+        attempt = pc.strptime(values, format=fmt, unit="s", error_is_null=True)
+        parsed = attempt if parsed is None else pc.coalesce(parsed, attempt)
+    return parsed
+
+
+def _parse_numbers(values, dtype):
+    try:
+        return pc.cast(values, ARROW_TYPES[dtype])
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        # Rare slow path: at least one value is not a number; null out just those.
+        numbers = pd.to_numeric(values.to_pandas(), errors="coerce")
+        if dtype == "int64":
+            return pa.array(numbers.round().astype("Int64"), type=pa.int64())
+        return pa.array(numbers, type=pa.float64())
+
+
+def read_dataset(schema, path):
+    """Read and validate one CSV; returns (DataFrame, IngestReport)."""
+    start = time.perf_counter()
+    # Typed columns are read as strings and converted below, so one bad value nulls a cell rather than failing the file.
+    table = csv.read_csv(
+        path,
+        read_options=csv.ReadOptions(encoding="utf8"),
+        convert_options=csv.ConvertOptions(
+            column_types={c.name: pa.string() for c in schema.columns},
+            strings_can_be_null=True,
+        ),
+    )
+    # Tolerate a BOM or stray whitespace in the header line.
+    table = table.rename_columns([name.lstrip("﻿").strip() for name in table.column_names])
+    missing = [c.name for c in schema.columns if c.required and c.name not in table.column_names]
+    if missing:
+        raise ValueError(f"{path}: missing required column(s) {', '.join(missing)}")
+
+    report = IngestReport(schema.name, rows=table.num_rows)
+    bad_rows, rejects = None, []
+    for column in schema.columns:
+        if column.name not in table.column_names or column.dtype == "string":
+            continue
+        raw = table.column(column.name).combine_chunks()
+        if column.dtype == "timestamp":
+            converted = _parse_timestamps(raw, column.formats)
+        else:
+            converted = _parse_numbers(pc.utf8_trim_whitespace(raw), column.dtype)
+        # A value is rejected when there was text but it did not convert.
+        rejected = pc.and_(pc.is_valid(raw), pc.is_null(converted))
+        if pc.any(rejected).as_py():
+            positions = pc.indices_nonzero(rejected).to_numpy()
+            rejects.append(pd.DataFrame({
+                "row": positions[:MAX_REPORTED_REJECTS] + 1,
+                "column": column.name,
+                "value": raw.take(positions[:MAX_REPORTED_REJECTS]).to_pylist(),
+            }))
+            bad_rows = rejected if bad_rows is None else pc.or_(bad_rows, rejected)
+        table = table.set_column(table.column_names.index(column.name), column.name, converted)
+
+    if bad_rows is not None:
+        report.rejected_rows = pc.sum(bad_rows).as_py()
+        report.rejects = pd.concat(rejects, ignore_index=True)
+    df = table.to_pandas()
+    report.seconds = time.perf_counter() - start
+    return df, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate the dashboard CSVs against their schemas")
+    parser.add_argument("--data-dir", default=os.environ.get("DASHBOARD_DATA_DIR", "."))
+    parser.add_argument("--show", type=int, default=10, help="rejected values to print per dataset")
+    args = parser.parse_args()
+
+    for schema, filename in [(POSTS, "data.csv"), (COMMENTS, "PostComments.csv"), (FREQ, "PostIdFrequenceClean.csv")]:
+        path = os.path.join(args.data_dir, filename)
+        if not os.path.exists(path):
+            print(f"{schema.name}: {path} not found")
+            continue
+        _, report = read_dataset(schema, path)
+        print(report.summary())
+        if report.rejected_rows:
+            print(report.rejects.head(args.show).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
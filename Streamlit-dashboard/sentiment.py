@@ -0,0 +1,109 @@
+"""Batch sentiment scoring for PostComments.csv.
+
+Comment text is scored with nltk's VADER model across a process pool in
+chunks. Scores are cached by text hash in PostComments.sentiment.csv next to
+the comments, so a rerun only scores comments it has never seen. The
+snapshot joins the cached scores in; nothing is scored on the request path.
+
+The VADER lexicon is read locally and must be installed once beforehand:
+
+    python -m nltk.downloader vader_lexicon
+    python sentiment.py --data-dir . --workers 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from schema import COMMENTS, read_dataset
+
+CACHE_FILE = "PostComments.sentiment.csv"
+CHUNK_SIZE = 5_000
+
+_analyzer = None
+
+
+def text_hashes(texts):
+    # Vectorised 64-bit content hash; identical text always maps to the same key.
+    return pd.util.hash_pandas_object(pd.Series(texts).astype(str), index=False)
+
+
+def _init_worker():
+    global _analyzer
+    from nltk.sentiment import SentimentIntensityAnalyzer
+    try:
+        _analyzer = SentimentIntensityAnalyzer()
+    except LookupError as e:
+        raise RuntimeError("VADER lexicon missing; run `python -m nltk.downloader vader_lexicon` once") from e
+
+
+def _score_chunk(texts):
+    if _analyzer is None:
+        _init_worker()
+    return [_analyzer.polarity_scores(text)["compound"] for text in texts]
+
+
+def score_texts(texts, workers=None, chunk_size=CHUNK_SIZE):
+    texts = [str(t) for t in texts]
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    # A pool only pays off once there is more than one chunk to spread out.
+    if len(chunks) <= 1 or workers == 1:
+        return [score for chunk in chunks for score in _score_chunk(chunk)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        return [score for scores in pool.map(_score_chunk, chunks) for score in scores]
+
+
+def cache_path(data_dir):
+    return os.path.join(data_dir, CACHE_FILE)
+
+
+def load_cache(data_dir):
+    path = cache_path(data_dir)
+    if not os.path.exists(path):
+        return pd.Series(dtype="float64", name="sentiment")
+    cache = pd.read_csv(path, dtype={"text_hash": "uint64", "sentiment": "float64"})
+    return cache.drop_duplicates("text_hash", keep="last").set_index("text_hash")["sentiment"]
+
+
+def attach_sentiment(comments, data_dir):
+    """Join cached scores onto comment rows; unscored comments get NaN."""
+    cache = load_cache(data_dir)
+    hashes = text_hashes(comments["extract"])
+    comments["sentiment"] = hashes.map(cache).to_numpy() if len(cache) else float("nan")
+    return comments
+
+
+def update_cache(texts, data_dir, workers=None, chunk_size=CHUNK_SIZE):
+    """Score texts whose hash is not cached yet and append them; returns how many were scored."""
+    cache = load_cache(data_dir)
+    pending = pd.DataFrame({"text": pd.Series(texts).astype(str).to_numpy()})
+    pending["text_hash"] = text_hashes(pending["text"]).to_numpy()
+    pending = pending.drop_duplicates("text_hash")
+    pending = pending[~pending["text_hash"].isin(cache.index)]
+    if pending.empty:
+        return 0
+    pending["sentiment"] = score_texts(pending["text"].tolist(), workers=workers, chunk_size=chunk_size)
+    path = cache_path(data_dir)
+    pending[["text_hash", "sentiment"]].to_csv(path, mode="a", index=False, header=not os.path.exists(path))
+    return len(pending)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score PostComments.csv sentiment with VADER")
+    parser.add_argument("--data-dir", default=os.environ.get("DASHBOARD_DATA_DIR", "."))
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    comments, _ = read_dataset(COMMENTS, os.path.join(args.data_dir, "PostComments.csv"))
+    texts = comments["PostText"]
+    scored = update_cache(texts, args.data_dir, workers=args.workers, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"scored {scored} new of {len(texts)} comments in {elapsed:.1f}s -> {cache_path(args.data_dir)}")
+
+
+if __name__ == "__main__":
+    main()
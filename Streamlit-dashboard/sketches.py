@@ -0,0 +1,177 @@
+"""Mergeable quantile sketches for skewed post metrics.
+
+A few viral posts dominate the means of engagement, sentiment and OTS, and
+exact percentiles per city, region or day would need a full sort of each
+group. TDigest is a merging t-digest: values are kept as at most about
+compression / 2 weighted centroids. Centroids are small near the tails and
+large in the middle, so p99 stays accurate. Digests merge by pooling their
+centroids and compressing again, so per-day digests roll up into weeks and
+per-region digests into any set of regions, without the raw rows.
+
+QuantileSketches keeps one digest per (metric, dimension value) and is
+updated at ingest by StreamState, one batch of appended rows at a time.
+Compression is fully vectorised: each sorted centroid goes to the cluster
+floor(k(q)) of the k1 scale function at its cumulative weight q.
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+
+SKETCH_COMPRESSION = 200
+SKETCH_FIELDS = ["engagement", "sentiment", "OTS"]
+# dimension -> posts column; "day" buckets the published timestamp by calendar day.
+SKETCH_DIMENSIONS = {"region": "region.name", "city": "city.name", "day": "published"}
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+def quantile_label(q):
+    return f"p{q * 100:g}"
+
+
+class TDigest:
+    def __init__(self, compression=SKETCH_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def add(self, values):
+        """Add a batch of values; NaNs are ignored."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.count += len(values)
+            self.min = min(self.min, values.min())
+            self.max = max(self.max, values.max())
+            self._compress(np.concatenate([self.means, values]),
+                           np.concatenate([self.weights, np.ones(len(values))]))
+        return self
+
+    def merge(self, other):
+        if other.count:
+            self.count += other.count
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._compress(np.concatenate([self.means, other.means]),
+                           np.concatenate([self.weights, other.weights]))
+        return self
+
+    @classmethod
+    def combine(cls, digests, compression=SKETCH_COMPRESSION):
+        combined = cls(compression)
+        digests = [d for d in digests if d.count]
+        if digests:
+            combined.count = sum(d.count for d in digests)
+            combined.min = min(d.min for d in digests)
+            combined.max = max(d.max for d in digests)
+            combined._compress(np.concatenate([d.means for d in digests]),
+                               np.concatenate([d.weights for d in digests]))
+        return combined
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        left = (np.cumsum(weights) - weights) / weights.sum()
+        # k1 scale: clusters span at most one unit of k, so they shrink towards q = 0 and q = 1.
+        k = np.floor(self.compression / (2 * np.pi) * np.arcsin(2 * left - 1))
+        starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q):
+        """Estimated quantile(s) q in [0, 1]; NaN for an empty digest."""
+        q = np.asarray(q, dtype=float)
+        if not self.count:
+            return np.full(q.shape, np.nan)
+        # Each centroid sits at the middle of its weight; the extremes are pinned to min and max.
+        centres = np.cumsum(self.weights) - self.weights / 2
+        return np.interp(q * self.count, np.r_[0, centres, self.count], np.r_[self.min, self.means, self.max])
+
+    def __len__(self):
+        return len(self.means)
+
+
+class QuantileSketches:
+    """One TDigest per metric and dimension value, plus an overall digest per metric."""
+
+    def __init__(self, fields=SKETCH_FIELDS, dimensions=SKETCH_DIMENSIONS, compression=SKETCH_COMPRESSION):
+        self.fields = list(fields)
+        self.dimensions = dict(dimensions)
+        self.compression = compression
+        self.digests = {(f, d): {} for f in self.fields for d in self.dimensions}
+        self.totals = {f: TDigest(compression) for f in self.fields}
+
+    def fork(self):
+        """A copy sharing the digests; update() replaces a digest before adding to it."""
+        fork = copy.copy(self)
+        fork.digests = {key: dict(digests) for key, digests in self.digests.items()}
+        fork.totals = {f: copy.copy(digest) for f, digest in self.totals.items()}
+        return fork
+
+    def _keys(self, posts, dimension):
+        column = posts[self.dimensions[dimension]]
+        return column.dt.normalize() if dimension == "day" else column
+
+    def update(self, posts):
+        fields = [f for f in self.fields if f in posts.columns]
+        values = {f: posts[f].to_numpy(dtype=float, na_value=np.nan) for f in fields}
+        for f in fields:
+            self.totals[f].add(values[f])
+        for dimension in self.dimensions:
+            codes, uniques = pd.factorize(self._keys(posts, dimension))
+            order = np.argsort(codes, kind="stable")
+            # Rows with a missing key (code -1) sort first and are skipped.
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            for f in fields:
+                digests = self.digests[(f, dimension)]
+                sorted_values = values[f][order]
+                for i, key in enumerate(uniques):
+                    digest = digests.get(key)
+                    # A shallow copy is enough: TDigest replaces its arrays rather than writing into them.
+                    digest = digests[key] = copy.copy(digest) if digest is not None else TDigest(self.compression)
+                    digest.add(sorted_values[bounds[i]:bounds[i + 1]])
+
+    def frame(self, field, dimension, quantiles=QUANTILES):
+        """count and quantile columns per value of dimension, largest groups first."""
+        digests = self.digests[(field, dimension)]
+        return _quantile_frame(dimension, list(digests), list(digests.values()), quantiles) \
+            .sort_values("count", ascending=False, ignore_index=True)
+
+    def combined(self, field, dimension=None, keys=None, quantiles=QUANTILES):
+        """Quantiles over the union of the given groups, or over everything."""
+        if dimension is None:
+            digest = self.totals[field]
+        else:
+            digests = self.digests[(field, dimension)]
+            digest = TDigest.combine([digests[k] for k in keys if k in digests], self.compression)
+        return {"count": digest.count,
+                **{quantile_label(q): float(v) for q, v in zip(quantiles, digest.quantile(quantiles))}}
+
+    def series(self, field, freq="W", quantiles=QUANTILES):
+        """Quantiles per time bucket, merged from the per-day digests."""
+        digests = self.digests[(field, "day")]
+        if not digests:
+            return _quantile_frame("period", [], [], quantiles)
+        days = pd.DatetimeIndex(list(digests))
+        periods = days.to_period(freq).start_time
+        buckets = {}
+        for period, digest in zip(periods, digests.values()):
+            buckets.setdefault(period, []).append(digest)
+        periods = sorted(buckets)
+        merged = [TDigest.combine(buckets[p], self.compression) for p in periods]
+        return _quantile_frame("period", periods, merged, quantiles)
+
+    def memory_bytes(self):
+        return sum(d.means.nbytes + d.weights.nbytes
+                   for digests in self.digests.values() for d in digests.values())
+
+
+def _quantile_frame(key_name, keys, digests, quantiles):
+    values = np.array([d.quantile(quantiles) for d in digests]).reshape(len(digests), len(quantiles))
+    frame = pd.DataFrame({key_name: keys, "count": [d.count for d in digests]})
+    for i, q in enumerate(quantiles):
+        frame[quantile_label(q)] = values[:, i]
+    return frame
@@ -0,0 +1,295 @@
+"""Background-refreshed data snapshot shared by every page and session.
+
+The refresher watches the source CSVs, rebuilds the cleaned frames, derived
+columns and aggregates on its own thread and swaps the finished snapshot in
+with a single reference assignment, so a rerun never waits on a rebuild.
+Snapshot frames are shared between sessions and must be treated as read-only.
+
+A snapshot built in-process is also published as an artifact build and
+loaded back memory-mapped. Other Streamlit processes on the host then map the
+same files instead of parsing the CSVs, and all of them share one copy of
+the frames (see artifacts.py).
+"""
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from compute import all_data_insights, city_partitions, comment_stats, comments_overview
+from features import add_comment_features, add_post_features
+from perf import incr, span
+from sampling import StratifiedSample
+from schema import COMMENTS, FREQ, POSTS, read_dataset
+from streaming import StreamState
+import artifacts
+import feature_store
+import sentiment
+
+DATA_DIR = os.environ.get("DASHBOARD_DATA_DIR", ".")
+REFRESH_INTERVAL = float(os.environ.get("DASHBOARD_REFRESH_SECONDS", "30"))
+# When set, the aggregates API (api.py) runs inside the Streamlit process on this port. With several
+# workers on one host only the first to bind it serves the API; `python api.py` runs it on its own.
+API_PORT = os.environ.get("DASHBOARD_API_PORT")
+# Set to 0 to keep in-process builds private, e.g. when the data directory is read-only.
+SHARE_SNAPSHOT = os.environ.get("DASHBOARD_SHARE_SNAPSHOT", "1") != "0"
+
+logger = logging.getLogger(__name__)
+
+SOURCE_FILES = {
+    "posts": "data.csv",
+    "comments": "PostComments.csv",
+    "freq": "PostIdFrequenceClean.csv",
+    # Written by sentiment.py; optional.
+    "comment_sentiment": sentiment.CACHE_FILE,
+}
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: int
+    built_at: float
+    fingerprint: tuple
+    posts: pd.DataFrame
+    comments: pd.DataFrame
+    freq: pd.DataFrame
+    aggregates: dict = field(default_factory=dict)
+    cities: dict = field(default_factory=dict)
+    streams: StreamState = field(default_factory=StreamState)
+    ingest: dict = field(default_factory=dict)
+    sample: StratifiedSample = None
+    build_seconds: float = 0.0
+
+    @property
+    def age(self):
+        return time.time() - self.built_at
+
+    @property
+    def customer_comments(self):
+        return self.comments[self.comments["is_customer"]]
+
+
+def source_fingerprint(data_dir=DATA_DIR):
+    fingerprint = []
+    for name in sorted(SOURCE_FILES):
+        path = os.path.join(data_dir, SOURCE_FILES[name])
+        try:
+            stat = os.stat(path)
+            fingerprint.append((name, stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            fingerprint.append((name, None, None))
+    return tuple(fingerprint)
+
+
+def data_fingerprint(data_dir=DATA_DIR):
+    """Source files plus the published artifact build, so a new build.py run also triggers a refresh."""
+    return source_fingerprint(data_dir) + (("artifacts", artifacts.current_build(artifacts.artifact_root(data_dir))),)
+
+
+# --- Cleaning
+def _read(schema, path, reports):
+    with span("load", os.path.basename(path)):
+        df, report = read_dataset(schema, path)
+    reports[schema.name] = report
+    incr(f"ingest.{schema.name}.rows", report.rows)
+    incr(f"ingest.{schema.name}.rejected", report.rejected_rows)
+    return df
+
+
+def format_days(timestamps, fmt):
+    """Series.dt.strftime for a date-level fmt, formatting each distinct day once instead of every row."""
+    codes, days = pd.factorize(timestamps.dt.normalize())
+    # Code -1 (NaT) picks the trailing NaN.
+    labels = np.append(np.asarray(days.strftime(fmt), dtype=object), np.nan)
+    return pd.Series(labels[codes], index=timestamps.index)
+
+
+def load_posts(path, store_root=None, reports=None, pool=None):
+    # Types, numeric coercion and date formats are declared in schema.POSTS.
+    df = _read(POSTS, path, {} if reports is None else reports)
+    df["hour"] = df["published"].dt.hour.astype("Int64")
+    df["month"] = format_days(df["published"], "%b")
+    df["day"] = format_days(df["published"], "%b %d")
+    with span("transform", "post_features"):
+        return add_post_features(df, store_root, pool)
+
+
+def load_comments(path, store_root=None, reports=None, pool=None):
+    df = _read(COMMENTS, path, {} if reports is None else reports)
+    df.rename(columns={"PostText": "extract", "PublishedDate": "published"}, inplace=True)
+    with span("transform", "comment_features"):
+        return add_comment_features(df, store_root, pool)
+
+
+def load_freq(path, reports=None):
+    return _read(FREQ, path, {} if reports is None else reports)
+
+
+def build_aggregates(posts, comments, freq):
+    with span("aggregate", "snapshot"):
+        aggregates = comments_overview(comments[comments["is_customer"]], freq)
+        aggregates.update(all_data_insights(posts))
+        aggregates["comment_stats"] = comment_stats(comments[comments["is_customer"]], freq)
+    return aggregates
+
+
+def build_city_partitions(posts):
+    with span("aggregate", "city_partitions"):
+        return city_partitions(posts)
+
+
+def build_snapshot(data_dir=DATA_DIR, version=1, fingerprint=None, previous=None, pool=None, use_artifacts=True):
+    """previous is the snapshot being replaced; its incremental state is carried forward.
+
+    A current artifact build (see build.py) is loaded instead when it matches the source files.
+    Otherwise the snapshot is built here and, with use_artifacts and SHARE_SNAPSHOT, published
+    for the other workers and returned memory-mapped.
+    """
+    start = time.perf_counter()
+    fingerprint = fingerprint or data_fingerprint(data_dir)
+    # Taken before reading, so a file that changes mid-build makes the published build stale, not wrong.
+    sources = source_fingerprint(data_dir)
+    root = artifacts.artifact_root(data_dir)
+    if use_artifacts:
+        with span("load", "artifacts"):
+            built = artifacts.load_build(root, sources)
+        if built is not None:
+            return Snapshot(version=version, built_at=time.time(), fingerprint=fingerprint,
+                            build_seconds=time.perf_counter() - start, **built)
+    store_root = feature_store.store_dir(data_dir)
+    reports = {}
+    posts = load_posts(os.path.join(data_dir, SOURCE_FILES["posts"]), store_root, reports, pool)
+    comments = load_comments(os.path.join(data_dir, SOURCE_FILES["comments"]), store_root, reports, pool)
+    with span("load", "comment_sentiment"):
+        comments = sentiment.attach_sentiment(comments, data_dir)
+    freq = load_freq(os.path.join(data_dir, SOURCE_FILES["freq"]), reports)
+    with span("aggregate", "streams"):
+        streams = (previous.streams if previous else StreamState()).ingest(posts)
+    posts["topic"] = streams.topics.row_labels(posts).to_numpy()
+    with span("aggregate", "stratified_sample"):
+        sample = StratifiedSample(posts)
+    snapshot = Snapshot(
+        version=version,
+        built_at=time.time(),
+        fingerprint=fingerprint,
+        posts=posts,
+        comments=comments,
+        freq=freq,
+        aggregates=build_aggregates(posts, comments, freq),
+        cities=build_city_partitions(posts),
+        streams=streams,
+        ingest=reports,
+        sample=sample,
+        build_seconds=time.perf_counter() - start,
+    )
+    if use_artifacts and SHARE_SNAPSHOT:
+        snapshot = publish(snapshot, root, sources, start)
+    return snapshot
+
+
+def publish(snapshot, root, sources, start):
+    """Write snapshot as an artifact build and swap its frames for the memory-mapped ones."""
+    try:
+        with span("load", "publish_artifacts"):
+            build_id = artifacts.write_build(root, snapshot, sources)
+            built = artifacts.load_build(root, sources)
+    except OSError:
+        incr("snapshot.publish_error")
+        return snapshot
+    if built is None:
+        return snapshot
+    # Publishing moved the CURRENT pointer, which is part of the data fingerprint.
+    fingerprint = sources + (("artifacts", build_id),)
+    return replace(snapshot, fingerprint=fingerprint, build_seconds=time.perf_counter() - start, **built)
+
+
+class SnapshotRefresher:
+    """Polls the source files and rebuilds the snapshot off the request path."""
+
+    def __init__(self, data_dir=DATA_DIR, interval=REFRESH_INTERVAL):
+        self.data_dir = data_dir
+        self.interval = interval
+        self.last_error = None
+        self._lock = threading.Lock()
+        # The very first snapshot has to be built before anything can render.
+        self._snapshot = build_snapshot(data_dir)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="snapshot-refresher", daemon=True)
+        self._thread.start()
+
+    def current(self):
+        return self._snapshot
+
+    def refresh(self, force=False):
+        """Rebuild if the sources changed; returns True when a new snapshot was swapped in."""
+        with self._lock:
+            current = self._snapshot
+            fingerprint = data_fingerprint(self.data_dir)
+            if fingerprint == current.fingerprint and not force:
+                return False
+            try:
+                snapshot = build_snapshot(self.data_dir, current.version + 1, fingerprint, previous=current)
+            except Exception as e:
+                self.last_error = e
+                incr("snapshot.rebuild_error")
+                return False
+            # A file that changed while we were reading it is picked up on the next poll.
+            if data_fingerprint(self.data_dir) != snapshot.fingerprint:
+                return False
+            self.last_error = None
+            self._snapshot = snapshot
+            incr("snapshot.rebuild")
+            return True
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+
+@st.cache_resource
+def get_refresher(data_dir=DATA_DIR):
+    refresher = SnapshotRefresher(data_dir)
+    if API_PORT:
+        # The API lives as long as the refresher, so it serves this process's snapshot.
+        import api
+        try:
+            api.start_in_background(refresher, port=int(API_PORT))
+        except OSError as e:
+            # Most likely another worker holds the port; the dashboard does not depend on the API.
+            incr("api.bind_error")
+            logger.warning("aggregates API not started on port %s: %s", API_PORT, e)
+    return refresher
+
+
+def get_snapshot():
+    with span("load", "snapshot"):
+        return get_refresher().current()
+
+
+def format_age(seconds):
+    if seconds < 60:
+        return f"{int(seconds)}s ago"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m ago"
+    return f"{int(seconds // 3600)}h ago"
+
+
+def render_status(snap):
+    st.sidebar.caption(f"🗂️ Data v{snap.version} · refreshed {format_age(snap.age)}")
+    rejected = {name: r.rejected_rows for name, r in snap.ingest.items() if r.rejected_rows}
+    if rejected:
+        st.sidebar.caption("⚠️ Rows with unparseable values: " + ", ".join(f"{n} {c:,}" for n, c in rejected.items())
+                           + " (see `python schema.py`)")
+    spikes = snap.streams.spikes.recent()
+    if len(spikes):
+        top = spikes.iloc[0]
+        st.sidebar.warning(f"⚠️ {len(spikes)} complaint spike(s) in the last 7 days, "
+                           f"e.g. {top['key']} ({top['count']} vs ~{top['expected']:.0f}/day). "
+                           "See Executive Overview.")
@@ -0,0 +1,380 @@
+"""Incrementally maintained statistics over the posts stream.
+
+data.csv is treated as an append-only log. Each snapshot build feeds only
+the rows appended since the previous build into a fork of the previous
+state, so the cost of a refresh grows with the new rows, not the file. A
+fork shares every structure the new rows leave alone: days and sketches are
+copied only when a row touches them, and nothing per row is copied. Whether
+the file really was only appended to is checked against a digest of the
+old rows' hashes over every column the state reads. Hashing is one
+vectorised pass and far cheaper than re-feeding the rows. An edit or
+deletion anywhere in the old rows rebuilds the state from scratch.
+
+CXIndex keeps Welford accumulators (count, mean, sum of squared deviations)
+per calendar day for sentiment, engagement and OTS. Adding a row is O(1);
+daily, weekly and rolling-window CX series are derived from the per-day
+accumulators, which number in the hundreds however many rows there are.
+
+SpikeDetector keeps an EWMA mean and variance of the daily complaint count
+for every issue category and region. Rows are counted into the open day;
+when a later day arrives the open day is closed, each count is scored as a
+z-score against its EWMA, and then it is folded into the EWMA. Closing a day
+costs O(categories + regions), so the cost per row stays constant.
+
+Topic clusters for rows the keyword taxonomy leaves over live in topics.py,
+and the per-group quantile sketches in sketches.py.
+"""
+import copy
+import hashlib
+from collections import defaultdict, deque
+
+import numpy as np
+import pandas as pd
+
+from sketches import SKETCH_DIMENSIONS, SKETCH_FIELDS, QuantileSketches
+from topics import TOPIC_COLUMNS, TopicModel
+
+CX_FIELDS = ["sentiment", "engagement", "OTS"]
+# Same weights as compute.cx_score.
+CX_WEIGHTS = {"sentiment": 0.4, "engagement": 0.4, "OTS": 0.2}
+CX_WINDOWS = [7, 30, 90]
+
+# Column each spike dimension is keyed on.
+SPIKE_DIMENSIONS = {"issue": "issue", "region": "region.name"}
+SPIKE_ALPHA = 0.2
+SPIKE_Z = 3.0
+# Ignore spikes smaller than this many complaints, and any before the EWMA has warmed up.
+SPIKE_MIN_COUNT = 5
+SPIKE_WARMUP_DAYS = 7
+MAX_ANOMALIES = 500
+# Every column the state reads; the append check hashes these.
+STATE_COLUMNS = list(dict.fromkeys(["published", *CX_FIELDS, *SPIKE_DIMENSIONS.values(), *SKETCH_FIELDS,
+                                    *SKETCH_DIMENSIONS.values(), *TOPIC_COLUMNS]))
+
+
+class Welford:
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self, n=0, mean=0.0, m2=0.0):
+        self.n, self.mean, self.m2 = n, mean, m2
+
+    def add(self, x):
+        if x != x:  # NaN
+            return
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, n, mean, m2):
+        """Chan et al. parallel combination with another accumulator's (n, mean, m2)."""
+        if not n:
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    def __repr__(self):
+        return f"Welford(n={self.n}, mean={self.mean:.4g}, var={self.variance:.4g})"
+
+
+class CXIndex:
+    """Per-day Welford accumulators for the CX index inputs."""
+
+    def __init__(self):
+        self.days = {}
+
+    def fork(self):
+        """A copy sharing the per-day accumulators; _day replaces a day before it changes."""
+        fork = CXIndex()
+        fork.days = dict(self.days)
+        return fork
+
+    def _day(self, day):
+        # Accumulators may be shared with the state this one was forked from, so a
+        # day is swapped for a fresh copy rather than updated in place.
+        acc = self.days.get(day)
+        if acc is None:
+            acc = {field: Welford() for field in CX_FIELDS}
+        else:
+            acc = {field: copy.copy(welford) for field, welford in acc.items()}
+        self.days[day] = acc
+        return acc
+
+    def add(self, day, **values):
+        acc = self._day(day)
+        for field, value in values.items():
+            acc[field].add(float(value))
+
+    def update(self, posts):
+        """Batch form of add(): rows are reduced per day, then merged into the accumulators."""
+        fields = [f for f in CX_FIELDS if f in posts.columns]
+        rows = posts.dropna(subset=["published"])
+        if rows.empty or not fields:
+            return
+        grouped = rows.groupby(rows["published"].dt.normalize())[fields]
+        counts, means, variances = grouped.count(), grouped.mean(), grouped.var(ddof=1).fillna(0.0)
+        for day in counts.index:
+            acc = self._day(day)
+            for field in fields:
+                n = int(counts.at[day, field])
+                acc[field].merge(n, float(means.at[day, field]) if n else 0.0,
+                                 float(variances.at[day, field]) * (n - 1) if n > 1 else 0.0)
+
+    def frame(self):
+        """One row per day with count and mean of each input."""
+        records = []
+        for day, acc in self.days.items():
+            record = {"day": day}
+            for field in CX_FIELDS:
+                record[f"{field}_n"] = acc[field].n
+                record[f"{field}_mean"] = acc[field].mean
+                record[f"{field}_std"] = acc[field].variance ** 0.5
+            records.append(record)
+        columns = ["day"] + [f"{f}_{s}" for f in CX_FIELDS for s in ("n", "mean", "std")]
+        return pd.DataFrame.from_records(records, columns=columns).sort_values("day").reset_index(drop=True)
+
+    @staticmethod
+    def _cx(n, sums):
+        """CX from per-field counts and sums; fields with no values contribute 0, like cx_score."""
+        cx = 0.0
+        for field in CX_FIELDS:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = np.where(n[field] > 0, sums[field] / np.maximum(n[field], 1), 0.0)
+            cx = cx + CX_WEIGHTS[field] * mean
+        return np.round(cx, 2)
+
+    def _calendar(self):
+        """Per-day counts and sums over every calendar day, gaps filled with zero."""
+        daily = self.frame().set_index("day")
+        if daily.empty:
+            return daily, {}, {}
+        daily = daily.reindex(pd.date_range(daily.index.min(), daily.index.max(), freq="D"))
+        n = {f: daily[f"{f}_n"].fillna(0).to_numpy() for f in CX_FIELDS}
+        sums = {f: (daily[f"{f}_n"] * daily[f"{f}_mean"]).fillna(0).to_numpy() for f in CX_FIELDS}
+        return daily, n, sums
+
+    def series(self, freq="D", windows=CX_WINDOWS):
+        """CX per day (freq="D") or week (freq="W"), plus a rolling CX for each window in days."""
+        daily, n, sums = self._calendar()
+        if daily.empty:
+            return pd.DataFrame(columns=["period", "posts", "cx"])
+        out = pd.DataFrame({"period": daily.index, "posts": n["engagement"].astype(int), "cx": self._cx(n, sums)})
+        for window in windows:
+            n_win = {f: _window_sum(n[f], window) for f in CX_FIELDS}
+            sum_win = {f: _window_sum(sums[f], window) for f in CX_FIELDS}
+            out[f"cx_{window}d"] = self._cx(n_win, sum_win)
+        if freq == "W":
+            week = daily.index.to_period("W")
+            n_week = {f: pd.Series(n[f]).groupby(week).sum() for f in CX_FIELDS}
+            sum_week = {f: pd.Series(sums[f]).groupby(week).sum() for f in CX_FIELDS}
+            weekly = pd.DataFrame({"period": n_week["engagement"].index.astype(str),
+                                   "posts": n_week["engagement"].to_numpy().astype(int),
+                                   "cx": self._cx({f: v.to_numpy() for f, v in n_week.items()},
+                                                  {f: v.to_numpy() for f, v in sum_week.items()})})
+            # Rolling values at the last day of each week.
+            last_days = out.groupby(week.to_numpy()).tail(1)
+            for window in windows:
+                weekly[f"cx_{window}d"] = last_days[f"cx_{window}d"].to_numpy()
+            out = weekly
+        return out
+
+    def trends(self, windows=CX_WINDOWS):
+        """CX over the latest window vs the window before it, ending at the last day with data."""
+        daily, n, sums = self._calendar()
+        trends = {}
+        for window in windows:
+            current = self._window_cx(n, sums, len(daily) - window, len(daily))
+            previous = self._window_cx(n, sums, len(daily) - 2 * window, len(daily) - window)
+            trends[window] = (current, None if current is None or previous is None else round(current - previous, 2))
+        return trends
+
+    def _window_cx(self, n, sums, start, stop):
+        start = max(start, 0)
+        if stop <= start or not n:
+            return None
+        n_win = {f: n[f][start:stop].sum() for f in CX_FIELDS}
+        if not any(n_win.values()):
+            return None
+        return float(self._cx(n_win, {f: sums[f][start:stop].sum() for f in CX_FIELDS}))
+
+
+def _window_sum(values, window):
+    """Trailing sum over the last `window` entries at every position."""
+    cumulative = np.cumsum(values)
+    out = cumulative.copy()
+    out[window:] -= cumulative[:-window]
+    return out
+
+
+class EWMA:
+    __slots__ = ("mean", "var", "days")
+
+    def __init__(self):
+        self.mean, self.var, self.days = 0.0, 0.0, 0
+
+    def zscore(self, x):
+        # A floor of one complaint keeps a perfectly flat history from scoring everything as infinite.
+        return (x - self.mean) / max(self.var ** 0.5, 1.0)
+
+    def update(self, x, alpha):
+        if self.days == 0:
+            self.mean = float(x)
+        else:
+            diff = x - self.mean
+            incr = alpha * diff
+            self.mean += incr
+            self.var = (1 - alpha) * (self.var + diff * incr)
+        self.days += 1
+
+
+class SpikeDetector:
+    """Daily complaint-count spikes per issue category and per region."""
+
+    def __init__(self, dimensions=SPIKE_DIMENSIONS, alpha=SPIKE_ALPHA, threshold=SPIKE_Z,
+                 min_count=SPIKE_MIN_COUNT, warmup_days=SPIKE_WARMUP_DAYS):
+        self.dimensions = dict(dimensions)
+        self.alpha, self.threshold = alpha, threshold
+        self.min_count, self.warmup_days = min_count, warmup_days
+        self.stats = {}
+        self.open_day = None
+        self.open_counts = defaultdict(int)
+        self.anomalies = deque(maxlen=MAX_ANOMALIES)
+        self.late_rows = 0
+
+    def fork(self):
+        """An independent copy; closing a day updates every series, and there are only categories + regions."""
+        return copy.deepcopy(self)
+
+    def add(self, day, count=1, **keys):
+        """Count rows for one day; keys maps dimension name to that row's value."""
+        if self.open_day is not None and day < self.open_day:
+            # The day was already scored; a late row cannot change it.
+            self.late_rows += count
+            return
+        if self.open_day is None or day > self.open_day:
+            self._advance(day)
+        for dim, key in keys.items():
+            if key == key and key is not None:
+                self.open_counts[(dim, key)] += count
+
+    def _advance(self, day):
+        if self.open_day is not None:
+            self._close(self.open_day, self.open_counts)
+            # Days with no rows at all still count as zero for every known series.
+            gap = pd.date_range(self.open_day + pd.Timedelta(days=1), day - pd.Timedelta(days=1), freq="D")
+            for empty_day in gap:
+                self._close(empty_day, {})
+        self.open_day = day
+        self.open_counts = defaultdict(int)
+
+    def _close(self, day, counts):
+        for series in counts.keys() - self.stats.keys():
+            self.stats[series] = EWMA()
+        for series, stat in self.stats.items():
+            count = counts.get(series, 0)
+            if self._is_spike(stat, count):
+                self.anomalies.append(self._record(day, series, stat, count, provisional=False))
+            stat.update(count, self.alpha)
+
+    def _is_spike(self, stat, count):
+        return stat.days >= self.warmup_days and count >= self.min_count and stat.zscore(count) >= self.threshold
+
+    def _record(self, day, series, stat, count, provisional):
+        return {"day": day, "dimension": series[0], "key": series[1], "count": count,
+                "expected": round(stat.mean, 1), "z": round(stat.zscore(count), 2), "provisional": provisional}
+
+    def update(self, posts):
+        """Batch form of add(): rows are counted per day and key, then fed in day order."""
+        rows = posts.dropna(subset=["published"])
+        if rows.empty:
+            return
+        days = rows["published"].dt.normalize()
+        if self.open_day is not None:
+            # Days already scored cannot change; their rows are only counted.
+            late = (days < self.open_day).to_numpy()
+            self.late_rows += int(late.sum())
+            rows, days = rows[~late], days[~late]
+        per_day = {}
+        for dim, column in self.dimensions.items():
+            if column in rows.columns:
+                for (day, key), count in rows.groupby([days, rows[column]]).size().items():
+                    per_day.setdefault(day, []).append((dim, key, int(count)))
+        for day in sorted(per_day):
+            if self.open_day is None or day > self.open_day:
+                self._advance(day)
+            for dim, key, count in per_day[day]:
+                self.open_counts[(dim, key)] += count
+
+    def frame(self, include_open=True):
+        """Flagged anomalies, newest first; the open day is scored provisionally."""
+        records = list(self.anomalies)
+        if include_open and self.open_day is not None:
+            for series, count in self.open_counts.items():
+                stat = self.stats.get(series)
+                if stat is not None and self._is_spike(stat, count):
+                    records.append(self._record(self.open_day, series, stat, count, provisional=True))
+        columns = ["day", "dimension", "key", "count", "expected", "z", "provisional"]
+        return pd.DataFrame.from_records(records, columns=columns).sort_values(
+            ["day", "z"], ascending=False).reset_index(drop=True)
+
+    def recent(self, days=7):
+        """Anomalies within the last `days` days of data."""
+        anomalies = self.frame()
+        if anomalies.empty or self.open_day is None:
+            return anomalies
+        return anomalies[anomalies["day"] > self.open_day - pd.Timedelta(days=days)]
+
+
+class StreamState:
+    """Everything maintained incrementally across snapshot builds."""
+
+    def __init__(self):
+        self.rows = 0
+        # Digest of the rows fed so far (see _prefix_digest); a mismatch means they were edited.
+        self.prefix_digest = _prefix_digest(np.empty(0, dtype=np.uint64), 0)
+        self.cx = CXIndex()
+        self.spikes = SpikeDetector()
+        self.topics = TopicModel()
+        self.quantiles = QuantileSketches()
+
+    def fork(self):
+        state = copy.copy(self)
+        state.cx = self.cx.fork()
+        state.spikes = self.spikes.fork()
+        state.topics = self.topics.fork()
+        state.quantiles = self.quantiles.fork()
+        return state
+
+    def _feed(self, rows):
+        self.cx.update(rows)
+        self.spikes.update(rows)
+        self.topics.update(rows, offset=self.rows)
+        self.quantiles.update(rows)
+
+    def ingest(self, posts):
+        """Return a new state with the rows appended since this one; self is left untouched."""
+        hashes = _row_hashes(posts)
+        appended = self.rows <= len(posts) and _prefix_digest(hashes, self.rows) == self.prefix_digest
+        state = self.fork() if appended else StreamState()
+        new_rows = posts.iloc[state.rows:]
+        if len(new_rows):
+            state._feed(new_rows)
+            state.rows = len(posts)
+            state.prefix_digest = _prefix_digest(hashes, len(posts))
+        return state
+
+
+def _row_hashes(posts):
+    columns = [c for c in STATE_COLUMNS if c in posts.columns]
+    return pd.util.hash_pandas_object(posts[columns], index=False).to_numpy()
+
+
+def _prefix_digest(hashes, rows):
+    return hashlib.blake2b(hashes[:rows].tobytes(), digest_size=16).hexdigest()
@@ -0,0 +1,188 @@
+"""Seeded generator for realistic Telkom complaint datasets.
+
+Writes data.csv, PostComments.csv and PostIdFrequenceClean.csv in the same
+shape as the real exports (BOM header and "dd mm yyyy" dates on the comment
+files), in chunks so that 10M-row files never have to fit in memory at once.
+
+    python synthetic.py --rows 1m --out bench_data/1m
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+CHUNK_ROWS = 250_000
+POST_ID_PREFIX = "312649-"
+
+CITY_REGIONS = {
+    "Johannesburg": "Gauteng",
+    "Pretoria": "Gauteng",
+    "Soweto": "Gauteng",
+    "Centurion": "Gauteng",
+    "Midrand": "Gauteng",
+    "Cape Town": "Western Cape",
+    "Stellenbosch": "Western Cape",
+    "George": "Western Cape",
+    "Durban": "KwaZulu-Natal",
+    "Pietermaritzburg": "KwaZulu-Natal",
+    "Richards Bay": "KwaZulu-Natal",
+    "Gqeberha": "Eastern Cape",
+    "East London": "Eastern Cape",
+    "Mthatha": "Eastern Cape",
+    "Bloemfontein": "Free State",
+    "Welkom": "Free State",
+    "Polokwane": "Limpopo",
+    "Mbombela": "Mpumalanga",
+    "Rustenburg": "North West",
+    "Mahikeng": "North West",
+    "Kimberley": "Northern Cape",
+    "Upington": "Northern Cape",
+}
+# Rough share of complaint volume; the big metros dominate.
+CITY_WEIGHTS = np.array([30, 14, 6, 4, 3, 18, 2, 2, 12, 3, 1, 4, 2, 1, 3, 1, 2, 2, 2, 1, 1, 1], dtype=float)
+
+CATEGORIES = ["Complaint", "Query", "Praise", "Sales", "Technical"]
+CATEGORY_WEIGHTS = np.array([45, 25, 5, 10, 15], dtype=float)
+GENDERS = ["male", "female", "unknown"]
+GENDER_WEIGHTS = np.array([46, 44, 10], dtype=float)
+
+COMPLAINT_TEMPLATES = [
+    "@TelkomZA I was charged twice on my billing this month, please refund me",
+    "Why is there a penalty on my account when I cancelled the contract?",
+    "Debit order went off again after I cancelled. Telkom please sort out my account",
+    "Undue charges on my invoice for the third month running",
+    "Network has been down the whole day, no signal in my area",
+    "There is an outage in our area since yesterday @TelkomZA",
+    "I am unable to use data even though I have 20GB left",
+    "My data expired before the end of the month, that is theft",
+    "The speed is so slow I can't even load a web page",
+    "Constant disconnect on my LTE router every evening",
+    "No response from support after 5 emails",
+    "Your agent promised to resolve my issue last week and nothing happened",
+    "Rude service at the store, I was ignored for an hour",
+    "Support keeps closing my ticket without any response",
+    "Still waiting for my sim card delivery, it has been 2 weeks",
+    "I did not receive my router, delivery delay again",
+    "When can I upgrade my device? My contract is up",
+    "I want to purchase the new router but the website keeps failing",
+    "My application was approved but nobody contacted me",
+    "I applied for the deal and never heard back about the approval",
+    "Cannot login to the self service portal",
+    "The website gives me an access denied error",
+    "Check out my page for cheap deals, promotion today only",
+    "Hj I have contract can I upgrade to this",
+    "How does the night data work on this package?",
+    "Is this deal prepaid or postpaid?",
+    "Thank you Telkom the technician fixed my line quickly",
+    "Great service from the call centre today",
+    "See https://facebook.com/telkomza for the full offer",
+    "Complaint logged via https://twitter.com/TelkomZA still no help",
+]
+# Complaints far outnumber praise and spam.
+TEMPLATE_WEIGHTS = np.array([4, 3, 3, 2, 5, 4, 3, 3, 4, 3, 4, 3, 2, 3, 3, 2, 2, 1, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1], dtype=float)
+SUFFIXES = ["", "", "", " Please help!", " This is ridiculous.", " #TelkomFail", " Ref number ", " Any update?"]
+
+
+def parse_rows(value):
+    value = str(value).lower()
+    if value in SCALES:
+        return SCALES[value]
+    return int(float(value.replace("k", "e3").replace("m", "e6")))
+
+
+def _choice(rng, options, weights, size):
+    return np.asarray(options, dtype=object)[rng.choice(len(options), size=size, p=weights / weights.sum())]
+
+
+def _texts(rng, size):
+    text = pd.Series(_choice(rng, COMPLAINT_TEMPLATES, TEMPLATE_WEIGHTS, size))
+    suffix = pd.Series(rng.choice(SUFFIXES, size=size))
+    refs = pd.Series(rng.integers(100000, 999999, size=size).astype(str))
+    suffix = suffix.where(suffix != " Ref number ", suffix + refs)
+    return text + suffix
+
+
+def _timestamps(rng, size, start, days):
+    # Most activity lands during the working day and evening.
+    day = rng.integers(0, days, size=size)
+    hour = np.clip(rng.normal(14, 4.5, size=size), 0, 23.99)
+    seconds = day * 86400 + (hour * 3600).astype(np.int64)
+    return pd.Timestamp(start) + pd.to_timedelta(seconds, unit="s")
+
+
+def _post_ids(rng, n_posts, size):
+    # A handful of viral posts attract most of the comments.
+    ranks = np.minimum(rng.zipf(1.4, size=size), n_posts) - 1
+    return np.char.add(POST_ID_PREFIX, (272000 + ranks * 97).astype(str))
+
+
+def generate_posts(rng, size, start="2022-01-01", days=365):
+    cities = _choice(rng, list(CITY_REGIONS), CITY_WEIGHTS, size)
+    return pd.DataFrame({
+        "published": _timestamps(rng, size, start, days).strftime("%Y-%m-%d %H:%M:%S"),
+        "extract": _texts(rng, size),
+        "engagement": np.round(rng.lognormal(1.2, 1.6, size=size)).astype(np.int64),
+        "sentiment": np.clip(np.round(rng.normal(-0.8, 2.0, size=size)), -5, 5).astype(np.int64),
+        "OTS": np.round(rng.lognormal(7.0, 1.5, size=size)).astype(np.int64),
+        "city.name": cities,
+        "region.name": pd.Series(cities).map(CITY_REGIONS).to_numpy(),
+        "gender.label": _choice(rng, GENDERS, GENDER_WEIGHTS, size),
+        "category.label": _choice(rng, CATEGORIES, CATEGORY_WEIGHTS, size),
+    })
+
+
+def generate_comments(rng, size, n_posts, start="2022-01-01", days=365):
+    return pd.DataFrame({
+        "PostId": _post_ids(rng, n_posts, size),
+        "PostText": _texts(rng, size),
+        "PublishedDate": _timestamps(rng, size, start, days).strftime("%d %m %Y"),
+    })
+
+
+def generate_freq(rng, n_posts):
+    replies = np.round(rng.pareto(1.3, size=n_posts) * 5).astype(np.int64)
+    reshares = rng.binomial(replies, 0.05)
+    return pd.DataFrame({
+        "PostId": np.char.add(POST_ID_PREFIX, (272000 + np.arange(n_posts) * 97).astype(str)),
+        "ReplyToCount": replies,
+        "ReshareCount": reshares,
+        "TotalFKReferences": replies + reshares,
+    })
+
+
+def write_dataset(out_dir, rows, seed=42, chunk_rows=CHUNK_ROWS):
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    n_posts = max(100, rows // 50)
+    paths = {
+        "posts": os.path.join(out_dir, "data.csv"),
+        "comments": os.path.join(out_dir, "PostComments.csv"),
+        "freq": os.path.join(out_dir, "PostIdFrequenceClean.csv"),
+    }
+    for offset in range(0, rows, chunk_rows):
+        size = min(chunk_rows, rows - offset)
+        first = offset == 0
+        generate_posts(rng, size).to_csv(paths["posts"], index=False, mode="w" if first else "a", header=first)
+        generate_comments(rng, size, n_posts).to_csv(
+            paths["comments"], index=False, mode="w" if first else "a", header=first,
+            encoding="utf-8-sig" if first else "utf-8")
+    generate_freq(rng, n_posts).to_csv(paths["freq"], index=False, encoding="utf-8-sig")
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Telkom complaint data")
+    parser.add_argument("--rows", default="10k", help="row count or scale name (10k, 100k, 1m, 10m)")
+    parser.add_argument("--out", default="synthetic_data")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    rows = parse_rows(args.rows)
+    paths = write_dataset(args.out, rows, seed=args.seed)
+    for path in paths.values():
+        print(f"wrote {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Paginated, server-side sorted table over row positions.
+
+A result is kept as row positions into a shared snapshot frame. Sorting
+reorders only those positions, once per sort choice, and each rerun slices
+and serialises just the visible page. What goes to the browser is therefore
+bounded by the page size, however many rows matched.
+"""
+import numpy as np
+import streamlit as st
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def sorted_positions(df, positions, column, ascending=True):
+    if column is None:
+        return positions
+    values = df[column].iloc[positions].reset_index(drop=True)
+    order = values.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+    return positions[order]
+
+
+def page_bounds(total, page, page_size):
+    pages = max(1, -(-total // page_size))
+    page = min(max(page, 1), pages)
+    start = (page - 1) * page_size
+    return page, pages, start, min(start + page_size, total)
+
+
+def render_paged_table(df, positions, columns, key, token=None, labels=None, page_size=50):
+    """Render one page of df rows at positions; token identifies the result so paging resets when it changes."""
+    positions = np.arange(len(df)) if positions is None else np.asarray(positions)
+    total = len(positions)
+    state = st.session_state.setdefault(key, {"token": token, "order": None, "sort": None})
+    if state["token"] != token:
+        state.update(token=token, order=None, sort=None)
+        st.session_state[f"{key}_page"] = 1
+
+    sort_col, dir_col, size_col, page_col = st.columns([3, 2, 2, 2])
+    sort_by = sort_col.selectbox("Sort by", ["(original order)"] + list(columns), key=f"{key}_sort",
+                                 format_func=lambda c: (labels or {}).get(c, c))
+    ascending = dir_col.radio("Order", ["Ascending", "Descending"], horizontal=True, key=f"{key}_dir") == "Ascending"
+    size = size_col.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(page_size)
+                              if page_size in PAGE_SIZES else 0, key=f"{key}_size")
+    pages = max(1, -(-total // size))
+    # A larger page size can leave the remembered page past the end.
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    page = page_col.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{key}_page")
+
+    column = None if sort_by == "(original order)" else sort_by
+    if state["order"] is None or state["sort"] != (column, ascending):
+        state["order"] = sorted_positions(df, positions, column, ascending)
+        state["sort"] = (column, ascending)
+    page, pages, start, stop = page_bounds(total, int(page), size)
+
+    view = df.iloc[state["order"][start:stop]][list(columns)]
+    if labels:
+        view = view.rename(columns=labels)
+    st.dataframe(view, use_container_width=True, hide_index=True)
+    st.caption(f"Rows {start + 1 if total else 0:,}–{stop:,} of {total:,} · page {page:,} of {pages:,}")
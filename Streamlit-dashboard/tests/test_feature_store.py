@@ -0,0 +1,31 @@
+"""Feature-store keys and cached classifier outputs."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import feature_store  # noqa: E402
+from features import get_sub_theme  # noqa: E402
+
+
+def test_missing_text_is_not_the_string_nan():
+    texts = pd.Series(["nan", np.nan, None, "refund please"], dtype=object)
+    hashes = feature_store.row_hashes(texts)
+    # Whatever astype(str) makes of a missing value, it gets the null key.
+    assert hashes[1] == hashes[2] == feature_store.NULL_HASH
+    assert hashes[0] != feature_store.NULL_HASH
+    assert len(set(hashes)) == 3
+
+
+def test_cached_feature_keeps_nan_and_the_string_nan_apart(tmp_path):
+    texts = pd.Series(["nan", np.nan, "refund please", None], dtype=object)
+    expected = [get_sub_theme(text) for text in texts]
+    assert expected[0] != expected[1]
+    for order in ([0, 1, 2, 3], [1, 0, 3, 2]):
+        batch = texts.iloc[order].reset_index(drop=True)
+        values = feature_store.cached_feature(batch, feature_store.row_hashes(batch), get_sub_theme,
+                                              str(tmp_path), "posts", "sub_theme")
+        assert list(values) == [expected[i] for i in order]
@@ -0,0 +1,29 @@
+"""Renders pages/Issues-Analysis.py end to end on generated data."""
+import os
+import sys
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+
+@pytest.fixture(scope="module")
+def data_dir(tmp_path_factory):
+    import synthetic
+
+    out = tmp_path_factory.mktemp("data")
+    synthetic.write_dataset(str(out), 10_000)
+    return str(out)
+
+
+def test_issues_page_renders(data_dir, monkeypatch):
+    from streamlit.testing.v1 import AppTest
+
+    monkeypatch.chdir(APP_DIR)
+    # snapshot reads the data directory at import time, which is the first AppTest run here.
+    monkeypatch.setenv("DASHBOARD_DATA_DIR", data_dir)
+    assert "snapshot" not in sys.modules
+    at = AppTest.from_file(os.path.join(APP_DIR, "pages", "Issues-Analysis.py"), default_timeout=120).run()
+    assert not at.exception, [e.message for e in at.exception]
+    assert at.metric[0].value == "10000"
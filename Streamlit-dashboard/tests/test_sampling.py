@@ -0,0 +1,106 @@
+"""StratifiedSample Horvitz-Thompson estimates against exact values."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sampling import StratifiedSample  # noqa: E402
+
+SEEDS = range(300)
+
+
+@pytest.fixture(scope="module")
+def posts():
+    rng = np.random.default_rng(7)
+    n = 4_000
+    # One region is tiny, so its strata keep a single row that stands in for all of them.
+    region = rng.choice(["Gauteng", "Western Cape", "Limpopo"], size=n, p=[0.7, 0.297, 0.003])
+    return pd.DataFrame({
+        "region.name": region,
+        "category.label": rng.choice(["Complaint", "Query", "Praise"], size=n, p=[0.6, 0.3, 0.1]),
+        "gender.label": rng.choice(["female", "male", "unknown"], size=n),
+        "published": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 20 * 86_400, n), unit="s"),
+        "engagement": rng.lognormal(1.0, 1.2, size=n),
+    })
+
+
+@pytest.fixture(scope="module")
+def samples(posts):
+    return [StratifiedSample(posts, seed=seed) for seed in SEEDS]
+
+
+def estimates(samples, mask_of, by, values=None):
+    """Estimated totals per group for every sample, as a (sample x group) frame."""
+    runs = []
+    for sample in samples:
+        totals, _ = sample.estimate(mask_of(sample.rows), sample.rows[by],
+                                    None if values is None else sample.rows[[values]])
+        runs.append(totals.iloc[:, 0])
+    return pd.DataFrame(runs).fillna(0.0)
+
+
+def assert_unbiased(runs, exact):
+    runs = runs.reindex(columns=exact.index, fill_value=0.0)
+    # The mean over seeds is within four standard errors of the exact value.
+    tolerance = 4 * runs.std(ddof=1) / np.sqrt(len(runs)) + 1e-9
+    assert (abs(runs.mean() - exact) <= tolerance).all(), pd.DataFrame({"mean": runs.mean(), "exact": exact})
+
+
+def test_counts_are_unbiased_per_group(posts, samples):
+    def mask_of(rows):
+        return (rows["gender.label"] != "unknown").to_numpy()
+
+    exact = posts[posts["gender.label"] != "unknown"]["region.name"].value_counts().astype(float)
+    runs = estimates(samples, mask_of, "region.name")
+    assert "Limpopo" in exact.index and exact["Limpopo"] < 15
+    assert_unbiased(runs, exact)
+
+
+def test_totals_are_unbiased(posts, samples):
+    def mask_of(rows):
+        return (rows["category.label"] == "Complaint").to_numpy()
+
+    chosen = posts[posts["category.label"] == "Complaint"]
+    exact = chosen.groupby("gender.label")["engagement"].sum()
+    assert_unbiased(estimates(samples, mask_of, "gender.label", values="engagement"), exact)
+
+
+def test_filters_that_empty_strata(posts, samples):
+    # Whole regions and categories are filtered out, so most strata have no rows left.
+    def mask_of(rows):
+        return (rows["region.name"].isin(["Limpopo", "Western Cape"]) & (rows["category.label"] == "Praise")).to_numpy()
+
+    chosen = posts[posts["region.name"].isin(["Limpopo", "Western Cape"]) & (posts["category.label"] == "Praise")]
+    runs = estimates(samples, mask_of, "region.name")
+    assert set(runs.columns) <= {"Limpopo", "Western Cape"}
+    assert_unbiased(runs, chosen["region.name"].value_counts().astype(float))
+
+    sample = samples[0]
+    nothing = np.zeros(len(sample), dtype=bool)
+    totals, errors = sample.estimate(nothing, sample.rows["region.name"])
+    assert totals.empty and errors.empty
+    assert sample.estimate_total(nothing) == (0.0, 0.0)
+
+
+def test_interval_covers_the_exact_total(posts, samples):
+    def mask_of(rows):
+        return (rows["region.name"] == "Gauteng").to_numpy()
+
+    exact = int((posts["region.name"] == "Gauteng").sum())
+    covered = 0
+    for sample in samples:
+        total, half_width = sample.estimate_total(mask_of(sample.rows))
+        covered += abs(total - exact) <= half_width
+    # Nominally 95%; the collapsed-strata variance errs on the wide side.
+    assert covered / len(samples) >= 0.9
+
+
+def test_every_stratum_keeps_a_row(posts, samples):
+    sample = samples[0]
+    keys = ["region.name", "category.label"]
+    assert sample.rows.groupby(keys).size().index.equals(posts.groupby(keys).size().index)
+    assert sample.weights.sum() == pytest.approx(len(posts))
@@ -0,0 +1,113 @@
+"""TDigest and QuantileSketches against exact quantiles."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sketches import TDigest, QuantileSketches  # noqa: E402
+
+QS = [0.01, 0.1, 0.5, 0.9, 0.99, 0.999]
+
+
+def skewed(n, seed=0):
+    return np.random.default_rng(seed).lognormal(mean=0.0, sigma=1.5, size=n)
+
+
+def rank_error(data, q, estimate):
+    """How far the estimate's rank in data is from q; the usual t-digest accuracy measure."""
+    return abs(np.mean(data <= estimate) - q)
+
+
+def fed_in_batches(data, batch=1_000):
+    digest = TDigest()
+    for start in range(0, len(data), batch):
+        digest.add(data[start:start + batch])
+    return digest
+
+
+def test_quantiles_track_numpy_on_skewed_data():
+    data = skewed(100_000)
+    digest = fed_in_batches(data)
+    estimates = digest.quantile(QS)
+    for q, estimate, exact in zip(QS, estimates, np.quantile(data, QS)):
+        # The k1 scale keeps tail centroids small, so the tails are the most accurate in rank.
+        assert rank_error(data, q, estimate) <= (0.005 if 0.05 < q < 0.95 else 0.001)
+        if q <= 0.99:
+            # Past p99 the lognormal tail is too sparse for a value tolerance to mean much.
+            assert estimate == pytest.approx(exact, rel=0.02)
+    assert digest.count == len(data)
+    assert (digest.min, digest.max) == (data.min(), data.max())
+    assert len(digest) < 1_000
+
+
+def test_merge_matches_a_single_digest():
+    data = skewed(60_000, seed=1)
+    parts = np.array_split(data, 12)
+    merged = TDigest()
+    for part in parts:
+        merged.merge(fed_in_batches(part))
+    combined = TDigest.combine([fed_in_batches(part) for part in parts])
+    single = fed_in_batches(data)
+    for digest in (merged, combined):
+        assert (digest.count, digest.min, digest.max) == (single.count, single.min, single.max)
+        for q, estimate, reference in zip(QS, digest.quantile(QS), single.quantile(QS)):
+            assert rank_error(data, q, estimate) <= rank_error(data, q, reference) + 0.005
+
+
+def test_empty_digest():
+    empty = TDigest()
+    assert empty.count == 0 and len(empty) == 0
+    assert np.isnan(empty.quantile(QS)).all()
+    assert TDigest.combine([]).count == 0
+    assert TDigest.combine([TDigest(), TDigest()]).count == 0
+    # NaNs are ignored, so an all-NaN batch leaves the digest empty.
+    assert TDigest().add([np.nan, np.nan]).count == 0
+    digest = TDigest().add([1.0, 2.0, 3.0])
+    before = digest.quantile(QS)
+    digest.merge(TDigest())
+    assert np.array_equal(digest.quantile(QS), before)
+
+
+def test_one_value():
+    digest = TDigest().add([4.2])
+    assert digest.count == 1
+    assert np.allclose(digest.quantile([0.0, 0.5, 1.0]), 4.2)
+    repeated = TDigest().add(np.full(1_000, 4.2))
+    assert np.allclose(repeated.quantile(QS), 4.2)
+
+
+def test_sketches_per_group_and_combined():
+    rng = np.random.default_rng(2)
+    n = 20_000
+    posts = pd.DataFrame({
+        "engagement": skewed(n, seed=3),
+        "sentiment": rng.normal(size=n),
+        "OTS": rng.exponential(size=n),
+        "region.name": rng.choice(["North", "South", "East", None], size=n, p=[0.6, 0.3, 0.09, 0.01]),
+        "city.name": rng.choice(["A", "B"], size=n),
+        "published": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 10 * 86_400, n), unit="s"),
+    })
+    sketches = QuantileSketches()
+    sketches.update(posts.iloc[:7_000])
+    sketches.update(posts.iloc[7_000:])
+
+    frame = sketches.frame("engagement", "region").set_index("region")
+    counts = posts["region.name"].value_counts()
+    # Rows with no region are left out of the per-region digests but still counted in the total.
+    assert frame["count"].to_dict() == counts.to_dict()
+    assert sketches.combined("engagement")["count"] == n
+    for region, group in posts.groupby("region.name"):
+        values = group["engagement"].to_numpy()
+        estimate = sketches.combined("engagement", "region", [region], quantiles=(0.5,))["p50"]
+        assert rank_error(values, 0.5, estimate) <= 0.01
+
+    union = posts[posts["region.name"].isin(["South", "East"])]["engagement"].to_numpy()
+    estimate = sketches.combined("engagement", "region", ["South", "East", "Nowhere"], quantiles=(0.9,))["p90"]
+    assert rank_error(union, 0.9, estimate) <= 0.01
+
+    weekly = sketches.series("OTS", freq="W")
+    assert weekly["count"].sum() == n
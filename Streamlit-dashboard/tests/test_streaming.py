@@ -0,0 +1,129 @@
+"""Incremental stream state: Welford/CX, EWMA spikes and forks, against full rebuilds."""
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streaming import EWMA, SpikeDetector, StreamState, Welford  # noqa: E402
+
+ISSUES = ["Billing", "Network", "Delivery", "Uncategorized"]
+REGIONS = ["Gauteng", "Western Cape", "KwaZulu-Natal"]
+WORDS = ["router", "refund", "signal", "fibre", "invoice", "courier", "outage", "sim", "data", "airtime"]
+
+
+def make_posts(n, days=60, seed=0):
+    """Posts in time order, as rows arrive in the data.csv append log."""
+    rng = np.random.default_rng(seed)
+    published = pd.Timestamp("2024-01-01") + pd.to_timedelta(np.sort(rng.integers(0, days * 86_400, n)), unit="s")
+    issue = rng.choice(ISSUES, size=n)
+    return pd.DataFrame({
+        "published": published,
+        "extract": [" ".join(rng.choice(WORDS, size=6)) for _ in range(n)],
+        "engagement": rng.lognormal(1.0, 1.0, size=n).round(),
+        "sentiment": rng.normal(size=n),
+        "OTS": rng.exponential(1_000, size=n).round(),
+        "city.name": rng.choice(["Johannesburg", "Cape Town", "Durban"], size=n),
+        "region.name": rng.choice(REGIONS, size=n),
+        "issue": issue,
+        "customer_issue": issue,
+    })
+
+
+def ingest_in_batches(posts, cuts):
+    state = StreamState()
+    for cut in [*cuts, len(posts)]:
+        state = state.ingest(posts.iloc[:cut])
+    return state
+
+
+def test_welford_add_and_merge_match_numpy():
+    values = np.random.default_rng(1).normal(5.0, 2.0, size=1_001)
+    added = Welford()
+    for x in [*values, float("nan")]:
+        added.add(x)
+    merged = Welford()
+    for part in np.array_split(values, 7):
+        merged.merge(len(part), part.mean(), ((part - part.mean()) ** 2).sum())
+    for acc in (added, merged):
+        assert acc.n == len(values)
+        assert acc.mean == pytest.approx(values.mean())
+        assert acc.variance == pytest.approx(values.var(ddof=1))
+
+
+def test_incremental_ingest_matches_full_rebuild():
+    posts = make_posts(6_000)
+    full = StreamState().ingest(posts)
+    incremental = ingest_in_batches(posts, [7, 1_500, 1_501, 4_200])
+
+    assert incremental.rows == full.rows == len(posts)
+    pd.testing.assert_frame_equal(incremental.cx.frame(), full.cx.frame(), check_exact=False, rtol=1e-9)
+    pd.testing.assert_frame_equal(incremental.spikes.frame(), full.spikes.frame())
+    assert incremental.spikes.late_rows == full.spikes.late_rows == 0
+    for dimension in ("region", "city", "day"):
+        inc = incremental.quantiles.frame("engagement", dimension).set_index(dimension)["count"]
+        ref = full.quantiles.frame("engagement", dimension).set_index(dimension)["count"]
+        assert inc.sort_index().equals(ref.sort_index())
+    # Topic labels are per row and only ever set on the Uncategorized rows.
+    labelled = incremental.topics.labels >= 0
+    assert len(incremental.topics.labels) == len(posts)
+    assert labelled.any() and not labelled[posts["customer_issue"].to_numpy() != "Uncategorized"].any()
+
+
+def test_edits_to_earlier_rows_rebuild_the_state():
+    posts = make_posts(3_000)
+    state = StreamState().ingest(posts.iloc[:2_500])
+    edited = posts.copy()
+    edited.loc[3, "sentiment"] += 10
+    for changed in (edited, posts.drop(index=3).reset_index(drop=True)):
+        pd.testing.assert_frame_equal(state.ingest(changed).cx.frame(), StreamState().ingest(changed).cx.frame(),
+                                      check_exact=False, rtol=1e-9)
+
+
+def test_fork_leaves_its_parent_untouched():
+    posts = make_posts(4_000)
+    parent = StreamState().ingest(posts.iloc[:2_000])
+    before = pickle.dumps(parent)
+    child = parent.ingest(posts.iloc[:3_000])
+    sibling = parent.ingest(posts)
+    assert pickle.dumps(parent) == before
+    # Both children share the parent's label buffer; neither may change the parent's rows.
+    np.testing.assert_array_equal(sibling.topics.labels[:2_000], parent.topics.labels)
+    np.testing.assert_array_equal(child.topics.labels[:2_000], parent.topics.labels)
+
+
+def test_synthetic_spike_fires_the_detector():
+    days = pd.date_range("2024-03-01", periods=40, freq="D")
+    counts = np.full(len(days), 10)
+    counts[25] = 60
+    counts[-1] = 70
+    published = np.repeat(days + pd.Timedelta(hours=9), counts)
+    posts = pd.DataFrame({"published": published, "issue": "Billing", "region.name": "Gauteng"})
+    detector = SpikeDetector()
+    detector.update(posts)
+
+    anomalies = detector.frame()
+    billing = anomalies[(anomalies["dimension"] == "issue") & (anomalies["key"] == "Billing")]
+    assert billing["day"].tolist() == [days[-1], days[25]]
+    # The open day is scored against the EWMA, but only provisionally until a later day closes it.
+    assert billing["provisional"].tolist() == [True, False]
+    assert (billing["z"] >= 3).all()
+    assert billing.iloc[1]["expected"] == pytest.approx(10, abs=1)
+
+    # A row for a day that is already closed is only counted, never rescored.
+    detector.update(posts.iloc[:1])
+    assert detector.late_rows == 1
+    pd.testing.assert_frame_equal(detector.frame(), anomalies)
+
+
+def test_ewma_needs_warmup_and_floors_the_deviation():
+    stat = EWMA()
+    for _ in range(10):
+        stat.update(5, alpha=0.2)
+    assert stat.mean == pytest.approx(5) and stat.var == pytest.approx(0)
+    assert stat.zscore(8) == pytest.approx(3)
+    assert SpikeDetector(warmup_days=11)._is_spike(stat, 50) is False
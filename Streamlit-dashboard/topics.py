@@ -0,0 +1,167 @@
+"""Incremental topic discovery for posts the keyword taxonomy leaves over.
+
+Rows classify_customer_issue leaves "Uncategorized" are hashed with a stateless HashingVectorizer and
+clustered with MiniBatchKMeans.partial_fit, one bounded chunk at a time, as
+they are ingested. Nothing is ever refit from scratch. Memory is bounded by
+the chunk size, the cluster centres and a capped term counter per cluster,
+plus one small integer label per row. The labels live in a buffer that
+doubles when full, so appending a batch costs O(batch). A fork shares the
+buffer and only copies it if a sibling has appended past their common rows.
+
+Topics form the outer ring of the Issues-Analysis sunburst under the
+Uncategorized theme, so only that theme's rows are clustered. Its rows
+that are not clustered yet are labelled UNCLUSTERED. That keeps every path
+in the branch the same depth; plotly rejects a node that is both a leaf
+and a parent.
+"""
+import copy
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+TOPIC_CLUSTERS = 8
+TOPIC_FEATURES = 2 ** 16
+TOPIC_CHUNK = 5_000
+TOP_TERMS = 3
+# Per-cluster term counters are pruned back to KEEP_TERMS once they pass MAX_TERMS.
+MAX_TERMS = 2_000
+KEEP_TERMS = 500
+UNCLUSTERED = "Not yet clustered"
+# Columns update() reads.
+TOPIC_COLUMNS = ["customer_issue", "extract"]
+
+_claim_lock = threading.Lock()
+
+
+def _tokens(doc):
+    return doc
+
+
+def leftover_mask(posts):
+    return (posts["customer_issue"] == "Uncategorized").to_numpy()
+
+
+class _LabelBuffer:
+    """int16 storage shared by a TopicModel and its forks; `used` is the furthest row any of them wrote."""
+    __slots__ = ("data", "used")
+
+    def __init__(self, data, used):
+        self.data = data
+        self.used = used
+
+
+class TopicModel:
+    def __init__(self, n_clusters=TOPIC_CLUSTERS, n_features=TOPIC_FEATURES, seed=42):
+        from sklearn.cluster import MiniBatchKMeans
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.analyzer = HashingVectorizer(stop_words="english").build_analyzer()
+        # Texts are tokenised once by self.analyzer; the tokens feed both the hashing and the term counters.
+        self.vectorizer = HashingVectorizer(n_features=n_features, analyzer=_tokens,
+                                            alternate_sign=False, norm="l2")
+        self.kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=seed, n_init=1)
+        self.n_clusters = n_clusters
+        self.fitted = False
+        # Leftover texts seen before there were enough to seed the clusters: (row, text).
+        self.pending = []
+        self._buffer = _LabelBuffer(np.empty(0, dtype=np.int16), 0)
+        self._rows = 0
+        self.terms = [Counter() for _ in range(n_clusters)]
+        self.sizes = np.zeros(n_clusters, dtype=np.int64)
+
+    def fork(self):
+        """A copy that can be updated without changing self.
+
+        The per-row labels are shared; update() appends past this model's rows
+        only while no other fork has, so only the cluster state is copied.
+        """
+        fork = copy.copy(self)
+        fork.kmeans = copy.deepcopy(self.kmeans)
+        fork.pending = list(self.pending)
+        fork.terms = [Counter(counter) for counter in self.terms]
+        fork.sizes = self.sizes.copy()
+        return fork
+
+    @property
+    def labels(self):
+        """Topic index per row of the stream so far, -1 where there is none; a read-only view."""
+        labels = self._buffer.data[:self._rows]
+        labels.flags.writeable = False
+        return labels
+
+    def _append(self, offset, count):
+        """Make rows offset..offset + count this model's own, labelled -1; earlier rows are kept."""
+        end = offset + count
+        with _claim_lock:
+            buffer = self._buffer
+            # Rows past offset may be visible to another fork; then this model takes a copy of its own.
+            shared = offset != self._rows or buffer.used != self._rows
+            capacity = len(buffer.data)
+            if shared or end > capacity:
+                data = np.empty(max(end, 2 * capacity) if end > capacity else capacity, dtype=np.int16)
+                data[:offset] = buffer.data[:offset]
+                buffer = self._buffer = _LabelBuffer(data, offset)
+            buffer.data[offset:end] = -1
+            buffer.used = end
+        self._rows = end
+
+    def _own_labels(self):
+        # Copy-on-write for rows other forks can see; only needed once, when the clusters are seeded.
+        data = self._buffer.data.copy()
+        self._buffer = _LabelBuffer(data, self._rows)
+
+    def update(self, posts, offset):
+        """Cluster the leftover rows of posts, whose first row is row `offset` of the stream."""
+        self._append(offset, len(posts))
+        positions = np.flatnonzero(leftover_mask(posts))
+        texts = posts["extract"].iloc[positions].fillna("").astype(str).tolist()
+        rows = (positions + offset).tolist()
+        if not self.fitted:
+            self.pending.extend(zip(rows, texts))
+            if len(self.pending) < self.n_clusters:
+                return
+            rows, texts = [r for r, _ in self.pending], [t for _, t in self.pending]
+            self.pending = []
+            if rows[0] < offset:
+                self._own_labels()
+        for start in range(0, len(texts), TOPIC_CHUNK):
+            self._fit_chunk(rows[start:start + TOPIC_CHUNK], texts[start:start + TOPIC_CHUNK])
+
+    def _fit_chunk(self, rows, texts):
+        tokens = [self.analyzer(text) for text in texts]
+        matrix = self.vectorizer.transform(tokens)
+        self.kmeans.partial_fit(matrix)
+        self.fitted = True
+        assigned = self.kmeans.predict(matrix)
+        self._buffer.data[rows] = assigned
+        np.add.at(self.sizes, assigned, 1)
+        for cluster, doc in zip(assigned, tokens):
+            counter = self.terms[cluster]
+            counter.update(doc)
+            if len(counter) > MAX_TERMS:
+                self.terms[cluster] = Counter(dict(counter.most_common(KEEP_TERMS)))
+
+    def top_terms(self, cluster, n=TOP_TERMS):
+        return [term for term, _ in self.terms[cluster].most_common(n)]
+
+    def names(self):
+        return [f"Topic {i + 1}: " + ", ".join(self.top_terms(i)) if self.sizes[i] else f"Topic {i + 1}"
+                for i in range(self.n_clusters)]
+
+    def row_labels(self, posts):
+        """Topic name per row of posts (the stream so far): UNCLUSTERED for leftovers without one, else None."""
+        labels = self.labels[:len(posts)]
+        names = np.array(self.names() + [None], dtype=object)
+        # -1 picks the trailing None.
+        topics = names[labels]
+        topics[leftover_mask(posts) & (labels < 0)] = UNCLUSTERED
+        return pd.Series(topics, dtype=object)
+
+    def summary(self):
+        return pd.DataFrame({
+            "topic": self.names(),
+            "rows": self.sizes,
+            "top_terms": [", ".join(self.top_terms(i, 8)) for i in range(self.n_clusters)],
+        }).query("rows > 0").sort_values("rows", ascending=False).reset_index(drop=True)
@@ -0,0 +1,108 @@
+"""Word-cloud PNGs rendered off the request thread and cached per data version.
+
+Term counts are computed once per (data version, filter) with
+compute.word_frequencies, and the image is drawn with
+WordCloud.generate_from_frequencies on a small worker pool, without
+matplotlib. The PNG bytes are cached process-wide by (data version, filter,
+size). A repeat request from any session returns instantly. A cold request
+never blocks the request thread: it starts the render, or joins the one
+already running, and gets the job back so the page can poll for it.
+"""
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from wordcloud import STOPWORDS, WordCloud
+
+from compute import word_frequencies
+from perf import incr, span
+
+MAX_IMAGES = 32
+MAX_WORDS = 200
+
+_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="wordcloud")
+_lock = threading.Lock()
+_images = OrderedDict()
+_frequencies = OrderedDict()
+_jobs = {}
+
+
+def _remember(cache, key, value):
+    with _lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > MAX_IMAGES:
+            cache.popitem(last=False)
+
+
+def _filter_mask(posts, filters):
+    mask = None
+    for column, value in filters:
+        match = (posts[column] == value).to_numpy()
+        mask = match if mask is None else mask & match
+    return mask
+
+
+def frequencies(snap, filters=()):
+    key = (snap.version, filters)
+    with _lock:
+        cached = _frequencies.get(key)
+    if cached is None:
+        posts = snap.posts
+        mask = _filter_mask(posts, filters)
+        texts = posts["extract"] if mask is None else posts["extract"][mask]
+        with span("aggregate", "word_frequencies"):
+            cached = word_frequencies(texts, STOPWORDS, limit=MAX_WORDS)
+        _remember(_frequencies, key, cached)
+    return cached
+
+
+def _render(snap, filters, width, height):
+    counts = frequencies(snap, filters)
+    if not counts:
+        return b""
+    with span("figure", "word_cloud_png"):
+        cloud = WordCloud(width=width, height=height, background_color="white", max_words=MAX_WORDS)
+        image = cloud.generate_from_frequencies(counts).to_image()
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def _run(key, snap, filters, width, height):
+    try:
+        try:
+            png = _render(snap, filters, width, height)
+        except Exception as e:
+            # Cached like an image, so polling pages see the failure instead of resubmitting forever.
+            incr("wordcloud.error")
+            png = e
+        _remember(_images, key, png)
+        return png
+    finally:
+        with _lock:
+            _jobs.pop(key, None)
+
+
+def word_cloud_png(snap, filters=(), width=800, height=400):
+    """(png, job) for the filtered posts, without waiting.
+
+    png is the PNG bytes, b"" when there is nothing to draw, or None while job is still rendering it.
+    A render that failed raises its exception here. filters is a tuple of (column, value) pairs that
+    must all match.
+    """
+    key = (snap.version, tuple(filters), width, height)
+    with _lock:
+        if key in _images:
+            _images.move_to_end(key)
+            incr("wordcloud.hit")
+            png = _images[key]
+            if isinstance(png, Exception):
+                raise png
+            return png, None
+        job = _jobs.get(key)
+        if job is None:
+            incr("wordcloud.miss")
+            job = _jobs[key] = _pool.submit(_run, key, snap, tuple(filters), width, height)
+    return None, job